@@ -5,14 +5,14 @@ import logging
 
 import streamlit as st
 
-from src.db import init_db
+from src.startup import bootstrap
 from src.utils import login_gate, sidebar_header
 
 logging.basicConfig(level=logging.INFO)
 
 st.set_page_config(page_title="ClienteFlow", layout="wide")
-init_db()
-sidebar_header("ClienteFlow")
+bootstrap()
+sidebar_header("ClienteFlow", __file__)
 
 st.title("ClienteFlow")
 st.write("Cadastro de Clientes + Agenda de Contato")
@@ -22,6 +22,6 @@ if not login_gate():
 
 st.success("Autenticado")
 st.markdown(
-    "Use o menu lateral para acessar Clientes, Agenda e Ajuda. "
+    "Use o menu lateral para acessar Clientes, Agenda, Dashboard e Ajuda. "
     "Os dados ficam em data/app.db."
 )
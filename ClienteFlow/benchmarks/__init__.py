@@ -0,0 +1 @@
+"""Benchmarks for ClienteFlow (run from the project folder with `python -m`)."""
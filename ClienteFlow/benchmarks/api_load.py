@@ -0,0 +1,237 @@
+"""Local load test of the REST API (`src.api`).
+
+Starts the API with uvicorn on a temporary database filled by
+`benchmarks.datagen` (or on `--db`), or targets a running server with
+`--url`, then runs `--concurrency` keep-alive clients for `--seconds`.
+The request mix pages through clients and contacts, reads single clients,
+revalidates earlier responses with If-None-Match and, with `--writes`,
+edits clients so ETags keep moving. Clients use only the standard library.
+
+    python -m benchmarks.api_load --clients 20000 --concurrency 16 --seconds 20
+    python -m benchmarks.api_load --url http://127.0.0.1:8000 --writes 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SEARCHES = ["silva", "santos", "ana", "joao", "oliveira", "maria", "souza"]
+CANAIS = ["telefone", "email", "whatsapp", "reuniao", "outro"]
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+class LoadClient(threading.Thread):
+    """One keep-alive connection issuing the request mix until `deadline`."""
+
+    def __init__(self, url: str, deadline: float, writes: float, seed: int, token: str | None):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.deadline = deadline
+        self.writes = writes
+        self.rng = random.Random(seed)
+        self.headers = {"Accept-Encoding": "gzip"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[int, int] = defaultdict(int)
+        self.etags: dict[str, str] = {}
+        self.client_ids: list[int] = []
+
+    def request(self, name: str, method: str, path: str, body: dict | None = None) -> dict | None:
+        headers = dict(self.headers)
+        if method == "GET" and path in self.etags and self.rng.random() < 0.5:
+            headers["If-None-Match"] = self.etags[path]
+            name += " (condicional)"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        self.statuses[response.status] += 1
+        if response.getheader("ETag"):
+            self.etags[path] = response.getheader("ETag")
+        if response.status != 200:
+            return None
+        if response.getheader("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    def step(self) -> None:
+        roll = self.rng.random()
+        if roll < self.writes and self.client_ids:
+            client_id = self.rng.choice(self.client_ids)
+            self.request(
+                "PATCH /clientes/{id}",
+                "PATCH",
+                f"/clientes/{client_id}",
+                {"cargo": f"cargo {self.rng.randrange(1000)}"},
+            )
+        elif roll < 0.35:
+            params = {"limit": 50}
+            if self.rng.random() < 0.5:
+                params["search"] = self.rng.choice(SEARCHES)
+            page = self.request("GET /clientes", "GET", f"/clientes?{urlencode(params)}")
+            if page:
+                self.client_ids = [item["id"] for item in page["items"]] or self.client_ids
+        elif roll < 0.65:
+            params = {"limit": 50}
+            if self.rng.random() < 0.5:
+                params["canal"] = self.rng.choice(CANAIS)
+            self.request("GET /contatos", "GET", f"/contatos?{urlencode(params)}")
+        elif self.client_ids:
+            client_id = self.rng.choice(self.client_ids)
+            self.request("GET /clientes/{id}", "GET", f"/clientes/{client_id}")
+        else:
+            self.request("GET /clientes", "GET", "/clientes?limit=50")
+
+    def run(self) -> None:
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        while time.perf_counter() < self.deadline:
+            self.step()
+        self.connection.close()
+
+
+def _wait_ready(url: str, token: str | None, timeout: float = 60) -> None:
+    parts = urlsplit(url)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+            connection.request("GET", "/saude", headers=headers)
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"API nao respondeu em {url}")
+
+
+def run(url: str, concurrency: int, seconds: float, writes: float, token: str | None) -> dict:
+    _wait_ready(url, token)
+    deadline = time.perf_counter() + seconds
+    clients = [
+        LoadClient(url, deadline, writes, seed, token) for seed in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    samples: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[int, int] = defaultdict(int)
+    for client in clients:
+        for name, values in client.samples.items():
+            samples[name].extend(values)
+        for status, count in client.statuses.items():
+            statuses[status] += count
+    total = sum(len(values) for values in samples.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "requests_per_s": round(total / elapsed, 1),
+        "all": _percentiles([value for values in samples.values() for value in values]),
+        "endpoints": {
+            name: {"count": len(values), **_percentiles(values)}
+            for name, values in sorted(samples.items())
+        },
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga da API REST")
+    parser.add_argument("--url", help="API ja em execucao (padrao: sobe uma local)")
+    parser.add_argument("--db", type=Path, help="banco existente (padrao: temporario)")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--contacts", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writes", type=float, default=0.0, help="fracao de PATCH")
+    parser.add_argument("--output", type=Path, help="grava os resultados em JSON")
+    args = parser.parse_args()
+    token = os.getenv("CLIENTEFLOW_API_TOKEN")
+
+    server = tmp = None
+    url = args.url
+    if url is None:
+        if args.db is None:
+            tmp = tempfile.TemporaryDirectory()
+            args.db = Path(tmp.name) / "api.db"
+        env = {
+            **os.environ,
+            "CLIENTEFLOW_DB_PATH": str(args.db),
+            "CLIENTEFLOW_API_PORT": str(args.port),
+        }
+        if tmp is not None:
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.datagen",
+                    "--clients",
+                    str(args.clients),
+                    "--contacts",
+                    str(args.contacts),
+                    "--heavy",
+                    "0",
+                ],
+                cwd=BASE_DIR,
+                env=env,
+                check=True,
+                capture_output=True,
+            )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src.api"],
+            cwd=BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        result = run(url, args.concurrency, args.seconds, args.writes, token)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if tmp is not None:
+            tmp.cleanup()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""Backend smoke harness: the same service scenario on SQLite and PostgreSQL.
+
+Each backend runs in a child process, since the engine is built at import
+time from CLIENTEFLOW_DATABASE_URL. SQLite uses a temporary file. For
+PostgreSQL, pass --postgres-url, or let the harness create a throwaway
+cluster with initdb/pg_ctl (from PATH or `pg_config --bindir`) in a
+temporary directory, listening only on a Unix socket, so no external
+service is needed. PostgreSQL needs the psycopg driver and the pg_trgm
+contrib extension; initdb refuses to run as root.
+
+    python -m benchmarks.backends
+    python -m benchmarks.backends --backend sqlite
+    python -m benchmarks.backends --backend postgres --postgres-url postgresql+psycopg://...
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def _pg_bindir() -> Path:
+    pg_ctl = shutil.which("pg_ctl")
+    if pg_ctl:
+        return Path(pg_ctl).parent
+    try:
+        bindir = Path(
+            subprocess.run(
+                ["pg_config", "--bindir"], check=True, capture_output=True, text=True
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        bindir = None
+    if bindir is None or not (bindir / "initdb").exists():
+        raise RuntimeError("PostgreSQL nao encontrado (initdb/pg_ctl); use --postgres-url")
+    return bindir
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_postgres() -> Iterator[str]:
+    """Start a temporary PostgreSQL cluster and yield its SQLAlchemy URL."""
+    bindir = _pg_bindir()
+    with tempfile.TemporaryDirectory(prefix="clienteflow-pg-") as tmp:
+        data_dir = Path(tmp) / "data"
+        subprocess.run(
+            [
+                bindir / "initdb",
+                "-D",
+                data_dir,
+                "-U",
+                "postgres",
+                "-A",
+                "trust",
+                "--no-sync",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        port = _free_port()
+        pg_ctl = bindir / "pg_ctl"
+        subprocess.run(
+            [
+                pg_ctl,
+                "-D",
+                data_dir,
+                "-l",
+                Path(tmp) / "postgres.log",
+                "-o",
+                f"-F -p {port} -k {tmp} -c listen_addresses=''",
+                "-w",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield f"postgresql+psycopg://postgres@/postgres?host={tmp}&port={port}"
+        finally:
+            subprocess.run(
+                [pg_ctl, "-D", data_dir, "-m", "immediate", "stop"],
+                capture_output=True,
+            )
+
+
+def _checks() -> list[tuple[str, Callable[[], None]]]:
+    """Service-level scenario; each check raises AssertionError on mismatch."""
+    from src import changelog, export, services
+    from src.db import engine, init_db
+    from src.importer import import_clients, import_contacts
+    from src.migrations import LATEST_VERSION
+    from src.schemas import ClientCreate, ClientUpdate, ContactCreate, ContactUpdate
+
+    state: dict = {}
+    today = date.today()
+
+    def migrate() -> None:
+        init_db()
+        from src.migrations import current_version
+
+        with engine.connect() as connection:
+            assert current_version(connection) == LATEST_VERSION
+
+    def create_clients() -> None:
+        state["ids"] = [
+            services.create_client(
+                ClientCreate(
+                    nome=f"Ana Silva {i}" if i % 2 else f"Bruno Souza {i}",
+                    email=f"cliente{i}@exemplo.com",
+                    telefone=f"(11) 9000-{i:04d}",
+                    empresa="Acme" if i % 3 else "Beta",
+                    tags="vip, novo" if i % 4 == 0 else "novo",
+                )
+            ).id
+            for i in range(40)
+        ]
+        assert services.count_clients() == 40
+
+    def search_and_tags() -> None:
+        assert services.count_clients(search="silv") == 20
+        assert services.count_clients(search="cliente7@") == 1
+        assert services.count_clients(empresa="beta") == 14
+        assert services.count_clients(tags="vip") == 10
+        assert services.count_clients(tags="vip, novo", tags_mode="all") == 10
+        assert services.count_clients(tags="vip, novo", tags_mode="any") == 40
+        assert dict(services.tag_counts()) == {"novo": 40, "vip": 10}
+        assert services.client_options("bruno", 5)
+
+    def paginate_clients() -> None:
+        seen, cursor = [], None
+        while True:
+            page = services.client_table_page(after=cursor, limit=7)
+            seen.extend(page.items["id"])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert sorted(seen) == sorted(state["ids"]) and len(set(seen)) == 40
+
+    def write_contacts() -> None:
+        start = datetime.combine(today - timedelta(days=20), datetime.min.time())
+        contacts = []
+        for i, client_id in enumerate(state["ids"]):
+            for j in range(3):
+                contacts.append(
+                    services.create_contact(
+                        ContactCreate(
+                            cliente_id=client_id,
+                            data_hora=start + timedelta(days=j * 5, hours=i % 9),
+                            canal=("telefone", "email", "whatsapp")[j],
+                            assunto=f"Reuniao {i}-{j}",
+                            notas="proposta comercial enviada" if j == 2 else None,
+                            proximo_contato=today - timedelta(days=1) if j == 2 else None,
+                        )
+                    )
+                )
+        state["contacts"] = contacts
+        services.update_contact(
+            contacts[0].id, ContactUpdate(data_hora=start + timedelta(days=1), canal="email")
+        )
+        assert services.delete_contact(contacts[1].id)
+        assert services.count_contacts() == 119
+
+    def rollups_match() -> None:
+        window = (today - timedelta(days=30), today)
+        assert services.contacts_per_day(*window) == services.contacts_per_day(
+            *window, use_rollups=False
+        )
+        assert services.contacts_per_client(*window) == services.contacts_per_client(
+            *window, use_rollups=False
+        )
+        assert services.count_client_contacts(state["ids"][0]) == 2
+
+    def notes_and_followups() -> None:
+        assert services.count_contacts(texto="proposta") == 40
+        assert services.count_contacts(texto="reuniao 3-1") >= 1
+        assert services.count_overdue_followups(today) == 40
+        assert len(services.due_followups(today)) == 40
+
+    def update_and_delete_client() -> None:
+        client_id = state["ids"][-1]
+        services.update_client(client_id, ClientUpdate(nome="Zeca Renomeado", tags="vip"))
+        assert services.count_clients(search="zeca") == 1
+        assert services.count_clients(tags="vip") == 11
+        assert services.delete_client(client_id)
+        assert services.count_clients() == 39
+        assert services.count_contacts() == 116
+        assert services.count_overdue_followups(today) == 39
+
+    def exports() -> None:
+        lines = "".join(export.iter_contacts_csv(canal="whatsapp")).splitlines()
+        assert len(lines) == 1 + services.count_contacts(canal="whatsapp")
+        if export.columnar_available():
+            import pyarrow.parquet as pq
+
+            with export.clients_columnar_file("parquet", empresa="acme") as output:
+                assert pq.read_table(output).num_rows == services.count_clients(
+                    empresa="acme"
+                )
+
+    def imports() -> None:
+        clients_csv = "nome;email;tags\nImportado A;imp-a@exemplo.com;x\nDuplicado;cliente0@exemplo.com;\n"
+        result = import_clients(io.BytesIO(clients_csv.encode()), "clientes.csv")
+        assert (result.inserted, result.duplicates) == (1, 1)
+        contacts_csv = (
+            "cliente_email,data_hora,canal,assunto\n"
+            f"imp-a@exemplo.com,{today.isoformat()} 10:00,email,Importado\n"
+        )
+        result = import_contacts(io.BytesIO(contacts_csv.encode()), "contatos.csv")
+        assert result.inserted == 1 and not result.errors
+        assert services.count_clients(tags="x") == 1
+
+    def batch_tags_parity() -> None:
+        import pandas as pd
+
+        from src.utils import normalize_tags
+        from src.validation import normalize_tags_series
+
+        values = [
+            "vip, novo",
+            " a ,, b ",
+            "a,\xa0,b",
+            "\xa0a, b\xa0",
+            "a,\u2003\u3000,b\u202f",
+            "x\xa0y, z",
+            ", \xa0,",
+            "",
+            None,
+        ]
+        normalized = normalize_tags_series(pd.Series(values))
+        got = [None if pd.isna(value) else value for value in normalized]
+        assert got == [normalize_tags(value) for value in values], got
+
+    def change_log() -> None:
+        entries = services.changes_since(0, limit=100_000)
+        seqs = [entry["seq"] for entry in entries]
+        assert seqs == sorted(seqs) and len(set(seqs)) == len(seqs)
+        deleted = state["ids"][-1]
+        assert {"tabela": "clientes", "operacao": "delete", "id": deleted} in [
+            {key: entry[key] for key in ("tabela", "operacao", "id")}
+            for entry in entries
+        ]
+        with engine.begin() as connection:
+            counts = changelog.compact(connection, retention_days=0)
+            assert counts["superseded"] > 0 and counts["expired_deletes"] > 0
+            latest = changelog.head(connection)
+        assert latest >= seqs[-1]
+        try:
+            services.changes_since(0)
+        except changelog.ChangeLogExpired:
+            pass
+        else:
+            raise AssertionError("posicao compactada deveria expirar")
+        assert services.changes_since(latest) == []
+
+    def rest_api() -> None:
+        # Optional dependencies: only checked where the API can run.
+        try:
+            from fastapi.testclient import TestClient
+
+            from src import api
+        except (ImportError, RuntimeError):
+            print("    (fastapi/httpx nao instalados; API nao verificada)")
+            return
+        from sqlalchemy import delete, insert
+
+        from src.models import Contato
+
+        client = TestClient(api.app)
+        client_id = state["ids"][0]
+        contact_id = state["contacts"][0].id
+        response = client.patch(f"/clientes/{client_id}", json={"nome": None})
+        assert response.status_code == 422, response.text
+        response = client.patch(f"/contatos/{contact_id}", json={"data_hora": None})
+        assert response.status_code == 422, response.text
+        response = client.patch(f"/contatos/{contact_id}", json={"assunto": "Via API"})
+        assert response.status_code == 200 and response.json()["canal"] == "email"
+        response = client.patch(f"/contatos/{contact_id}", json={"cliente_id": None})
+        assert response.status_code == 422, response.text
+        if engine.dialect.name != "sqlite":
+            return
+        # A contact whose client is gone (possible without foreign keys) is
+        # still listed.
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            try:
+                orphan_id = connection.execute(
+                    insert(Contato).values(
+                        cliente_id=max(state["ids"]) + 1000,
+                        data_hora=datetime.now() + timedelta(days=1),
+                        canal="outro",
+                        assunto="Sem cliente",
+                        criado_em=datetime.now(),
+                    )
+                ).inserted_primary_key[0]
+                connection.commit()
+            finally:
+                connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+        try:
+            response = client.get("/contatos", params={"limit": 5})
+            assert response.status_code == 200, response.text
+            first = response.json()["items"][0]
+            assert (first["id"], first["cliente"]) == (orphan_id, None)
+        finally:
+            with engine.begin() as connection:
+                connection.execute(delete(Contato).where(Contato.id == orphan_id))
+
+    return [
+        ("migracoes", migrate),
+        ("cadastro de clientes", create_clients),
+        ("busca e tags", search_and_tags),
+        ("paginacao", paginate_clients),
+        ("contatos", write_contacts),
+        ("agregados", rollups_match),
+        ("notas e follow-up", notes_and_followups),
+        ("edicao e exclusao", update_and_delete_client),
+        ("exportacao", exports),
+        ("importacao", imports),
+        ("tags em lote", batch_tags_parity),
+        ("log de alteracoes", change_log),
+        ("api rest", rest_api),
+    ]
+
+
+def run_checks() -> int:
+    """Run the scenario against the configured database (child process)."""
+    failures = 0
+    for name, check in _checks():
+        started = time.perf_counter()
+        try:
+            check()
+        except Exception:
+            failures += 1
+            print(f"  FALHOU {name}")
+            print("    " + traceback.format_exc().strip().replace("\n", "\n    "))
+            if name == "migracoes":
+                break
+        else:
+            print(f"  ok     {name} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return 1 if failures else 0
+
+
+def _run_child(url: str) -> int:
+    env = {**os.environ, "CLIENTEFLOW_DATABASE_URL": url}
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.backends", "--child"], cwd=BASE_DIR, env=env
+    ).returncode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["sqlite", "postgres", "all"], default="all")
+    parser.add_argument("--postgres-url", help="usa este banco em vez de criar um local")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.exit(run_checks())
+
+    status = 0
+    if args.backend in ("sqlite", "all"):
+        print("sqlite")
+        with tempfile.TemporaryDirectory(prefix="clienteflow-sqlite-") as tmp:
+            status |= _run_child(f"sqlite:///{Path(tmp) / 'app.db'}")
+    if args.backend in ("postgres", "all"):
+        print("postgresql")
+        if args.postgres_url:
+            status |= _run_child(args.postgres_url)
+        else:
+            try:
+                with local_postgres() as url:
+                    status |= _run_child(url)
+            except (RuntimeError, subprocess.CalledProcessError) as exc:
+                print(f"  FALHOU ao iniciar PostgreSQL local: {exc}")
+                status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
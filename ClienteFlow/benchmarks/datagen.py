@@ -0,0 +1,175 @@
+"""Synthetic Brazilian client/contact data for benchmarks.
+
+    python -m benchmarks.datagen --clients 10000 --contacts 20
+
+Writes into the database configured for the app (CLIENTEFLOW_DB_PATH, or
+data/app.db). Rows are inserted in batches through core INSERTs, then the
+derived tables (tags, rollups, last contacts, duplicate keys, note vectors)
+are rebuilt in one pass.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import unicodedata
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+PRIMEIROS_NOMES = [
+    "Ana", "Beatriz", "Bruno", "Camila", "Carlos", "Daniela", "Eduardo", "Fernanda",
+    "Gabriel", "Helena", "Igor", "Joana", "João", "Júlia", "Larissa", "Lucas",
+    "Luiz", "Marcos", "Maria", "Mariana", "Mateus", "Natália", "Otávio", "Paula",
+    "Pedro", "Rafael", "Renata", "Rodrigo", "Sérgio", "Tatiana", "Thiago", "Vitória",
+]
+SOBRENOMES = [
+    "Almeida", "Alves", "Araújo", "Barbosa", "Cardoso", "Carvalho", "Castro", "Costa",
+    "Dias", "Fernandes", "Ferreira", "Gomes", "Lima", "Martins", "Melo", "Moreira",
+    "Nascimento", "Oliveira", "Pereira", "Ribeiro", "Rocha", "Rodrigues", "Santos",
+    "Silva", "Soares", "Souza", "Teixeira", "Vieira",
+]
+EMPRESAS = [
+    "Acme Ltda", "Alfa Comércio", "Beta Serviços", "Casa do Pão",
+    "Construtora Horizonte", "Delta Logística", "Farmácia São João", "Grupo Aurora", "Itaú Parceiros",
+    "Mercado Bom Preço", "Nova Era Tecnologia", "Padaria Estrela", "Rede Sul Energia",
+    "Solar Engenharia", "Transportes Rápido", "Vale Verde Agro",
+]
+CARGOS = [
+    "Analista", "Comprador", "Coordenador", "Diretor", "Gerente", "Sócio", "Supervisor",
+]
+TAGS = [
+    "vip", "lead", "cliente-ativo", "inadimplente", "parceiro", "sp", "rj", "mg",
+    "indicacao", "evento", "newsletter", "b2b", "b2c",
+]
+DDDS = ["11", "21", "31", "41", "51", "61", "71", "81", "85", "92"]
+DOMINIOS = ["gmail.com", "hotmail.com", "outlook.com", "uol.com.br", "empresa.com.br"]
+CANAIS = ["telefone", "email", "whatsapp", "reuniao", "outro"]
+ASSUNTOS = [
+    "Apresentação comercial", "Cobrança", "Dúvida sobre proposta", "Follow-up",
+    "Negociação de contrato", "Pós-venda", "Reclamação", "Renovação",
+]
+NOTAS = [
+    "Cliente pediu retorno na próxima semana.",
+    "Enviar proposta atualizada com desconto.",
+    "Interessado no plano anual, aguardando aprovação da diretoria.",
+    "Reclamou do prazo de entrega, tratar com logística.",
+    "Sem interesse no momento.",
+]
+
+
+def _ascii(value: str) -> str:
+    normalized = unicodedata.normalize("NFKD", value)
+    return normalized.encode("ascii", "ignore").decode().lower().replace(" ", "")
+
+
+def fake_client(rng: random.Random, number: int) -> dict:
+    first = rng.choice(PRIMEIROS_NOMES)
+    last = rng.choice(SOBRENOMES)
+    nome = f"{first} {rng.choice(SOBRENOMES)} {last}"
+    telefone = f"9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+    return {
+        "nome": nome,
+        "email": f"{_ascii(first)}.{_ascii(last)}{number}@{rng.choice(DOMINIOS)}",
+        "telefone": f"({rng.choice(DDDS)}) {telefone}",
+        "empresa": rng.choice(EMPRESAS),
+        "cargo": rng.choice(CARGOS),
+        "tags": ", ".join(rng.sample(TAGS, rng.randint(0, 3))) or None,
+        "observacoes": rng.choice(NOTAS) if rng.random() < 0.3 else None,
+    }
+
+
+def fake_contact(rng: random.Random, cliente_id: int, start: datetime, days: int) -> dict:
+    data_hora = start + timedelta(minutes=rng.randint(0, days * 24 * 60))
+    proximo = None
+    if rng.random() < 0.4:
+        proximo = (data_hora + timedelta(days=rng.randint(1, 30))).date()
+    return {
+        "cliente_id": cliente_id,
+        "data_hora": data_hora,
+        "canal": rng.choice(CANAIS),
+        "assunto": rng.choice(ASSUNTOS),
+        "notas": rng.choice(NOTAS) if rng.random() < 0.7 else None,
+        "proximo_contato": proximo,
+    }
+
+
+def generate(
+    clients: int,
+    contacts_per_client: int,
+    heavy_client_contacts: int = 0,
+    days: int = 365,
+    seed: int = 42,
+    batch_size: int = 5000,
+) -> dict:
+    """Insert synthetic data; returns counts and the id of the heavy client."""
+    from src.db import engine, init_db
+    from src.dedupe import rebuild as rebuild_duplicates
+    from src.followups import rebuild as rebuild_last_contacts
+    from src.models import Cliente, Contato
+    from src.rollups import rebuild as rebuild_rollups
+    from src.semantic import rebuild as rebuild_note_vectors
+    from src.tags import backfill as backfill_tags
+
+    init_db()
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+    total_contacts = 0
+    heavy_client_id = None
+    with engine.begin() as connection:
+        for offset in range(0, clients, batch_size):
+            rows = [
+                fake_client(rng, number)
+                for number in range(offset, min(offset + batch_size, clients))
+            ]
+            ids = (
+                connection.execute(
+                    insert(Cliente).returning(Cliente.id, sort_by_parameter_order=True),
+                    rows,
+                )
+                .scalars()
+                .all()
+            )
+            heavy_client_id = heavy_client_id or ids[0]
+            contacts = [
+                fake_contact(rng, client_id, start, days)
+                for client_id in ids
+                for _ in range(rng.randint(0, contacts_per_client * 2))
+            ]
+            if offset == 0:
+                contacts += [
+                    fake_contact(rng, heavy_client_id, start, days)
+                    for _ in range(heavy_client_contacts)
+                ]
+            for chunk in range(0, len(contacts), batch_size):
+                connection.execute(insert(Contato), contacts[chunk : chunk + batch_size])
+            total_contacts += len(contacts)
+        backfill_tags(connection)
+        rebuild_rollups(connection)
+        rebuild_last_contacts(connection)
+        rebuild_duplicates(connection)
+        rebuild_note_vectors(connection)
+    return {
+        "clients": clients,
+        "contacts": total_contacts,
+        "heavy_client_id": heavy_client_id,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera dados sinteticos para benchmarks")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--contacts", type=int, default=20, help="media por cliente")
+    parser.add_argument(
+        "--heavy", type=int, default=5_000, help="contatos do cliente 'pesado'"
+    )
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    summary = generate(args.clients, args.contacts, args.heavy, args.days, args.seed)
+    print(f"{summary} em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
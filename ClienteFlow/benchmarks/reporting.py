@@ -0,0 +1,152 @@
+"""Interactive latency while heavy reports run, with and without the reporting copy.
+
+A temporary database is filled by `benchmarks.datagen`, then each mode runs
+in a child process (the reporting engine is configured at import time):
+one thread loops over full contact exports and the Dashboard aggregates
+without rollups, while another performs the interactive mix (a queued
+contact insert, the first Agenda page, a client search). Reported per mode:
+interactive latency, reports completed and the largest WAL file seen,
+since long read transactions on the primary keep checkpoints from
+resetting it.
+
+    python -m benchmarks.reporting --clients 20000 --contacts 20 --seconds 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+MODES = ("primario", "copia")
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def measure(seconds: float) -> dict:
+    """Run the workload in this process (child side)."""
+    from src import export, services
+    from src.db import DB_PATH, engine, init_db
+    from src.reporting import reporting_copy
+    from src.schemas import ContactCreate
+
+    init_db()
+    # Start from an empty WAL (datagen leaves a large one behind).
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    refresh_s = reporting_copy.refresh() if reporting_copy.enabled else None
+    wal = Path(f"{DB_PATH}-wal")
+    deadline = time.perf_counter() + seconds
+    today = date.today()
+    reports = {"exports": 0, "aggregates": 0}
+    wal_max = 0
+
+    def report_loop() -> None:
+        contacts_per_client = services.contacts_per_client.uncached
+        while time.perf_counter() < deadline:
+            for _ in export.iter_contacts_csv():
+                pass
+            reports["exports"] += 1
+            contacts_per_client(today - timedelta(days=365), today, use_rollups=False)
+            reports["aggregates"] += 1
+
+    reporter = threading.Thread(target=report_loop, daemon=True)
+    reporter.start()
+    samples = []
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        services.create_contact(
+            ContactCreate(
+                cliente_id=1, data_hora=datetime.now(), canal="email", assunto="carga"
+            )
+        )
+        services.contact_table_page.uncached()
+        services.count_clients.uncached(search="silva")
+        samples.append((time.perf_counter() - started) * 1000)
+        wal_max = max(wal_max, wal.stat().st_size if wal.exists() else 0)
+    reporter.join()
+    return {
+        "refresh_s": round(refresh_s, 3) if refresh_s is not None else None,
+        "interactive": {"count": len(samples), **_percentiles(samples)},
+        "reports": reports,
+        "wal_max_mb": round(wal_max / 1024 / 1024, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latencia interativa durante relatorios")
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--contacts", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--output", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.seconds)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "CLIENTEFLOW_DB_PATH": str(Path(tmp) / "app.db")}
+        env.pop("CLIENTEFLOW_REPORTING_DB_PATH", None)
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.datagen",
+                "--clients",
+                str(args.clients),
+                "--contacts",
+                str(args.contacts),
+                "--heavy",
+                "0",
+            ],
+            cwd=BASE_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        results = {}
+        for mode in MODES:
+            child_env = dict(env)
+            if mode == "copia":
+                child_env["CLIENTEFLOW_REPORTING_DB_PATH"] = str(Path(tmp) / "relatorios.db")
+            child = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.reporting",
+                    "--child",
+                    "--seconds",
+                    str(args.seconds),
+                ],
+                cwd=BASE_DIR,
+                env=child_env,
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Service-layer and page-render benchmarks with JSON output.
+
+    python -m benchmarks.run --clients 20000 --contacts 20 --output bench.json
+    python -m benchmarks.run --compare bench-main.json --output bench-branch.json
+
+By default a temporary database is generated (see `benchmarks.datagen`);
+`--db` benchmarks an existing file instead. Service calls bypass the read
+cache so every repetition hits the database.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PAGES = [
+    "app.py",
+    *sorted(str(path.relative_to(BASE_DIR)) for path in (BASE_DIR / "pages").glob("*.py")),
+]
+
+
+def timeit(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Run `func` `repeat` times (after one warm-up) and summarize in ms."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "repeat": repeat,
+    }
+
+
+def service_scenarios(heavy_client_id: int) -> dict[str, Callable[[], Any]]:
+    from src import export, services
+
+    def uncached(name: str) -> Callable[..., Any]:
+        func = getattr(services, name)
+        return getattr(func, "uncached", func)
+
+    list_clients_page = uncached("list_clients_page")
+    client_table_page = uncached("client_table_page")
+    count_clients = uncached("count_clients")
+    list_contacts_page = uncached("list_contacts_page")
+    contact_table_page = uncached("contact_table_page")
+    count_contacts = uncached("count_contacts")
+    get_client = uncached("get_client")
+
+    scenarios: dict[str, Callable[[], Any]] = {}
+    client_filters = {"search": "silva", "empresa": "acme", "tags": "vip"}
+    for size in range(len(client_filters) + 1):
+        for names in itertools.combinations(client_filters, size):
+            kwargs = {name: client_filters[name] for name in names}
+            label = "+".join(names) or "sem_filtro"
+            scenarios[f"list_clients_page[{label}]"] = (
+                lambda kwargs=kwargs: list_clients_page(**kwargs)
+            )
+            scenarios[f"client_table_page[{label}]"] = (
+                lambda kwargs=kwargs: client_table_page(**kwargs)
+            )
+            scenarios[f"count_clients[{label}]"] = (
+                lambda kwargs=kwargs: count_clients(**kwargs)
+            )
+
+    today = datetime.now().date()
+    for days in (7, 30, 365):
+        kwargs = {"data_inicio": today - timedelta(days=days), "data_fim": today}
+        scenarios[f"list_contacts_page[{days}d]"] = (
+            lambda kwargs=kwargs: list_contacts_page(**kwargs)
+        )
+        scenarios[f"contact_table_page[{days}d]"] = (
+            lambda kwargs=kwargs: contact_table_page(**kwargs)
+        )
+        scenarios[f"count_contacts[{days}d]"] = (
+            lambda kwargs=kwargs: count_contacts(**kwargs)
+        )
+        scenarios[f"list_contacts_page[{days}d+canal]"] = (
+            lambda kwargs=kwargs: list_contacts_page(**kwargs, canal="whatsapp")
+        )
+    scenarios["get_client[historico_grande]"] = lambda: get_client(heavy_client_id)
+    scenarios["export_clients_csv"] = lambda: export.clients_csv_file().close()
+    scenarios["export_contacts_csv"] = lambda: export.contacts_csv_file().close()
+    return scenarios
+
+
+def page_scenarios() -> dict[str, Callable[[], Any]]:
+    from streamlit.testing.v1 import AppTest
+
+    def render(page: str) -> None:
+        app = AppTest.from_file(str(BASE_DIR / page), default_timeout=120)
+        app.session_state["auth"] = True
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"{page}: {app.exception[0].value}")
+
+    return {f"page[{page}]": lambda page=page: render(page) for page in PAGES}
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline_path: Path) -> None:
+    """Print median deltas against a previous result file."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    print(f"{'cenario':45} {'antes':>10} {'depois':>10} {'delta':>8}")
+    for name, result in current["results"].items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["median_ms"]
+        after = result["median_ms"]
+        delta = (after - before) / before * 100 if before else 0.0
+        print(f"{name:45} {before:10.2f} {after:10.2f} {delta:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks do ClienteFlow")
+    parser.add_argument("--db", type=Path, help="banco existente (padrao: temporario)")
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--contacts", type=int, default=20)
+    parser.add_argument("--heavy", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-repeat", type=int, default=3)
+    parser.add_argument("--skip-pages", action="store_true")
+    parser.add_argument("--output", type=Path, default=Path("bench.json"))
+    parser.add_argument("--compare", type=Path, help="resultado anterior para comparar")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = Path(tmp.name) / "bench.db"
+    # Must be set before src.db is imported: the engine is built at import.
+    os.environ["CLIENTEFLOW_DB_PATH"] = str(args.db)
+    sys.path.insert(0, str(BASE_DIR))
+
+    from benchmarks.datagen import generate
+    from src.db import init_db
+
+    if tmp is not None:
+        dataset = generate(args.clients, args.contacts, args.heavy)
+    else:
+        init_db()
+        dataset = {"db": str(args.db), "heavy_client_id": 1}
+
+    results: dict[str, dict[str, float]] = {}
+    for name, func in service_scenarios(dataset["heavy_client_id"]).items():
+        results[name] = timeit(func, args.repeat)
+        print(f"{name:45} {results[name]['median_ms']:10.2f} ms")
+    if not args.skip_pages:
+        for name, func in page_scenarios().items():
+            results[name] = timeit(func, args.page_repeat)
+            print(f"{name:45} {results[name]['median_ms']:10.2f} ms")
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "dataset": dataset,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Resultados gravados em {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
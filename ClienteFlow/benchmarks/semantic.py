@@ -0,0 +1,130 @@
+"""Latency of the note similarity search at scale.
+
+Fills a temporary database with synthetic notes (CRM phrases plus a
+Zipf-distributed tail of rarer words), then measures the first load of the
+in-memory index, top-k queries, and queries right after incremental writes.
+
+    python -m benchmarks.semantic --notes 1000000 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import src.models  # noqa: F401
+from src import semantic
+from src.db import Base, build_engine
+
+from benchmarks.datagen import ASSUNTOS, NOTAS
+
+PALAVRAS = """
+    acesso agenda ajuste aprovacao atendimento atraso boleto cadastro
+    cancelamento catalogo cobranca comercial compra condicoes conta contrato
+    cotacao credito demonstracao desconto diretoria documentos entrega
+    equipamento estoque fatura financeiro frete garantia implantacao
+    integracao licenca logistica manutencao migracao nota orcamento pagamento
+    parcela pedido plano prazo preco produto proposta reajuste reclamacao
+    relatorio renovacao reuniao sistema suporte treinamento troca usuarios
+    visita
+""".split()
+
+
+def fake_note(rng: random.Random, tail: int) -> str:
+    words = [rng.choice(NOTAS), rng.choice(ASSUNTOS)]
+    for _ in range(rng.randint(3, 12)):
+        if rng.random() < 0.6:
+            words.append(rng.choice(PALAVRAS))
+        else:
+            words.append(f"termo{min(int(rng.paretovariate(1.1)), tail)}")
+    return " ".join(words)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def run(notes: int, queries: int, updates: int, limit: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'semantic.db'}")
+        Base.metadata.create_all(engine)
+
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            for offset in range(0, notes, 10_000):
+                semantic.index_notes(
+                    connection,
+                    semantic.CONTACT,
+                    (
+                        (ref_id, fake_note(rng, 50_000))
+                        for ref_id in range(offset, min(offset + 10_000, notes))
+                    ),
+                    seq=1,
+                )
+        index_s = time.perf_counter() - started
+
+        index = semantic.NoteIndex()
+        started = time.perf_counter()
+        with engine.connect() as connection:
+            index.sync(connection)
+        load_s = time.perf_counter() - started
+
+        texts = [
+            " ".join(rng.sample(PALAVRAS, rng.randint(1, 4))) for _ in range(queries)
+        ]
+        samples = []
+        with engine.connect() as connection:
+            for text in texts:
+                started = time.perf_counter()
+                index.sync(connection)
+                index.search(text, limit)
+                samples.append((time.perf_counter() - started) * 1000)
+
+        # One note rewritten per transaction, each followed by a query that
+        # has to pick it up.
+        after_write = []
+        for _ in range(updates):
+            with engine.begin() as connection:
+                semantic.index_notes(
+                    connection,
+                    semantic.CONTACT,
+                    [(rng.randrange(notes), fake_note(rng, 50_000))],
+                )
+            with engine.connect() as connection:
+                started = time.perf_counter()
+                index.sync(connection)
+                index.search(rng.choice(texts), limit)
+                after_write.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "notes": notes,
+            "index_notes_s": round(index_s, 2),
+            "first_load_s": round(load_s, 2),
+            "query": _percentiles(samples),
+            "query_after_write": _percentiles(after_write),
+            "index": index.stats(),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latencia da busca por similaridade")
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.notes, args.queries, args.updates, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
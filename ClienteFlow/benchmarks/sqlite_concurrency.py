@@ -0,0 +1,140 @@
+"""Concurrent read/write throughput of the SQLite engine profiles.
+
+Simulates several Streamlit sessions at once: writer threads register
+contacts (one transaction each, like `create_contact`) while reader threads
+page through the Agenda listing. Each profile runs against its own
+temporary database.
+
+    python -m benchmarks.sqlite_concurrency --seconds 5 --writers 4 --readers 8
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import src.models  # noqa: F401
+from src.db import SQLITE_PROFILES, Base, build_engine
+from src.models import Cliente, Contato
+
+
+def _seed(session_factory, clients: int, contacts_per_client: int) -> None:
+    start = datetime(2024, 1, 1)
+    with session_factory.begin() as session:
+        for i in range(clients):
+            client = Cliente(nome=f"Cliente {i}")
+            session.add(client)
+            session.flush()
+            session.add_all(
+                Contato(
+                    cliente_id=client.id,
+                    data_hora=start + timedelta(hours=i * contacts_per_client + j),
+                    canal="telefone",
+                    assunto="seed",
+                )
+                for j in range(contacts_per_client)
+            )
+
+
+def run_profile(
+    profile: str,
+    seconds: float,
+    writers: int,
+    readers: int,
+    clients: int = 500,
+    contacts_per_client: int = 20,
+) -> dict:
+    """Run the workload against a fresh database using `profile`."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        _seed(session_factory, clients, contacts_per_client)
+
+        counters = {"writes": 0, "reads": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def bump(name: str) -> None:
+            with lock:
+                counters[name] += 1
+
+        def writer(worker: int) -> None:
+            n = 0
+            while time.perf_counter() < deadline:
+                n += 1
+                try:
+                    with session_factory() as session:
+                        contact = Contato(
+                            cliente_id=(worker * 7919 + n) % clients + 1,
+                            data_hora=datetime.utcnow(),
+                            canal="email",
+                            assunto="bench",
+                        )
+                        session.add(contact)
+                        session.flush()
+                        session.refresh(contact)
+                        session.commit()
+                    bump("writes")
+                except OperationalError:
+                    bump("errors")
+
+        def reader(worker: int) -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    with session_factory() as session:
+                        session.execute(select(func.count(Contato.id))).scalar()
+                        session.execute(
+                            select(Contato)
+                            .order_by(Contato.data_hora.desc(), Contato.id.desc())
+                            .limit(50)
+                        ).all()
+                    bump("reads")
+                except OperationalError:
+                    bump("errors")
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "seconds": round(elapsed, 2),
+        "writes_per_s": round(counters["writes"] / elapsed, 1),
+        "reads_per_s": round(counters["reads"] / elapsed, 1),
+        "lock_errors": counters["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument(
+        "--profiles", nargs="+", default=["legacy", "tuned"], choices=sorted(SQLITE_PROFILES)
+    )
+    args = parser.parse_args()
+    results = [
+        run_profile(profile, args.seconds, args.writers, args.readers)
+        for profile in args.profiles
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Cold-start and per-rerun cost of each Streamlit script.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --clients 20000 --reruns 20 --output startup.json
+
+Every page runs in a fresh interpreter (after importing streamlit itself),
+so the first run includes the app imports and the one-time bootstrap; the
+following runs are the reruns Streamlit performs on each interaction.
+`setup_ms` is the time from `bootstrap()` to the sidebar, as reported in
+the rerun logs.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.run import BASE_DIR, PAGES
+
+
+def measure(page: str, reruns: int) -> dict[str, float]:
+    """Time the first run and `reruns` reruns of `page` (child process)."""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    streamlit_ms = (time.perf_counter() - started) * 1000
+    app = AppTest.from_file(str(BASE_DIR / page), default_timeout=120)
+    app.session_state["auth"] = True
+    started = time.perf_counter()
+    app.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    if app.exception:
+        raise RuntimeError(f"{page}: {app.exception[0].value}")
+    modules = sum(name == "src" or name.startswith("src.") for name in sys.modules)
+
+    samples, setup = [], []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        samples.append((time.perf_counter() - started) * 1000)
+        stats = app.session_state["query_stats"]
+        setup.append(stats.setup_ms)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return {
+        "import_streamlit_ms": round(streamlit_ms, 3),
+        "cold_ms": round(cold_ms, 3),
+        "rerun_median_ms": round(statistics.median(samples), 3),
+        "rerun_p95_ms": round(p95, 3),
+        "setup_median_ms": round(statistics.median(setup), 3),
+        "src_modules": modules,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tempo de inicializacao das paginas")
+    parser.add_argument("--db", type=Path, help="banco existente (padrao: temporario)")
+    parser.add_argument("--clients", type=int, default=2_000)
+    parser.add_argument("--contacts", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.reruns)))
+        return
+
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = Path(tmp.name) / "startup.db"
+    env = {**os.environ, "CLIENTEFLOW_DB_PATH": str(args.db)}
+    if tmp is not None:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.datagen",
+                "--clients",
+                str(args.clients),
+                "--contacts",
+                str(args.contacts),
+                "--heavy",
+                "0",
+            ],
+            cwd=BASE_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+    results: dict[str, dict[str, float]] = {}
+    print(f"{'pagina':28} {'frio':>10} {'rerun':>10} {'p95':>10} {'preparo':>10}")
+    for page in PAGES:
+        child = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.startup",
+                "--child",
+                page,
+                "--reruns",
+                str(args.reruns),
+            ],
+            cwd=BASE_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        result = results[page] = json.loads(child.stdout.strip().splitlines()[-1])
+        print(
+            f"{page:28} {result['cold_ms']:8.1f}ms {result['rerun_median_ms']:8.1f}ms "
+            f"{result['rerun_p95_ms']:8.1f}ms {result['setup_median_ms']:8.2f}ms"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Resultados gravados em {args.output}")
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,58 @@
 """Clientes page."""
 from __future__ import annotations
 
-from datetime import datetime, time as time_cls
+from datetime import datetime, time as time_cls, timedelta
 
 import streamlit as st
 from pydantic import ValidationError
 
-from src.db import init_db
-from src.export import clients_to_csv
-from src.schemas import ClientCreate, ClientUpdate, ContactCreate
+from src.components import export_download
 from src.services import (
+    client_label,
+    client_table_page,
+    count_client_contacts,
+    count_clients,
+    count_contacts,
     create_client,
     create_contact,
     delete_client,
     get_client,
-    list_clients,
+    list_contacts_page,
+    tag_counts,
     update_client,
 )
-from src.utils import require_auth, sidebar_header
+from src.startup import bootstrap
+from src.utils import page_controls, page_cursor, require_auth, sidebar_header
 
-init_db()
+bootstrap()
 require_auth()
-sidebar_header("ClienteFlow")
+sidebar_header("ClienteFlow", __file__)
 
 st.title("Clientes")
 
-col1, col2, col3 = st.columns(3)
+col1, col2, col3, col4 = st.columns([3, 3, 3, 1])
 search = col1.text_input("Busca (nome/email/telefone/empresa/tags)")
 empresa = col2.text_input("Filtro por empresa")
-tags = col3.text_input("Filtro por tags")
+tags = col3.text_input("Filtro por tags (tag1, tag2)")
+tags_mode = col3.radio(
+    "Combinar tags",
+    options=["any", "all"],
+    format_func={"any": "Qualquer uma", "all": "Todas"}.get,
+    horizontal=True,
+    label_visibility="collapsed",
+)
+page_size = col4.selectbox("Por pagina", options=[25, 50, 100, 200], index=1)
 
-clients = list_clients(search=search, empresa=empresa, tags=tags)
+client_filters = {
+    "search": search,
+    "empresa": empresa,
+    "tags": tags,
+    "tags_mode": tags_mode,
+}
+filters = tuple(client_filters.values())
+cursor = page_cursor("clientes_page", (filters, page_size))
+page = client_table_page(**client_filters, after=cursor, limit=page_size)
+clients = page.items
 
 with st.expander("Novo cliente"):
     with st.form("form_novo_cliente"):
@@ -44,6 +66,8 @@ with st.expander("Novo cliente"):
         submitted = st.form_submit_button("Salvar")
 
     if submitted:
+        from src.schemas import ClientCreate
+
         try:
             create_client(
                 ClientCreate(
@@ -63,40 +87,104 @@ with st.expander("Novo cliente"):
         except Exception as exc:
             st.error(f"Erro ao criar cliente: {exc}")
 
+with st.expander("Importar clientes ou contatos (CSV/XLSX)"):
+    st.caption(
+        "Clientes: colunas nome, email, telefone, empresa, cargo, tags, observacoes. "
+        "Contatos: cliente_id ou cliente_email, data_hora, canal, assunto, notas, "
+        "proximo_contato. Clientes com email ou telefone ja cadastrado sao ignorados."
+    )
+    tipo_importacao = st.radio(
+        "Tipo de importacao", options=["Clientes", "Contatos"], horizontal=True
+    )
+    arquivo = st.file_uploader("Arquivo", type=["csv", "xlsx"])
+    if arquivo is not None and st.button("Importar"):
+        # Only loaded when importing: pulls in the batch validation stack.
+        from src.importer import import_clients, import_contacts
+
+        importar = import_clients if tipo_importacao == "Clientes" else import_contacts
+        try:
+            with st.spinner("Importando..."):
+                st.session_state["importacao"] = importar(arquivo, arquivo.name)
+        except Exception as exc:
+            st.error(f"Erro ao importar: {exc}")
+    resultado = st.session_state.get("importacao")
+    if resultado is not None:
+        if resultado.aborted:
+            st.error(
+                f"Importacao {resultado.aborted}. "
+                "Os registros anteriores ja foram gravados."
+            )
+        st.success(
+            f"{resultado.inserted} registros importados, "
+            f"{resultado.rejected} rejeitados ({resultado.duplicates} duplicados)"
+        )
+        if resultado.errors:
+            st.download_button(
+                "Baixar relatorio de erros",
+                data=resultado.error_report_csv(),
+                file_name="erros_importacao.csv",
+                mime="text/csv",
+            )
+
+with st.expander("Tags mais usadas"):
+    facet = tag_counts(**client_filters)
+    if facet:
+        st.dataframe(
+            [{"tag": nome, "clientes": total} for nome, total in facet],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.info("Nenhuma tag encontrada")
+
 st.subheader("Lista de clientes")
 
-if not clients:
+if clients.empty:
     st.info("Nenhum cliente encontrado")
 else:
-    table = [
-        {
-            "id": client.id,
-            "nome": client.nome,
-            "email": client.email or "",
-            "telefone": client.telefone or "",
-            "empresa": client.empresa or "",
-            "tags": client.tags or "",
-            "atualizado_em": client.atualizado_em.strftime("%Y-%m-%d %H:%M"),
-        }
-        for client in clients
-    ]
-    st.dataframe(table, use_container_width=True, hide_index=True)
-
-    csv_data = clients_to_csv(clients)
-    st.download_button(
-        "Exportar CSV (clientes filtrados)",
-        data=csv_data,
-        file_name="clientes.csv",
-        mime="text/csv",
+    st.dataframe(
+        clients,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "atualizado_em": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+        },
     )
+    page_controls(
+        "clientes_page",
+        total=count_clients(**client_filters),
+        page_size=page_size,
+        next_cursor=page.next_cursor,
+    )
+
+    def clientes_csv():
+        from src.export import clients_csv_file
+
+        return clients_csv_file(**client_filters)
 
+    def clientes_colunar(fmt: str):
+        from src.export import clients_columnar_file
+
+        return clients_columnar_file(fmt, **client_filters)
+
+    export_download(
+        "clientes",
+        filters,
+        "clientes filtrados",
+        csv_file=clientes_csv,
+        columnar_file=clientes_colunar,
+    )
+
+    client_labels = {
+        client_id: client_label(client_id, nome, empresa)
+        for client_id, nome, empresa in zip(
+            clients["id"], clients["nome"], clients["empresa"]
+        )
+    }
     selected_id = st.selectbox(
         "Selecionar cliente para ver detalhes",
-        options=[client.id for client in clients],
-        format_func=lambda cid: next(
-            (c.nome for c in clients if c.id == cid),
-            str(cid),
-        ),
+        options=list(client_labels),
+        format_func=client_labels.get,
     )
 
     if selected_id:
@@ -115,8 +203,30 @@ else:
             st.markdown(f"**Observacoes:** {client.observacoes or '-'}")
 
             st.markdown("### Contatos do cliente")
-            if not client.contatos:
-                st.info("Nenhum contato registrado")
+            col_janela, col_tamanho = st.columns([3, 1])
+            janela = col_janela.selectbox(
+                "Periodo",
+                options=[30, 90, 365, None],
+                index=1,
+                format_func=lambda dias: f"Ultimos {dias} dias" if dias else "Todos",
+            )
+            historico_tamanho = col_tamanho.selectbox(
+                "Contatos por pagina", options=[10, 25, 50, 100], index=1
+            )
+            historico_inicio = (
+                datetime.now().date() - timedelta(days=janela) if janela else None
+            )
+            historico_cursor = page_cursor(
+                "detalhe_contatos", (client.id, janela, historico_tamanho)
+            )
+            historico = list_contacts_page(
+                cliente_id=client.id,
+                data_inicio=historico_inicio,
+                after=historico_cursor,
+                limit=historico_tamanho,
+            )
+            if not historico.items:
+                st.info("Nenhum contato registrado no periodo")
             else:
                 contact_rows = [
                     {
@@ -128,9 +238,19 @@ else:
                         if contato.proximo_contato
                         else "",
                     }
-                    for contato in client.contatos
+                    for contato in historico.items
                 ]
                 st.dataframe(contact_rows, use_container_width=True, hide_index=True)
+                page_controls(
+                    "detalhe_contatos",
+                    total=count_contacts(
+                        cliente_id=client.id, data_inicio=historico_inicio
+                    )
+                    if janela
+                    else count_client_contacts(client.id),
+                    page_size=historico_tamanho,
+                    next_cursor=historico.next_cursor,
+                )
 
             st.markdown("### Registrar contato")
             with st.form("form_novo_contato"):
@@ -150,6 +270,8 @@ else:
                 submitted_contact = st.form_submit_button("Registrar contato")
 
             if submitted_contact:
+                from src.schemas import ContactCreate
+
                 try:
                     data_hora = datetime.combine(data_contato, hora_contato)
                     create_contact(
@@ -183,6 +305,8 @@ else:
                 submitted_edit = st.form_submit_button("Salvar alteracoes")
 
             if submitted_edit:
+                from src.schemas import ClientUpdate
+
                 try:
                     update_client(
                         client.id,
@@ -6,21 +6,48 @@ from datetime import datetime
 import streamlit as st
 from pydantic import ValidationError
 
-from src.db import init_db
-from src.export import contacts_to_csv
-from src.schemas import ContactCreate
-from src.services import create_contact, list_clients, list_contacts
-from src.utils import require_auth, sidebar_header
+from src.components import client_picker, export_download
+from src.services import (
+    contact_table_page,
+    count_contacts,
+    create_contact,
+    followup_queue,
+    search_notes,
+)
+from src.startup import bootstrap
+from src.utils import page_controls, page_cursor, require_auth, sidebar_header
 
-init_db()
+bootstrap()
 require_auth()
-sidebar_header("ClienteFlow")
+sidebar_header("ClienteFlow", __file__)
 
 st.title("Agenda")
 
-clients = list_clients()
-client_map = {client.nome: client.id for client in clients}
-client_names = ["Todos"] + list(client_map.keys())
+with st.expander("Fila de follow-up (proximos contatos vencidos)", expanded=True):
+    dia_referencia, pendentes, idade, erro = followup_queue()
+    if erro:
+        st.error(f"Erro ao atualizar a fila de follow-up: {erro}")
+    if not pendentes:
+        if not erro:
+            st.info("Nenhum follow-up pendente")
+    else:
+        st.dataframe(
+            [
+                {
+                    "cliente": nome,
+                    "empresa": empresa_cliente or "",
+                    "telefone": telefone or "",
+                    "ultimo_contato": ultimo.strftime("%Y-%m-%d %H:%M"),
+                    "proximo_contato": proximo.strftime("%Y-%m-%d"),
+                    "dias_atraso": (dia_referencia - proximo).days,
+                }
+                for _, nome, empresa_cliente, telefone, ultimo, proximo in pendentes
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+    if idade is not None:
+        st.caption(f"Atualizado ha {int(idade)}s (recalculado em segundo plano)")
 
 col1, col2, col3 = st.columns(3)
 usar_inicio = col1.checkbox("Filtrar por data inicio")
@@ -36,53 +63,101 @@ canal = col3.selectbox(
     options=["Todos", "telefone", "email", "whatsapp", "reuniao", "outro"],
 )
 
-cliente_nome = st.selectbox("Cliente", options=client_names)
+col4, col5 = st.columns([4, 1])
+with col4:
+    selected_cliente_id = client_picker("Cliente", key="agenda_cliente", include_all=True)
+page_size = col5.selectbox("Por pagina", options=[25, 50, 100, 200], index=1)
+texto = st.text_input("Busca no assunto/notas")
 
-selected_cliente_id = None
-if cliente_nome != "Todos":
-    selected_cliente_id = client_map.get(cliente_nome)
-
-contacts = list_contacts(
-    cliente_id=selected_cliente_id,
-    data_inicio=start_date if usar_inicio else None,
-    data_fim=end_date if usar_fim else None,
-    canal=None if canal == "Todos" else canal,
-)
+contact_filters = {
+    "cliente_id": selected_cliente_id,
+    "data_inicio": start_date if usar_inicio else None,
+    "data_fim": end_date if usar_fim else None,
+    "canal": None if canal == "Todos" else canal,
+    "texto": texto or None,
+}
+filters_key = tuple(contact_filters.values())
+cursor = page_cursor("agenda_page", (filters_key, page_size))
+page = contact_table_page(**contact_filters, after=cursor, limit=page_size)
+contacts = page.items
 
 st.subheader("Contatos")
-if not contacts:
+if contacts.empty:
     st.info("Nenhum contato encontrado")
 else:
-    rows = [
-        {
-            "data_hora": contato.data_hora.strftime("%Y-%m-%d %H:%M"),
-            "cliente": contato.cliente.nome if contato.cliente else "",
-            "canal": contato.canal,
-            "assunto": contato.assunto,
-            "proximo_contato": contato.proximo_contato.strftime("%Y-%m-%d")
-            if contato.proximo_contato
-            else "",
-        }
-        for contato in contacts
-    ]
-    st.dataframe(rows, use_container_width=True, hide_index=True)
-
-    csv_data = contacts_to_csv(contacts)
-    st.download_button(
-        "Exportar CSV (contatos filtrados)",
-        data=csv_data,
-        file_name="contatos.csv",
-        mime="text/csv",
+    st.dataframe(
+        contacts,
+        use_container_width=True,
+        hide_index=True,
+        column_order=["data_hora", "cliente", "canal", "assunto", "proximo_contato"],
+        column_config={
+            "data_hora": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+            "proximo_contato": st.column_config.DateColumn(format="YYYY-MM-DD"),
+        },
+    )
+    page_controls(
+        "agenda_page",
+        total=count_contacts(**contact_filters),
+        page_size=page_size,
+        next_cursor=page.next_cursor,
+    )
+
+    def contatos_csv():
+        from src.export import contacts_csv_file
+
+        return contacts_csv_file(**contact_filters)
+
+    def contatos_colunar(fmt: str):
+        from src.export import contacts_columnar_file
+
+        return contacts_columnar_file(fmt, **contact_filters)
+
+    export_download(
+        "contatos",
+        filters_key,
+        "contatos filtrados",
+        csv_file=contatos_csv,
+        columnar_file=contatos_colunar,
+    )
+
+with st.expander("Busca por similaridade nas notas"):
+    st.caption(
+        "Encontra contatos (assunto e notas) e observacoes de clientes com palavras "
+        "parecidas, sem diferenciar acentos, plural ou a ordem das palavras."
     )
+    col_busca, col_origem = st.columns([4, 1])
+    consulta = col_busca.text_input("Descreva o que procura", key="agenda_semantica")
+    origem = col_origem.selectbox("Origem", options=["Todas", "contato", "cliente"])
+    if consulta.strip():
+        resultados = search_notes(
+            consulta, limit=20, origem=None if origem == "Todas" else origem
+        )
+        if not resultados:
+            st.info("Nenhuma nota parecida")
+        else:
+            st.dataframe(
+                resultados,
+                use_container_width=True,
+                hide_index=True,
+                column_order=[
+                    "score", "origem", "cliente", "data_hora", "assunto", "texto"
+                ],
+                column_config={
+                    "score": st.column_config.ProgressColumn(
+                        min_value=0, max_value=1, format="%.2f"
+                    ),
+                    "data_hora": st.column_config.DatetimeColumn(
+                        format="YYYY-MM-DD HH:mm"
+                    ),
+                },
+            )
 
 with st.expander("Novo contato"):
-    if not clients:
+    novo_cliente_id = client_picker("Cliente do contato", key="agenda_novo_cliente")
+    if novo_cliente_id is None:
         st.info("Cadastre um cliente antes de criar contatos")
     else:
         with st.form("form_agenda_contato"):
-            cliente_select = st.selectbox(
-                "Cliente", options=client_names[1:]
-            )
             col_a, col_b = st.columns(2)
             data_contato = col_a.date_input("Data", value=datetime.now().date())
             hora_contato = col_b.time_input("Hora", value=datetime.now().time())
@@ -99,11 +174,13 @@ with st.expander("Novo contato"):
             submitted = st.form_submit_button("Registrar")
 
         if submitted:
+            from src.schemas import ContactCreate
+
             try:
                 data_hora = datetime.combine(data_contato, hora_contato)
                 create_contact(
                     ContactCreate(
-                        cliente_id=client_map[cliente_select],
+                        cliente_id=novo_cliente_id,
                         data_hora=data_hora,
                         canal=canal_form,
                         assunto=assunto,
@@ -0,0 +1,89 @@
+"""Dashboard page."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from src.components import reporting_caption
+from src.services import (
+    contacts_per_client,
+    contacts_per_day,
+    count_overdue_followups,
+    rebuild_rollups,
+)
+from src.startup import bootstrap
+from src.utils import require_auth, sidebar_header
+
+bootstrap()
+require_auth()
+sidebar_header("ClienteFlow", __file__)
+
+st.title("Dashboard")
+
+hoje = datetime.now().date()
+col1, col2, col3 = st.columns([2, 2, 1])
+data_inicio = col1.date_input("Data inicio", value=hoje - timedelta(days=90))
+data_fim = col2.date_input("Data fim", value=hoje)
+usar_agregados = col3.toggle(
+    "Usar agregados",
+    value=True,
+    help="Desligado, recalcula direto da tabela de contatos (GROUP BY).",
+)
+
+if data_inicio > data_fim:
+    st.warning("Data inicio deve ser antes da data fim")
+    st.stop()
+
+reporting_caption()
+
+diario = pd.DataFrame(
+    contacts_per_day(data_inicio, data_fim, use_rollups=usar_agregados),
+    columns=["dia", "canal", "total"],
+)
+
+total_periodo = int(diario["total"].sum())
+dias_periodo = (data_fim - data_inicio).days + 1
+
+col_a, col_b, col_c = st.columns(3)
+col_a.metric("Contatos no periodo", total_periodo)
+col_b.metric("Media por dia", round(total_periodo / dias_periodo, 1))
+col_c.metric("Clientes com follow-up vencido", count_overdue_followups(hoje))
+
+if diario.empty:
+    st.info("Nenhum contato no periodo")
+    st.stop()
+
+diario["dia"] = pd.to_datetime(diario["dia"])
+por_dia = diario.pivot_table(
+    index="dia", columns="canal", values="total", aggfunc="sum", fill_value=0
+)
+
+st.subheader("Contatos por dia")
+st.bar_chart(por_dia)
+
+st.subheader("Contatos por semana")
+st.bar_chart(por_dia.resample("W-MON", label="left", closed="left").sum())
+
+col_d, col_e = st.columns(2)
+with col_d:
+    st.subheader("Por canal")
+    st.bar_chart(diario.groupby("canal")["total"].sum())
+with col_e:
+    st.subheader("Clientes mais contatados")
+    st.dataframe(
+        pd.DataFrame(
+            contacts_per_client(data_inicio, data_fim, use_rollups=usar_agregados),
+            columns=["cliente_id", "cliente", "contatos"],
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+with st.expander("Manutencao"):
+    st.caption("Recalcula os agregados a partir da tabela de contatos.")
+    if st.button("Reconstruir agregados"):
+        rebuild_rollups()
+        st.success("Agregados reconstruidos")
+        st.rerun()
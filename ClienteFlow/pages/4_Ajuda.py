@@ -0,0 +1,52 @@
+"""Ajuda page."""
+from __future__ import annotations
+
+import streamlit as st
+
+from src.startup import bootstrap
+from src.utils import require_auth, sidebar_header
+
+bootstrap()
+require_auth()
+sidebar_header("ClienteFlow", __file__)
+
+st.title("Ajuda")
+
+st.markdown(
+    """
+Como usar
+- Use o menu lateral para navegar entre Clientes, Agenda, Dashboard, Ajuda e Duplicados.
+- Em Clientes, voce pode cadastrar, editar, excluir e abrir o detalhe de um cliente.
+- Em Agenda, registre contatos vinculados a um cliente e filtre por periodo/canal/cliente.
+- Em Dashboard, acompanhe o volume de contatos por dia, semana, canal e cliente.
+- Na Agenda, "Busca por similaridade nas notas" encontra contatos e observacoes de clientes
+  com palavras parecidas com a descricao digitada (ignora acentos, plural e ordem).
+
+Validacoes
+- Nome do cliente e assunto do contato sao obrigatorios.
+- Email precisa estar no formato correto.
+- Telefone aceita digitos e os caracteres +() - e espaco.
+- Proximo contato nao pode ser antes da data do contato.
+
+Exportacao (CSV, Parquet, Arrow)
+- Use os botoes de exportacao nas telas de Clientes e Agenda.
+- O arquivo gerado reflete os filtros atuais da tela.
+- Parquet e Arrow aparecem quando o pacote pyarrow esta instalado.
+
+Duplicados
+- A tela Duplicados lista clientes com mesmo email, mesmo telefone ou nome parecido.
+- Compare os dois cadastros e escolha qual manter: o outro e mesclado nele (contatos, tags e
+  campos vazios) e excluido. Use "Nao sao duplicados" para esconder o par.
+
+Banco de dados
+- O SQLite fica em data/app.db.
+- Para resetar, apague o arquivo data/app.db e recarregue o app.
+
+Dicas e atalhos
+- Use a busca por texto para filtrar por nome, email, telefone, empresa e tags.
+- A busca considera o inicio das palavras e ignora acentos ("joao sil" encontra "João da Silva").
+- Use tags separadas por virgula para agrupar clientes.
+- O filtro por tags compara a tag inteira (sem diferenciar maiusculas): "ana" nao encontra "banana".
+- Com varias tags no filtro, escolha "Qualquer uma" ou "Todas".
+"""
+)
@@ -0,0 +1,107 @@
+"""Duplicados page: review of duplicate-client candidates."""
+from __future__ import annotations
+
+import streamlit as st
+
+from src.services import (
+    count_client_contacts,
+    count_duplicate_candidates,
+    dismiss_duplicate,
+    duplicate_candidates,
+    get_client,
+    merge_clients,
+    rebuild_duplicates,
+)
+from src.startup import bootstrap
+from src.utils import page_controls, page_cursor, require_auth, sidebar_header
+
+PAGE_SIZE = 25
+CAMPOS = ["nome", "email", "telefone", "empresa", "cargo", "tags", "observacoes"]
+
+bootstrap()
+require_auth()
+sidebar_header("ClienteFlow", __file__)
+
+st.title("Duplicados")
+st.caption(
+    "Pares de clientes com mesmo email, mesmo telefone (ignorando formato) ou nome "
+    "parecido (ignorando acentos). Os pares sao verificados a cada cadastro ou edicao."
+)
+
+cursor = page_cursor("duplicados_page", ())
+page = duplicate_candidates(after=cursor, limit=PAGE_SIZE)
+pares = page.items
+
+if not pares:
+    st.info("Nenhum possivel duplicado pendente")
+else:
+    st.dataframe(
+        [
+            {
+                "score": par["score"],
+                "motivo": par["motivo"],
+                "cliente": par["cliente"],
+                "possivel duplicado": par["outro"],
+            }
+            for par in pares
+        ],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "score": st.column_config.ProgressColumn(
+                min_value=0, max_value=1, format="%.2f"
+            )
+        },
+    )
+    page_controls(
+        "duplicados_page",
+        total=count_duplicate_candidates(),
+        page_size=PAGE_SIZE,
+        next_cursor=page.next_cursor,
+    )
+
+    indice = st.selectbox(
+        "Par para revisar",
+        options=range(len(pares)),
+        format_func=lambda i: f"{pares[i]['cliente']}  x  {pares[i]['outro']}",
+    )
+    par = pares[indice]
+    clientes = [get_client(par["cliente_id"]), get_client(par["outro_id"])]
+    if None in clientes:
+        st.warning("Cliente nao encontrado")
+    else:
+        colunas = st.columns(2)
+        for coluna, cliente in zip(colunas, clientes):
+            coluna.markdown(f"**#{cliente.id}**")
+            for campo in CAMPOS:
+                valor = getattr(cliente, campo) or "-"
+                coluna.markdown(f"**{campo.capitalize()}:** {valor}")
+            coluna.markdown(f"**Contatos:** {count_client_contacts(cliente.id)}")
+
+        st.caption(
+            "Mesclar move os contatos para o cliente mantido, completa os campos vazios "
+            "com os do outro, junta as tags e exclui o outro cliente."
+        )
+        col_a, col_b, col_c = st.columns(3)
+        primeiro, segundo = clientes
+        try:
+            if col_a.button(f"Manter #{primeiro.id} e mesclar"):
+                merge_clients(primeiro.id, segundo.id)
+                st.success("Clientes mesclados")
+                st.rerun()
+            if col_b.button(f"Manter #{segundo.id} e mesclar"):
+                merge_clients(segundo.id, primeiro.id)
+                st.success("Clientes mesclados")
+                st.rerun()
+            if col_c.button("Nao sao duplicados"):
+                dismiss_duplicate(primeiro.id, segundo.id)
+                st.rerun()
+        except Exception as exc:
+            st.error(f"Erro ao mesclar: {exc}")
+
+with st.expander("Manutencao"):
+    st.caption("Recalcula as chaves de todos os clientes e os pares pendentes.")
+    if st.button("Reprocessar duplicados"):
+        rebuild_duplicates()
+        st.success("Duplicados reprocessados")
+        st.rerun()
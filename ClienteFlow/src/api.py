@@ -0,0 +1,330 @@
+"""Headless REST/JSON API over the service layer (ASGI, FastAPI).
+
+Runs as its own process next to the Streamlit UI and reuses `services`,
+`schemas` and `db`, so both see the same rules, cache and write queue:
+
+    python -m src.api
+    uvicorn src.api:app --host 0.0.0.0 --port 8000
+
+FastAPI and uvicorn are optional dependencies, only needed here.
+
+Endpoints are async; the sync SQLAlchemy reads run in a dedicated thread
+pool sized to the connection pool, so requests queue for a thread instead
+of holding one while waiting for a connection. Writes go through the writer
+queue and are awaited on its future, without taking a thread at all.
+
+Lists use keyset pagination (`limit` plus the opaque `next_cursor` of the
+previous page). Their ETag is the change-log head (`src.changelog`), which
+moves on every write to clients or contacts from any process: a matching
+`If-None-Match` gets a 304 without running the query, and a new head also
+clears the read cache of this process (`changelog.head_watcher`), which
+otherwise only sees its own writes. Responses above `GZIP_MIN_SIZE` bytes
+are gzip-compressed.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import secrets
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import partial
+from typing import Annotated, Any, Callable, Literal
+
+try:
+    from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+    from fastapi.middleware.gzip import GZipMiddleware
+except ImportError as exc:
+    raise RuntimeError(
+        'A API requer os pacotes fastapi e uvicorn (pip install fastapi "uvicorn[standard]")'
+    ) from exc
+
+from src import changelog, services
+from src.db import POOL_MAX_OVERFLOW, POOL_SIZE, init_db
+from src.models import Cliente, Contato
+from src.schemas import ClientCreate, ClientUpdate, ContactCreate, ContactUpdate
+from src.writer import WAIT_TIMEOUT, WriteOutcomeUnknown, WriteTimeout, writer
+
+API_HOST = os.getenv("CLIENTEFLOW_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("CLIENTEFLOW_API_PORT", "8000"))
+API_WORKERS = int(os.getenv("CLIENTEFLOW_API_WORKERS", "1"))
+# Enough threads for every pooled connection, and no more.
+API_THREADS = int(os.getenv("CLIENTEFLOW_API_THREADS", str(POOL_SIZE + POOL_MAX_OVERFLOW)))
+# Bearer token required on every request when set.
+API_TOKEN = os.getenv("CLIENTEFLOW_API_TOKEN")
+GZIP_MIN_SIZE = 1000
+MAX_PAGE_SIZE = 500
+
+_executor = ThreadPoolExecutor(max_workers=API_THREADS, thread_name_prefix="clienteflow-api")
+
+
+async def _run(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking service call in the API thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+async def _write(write, *args) -> Any:
+    """Queue a `@queued_write` service call and await its commit."""
+    future: Future = write.submit(*args)
+    try:
+        # Shielded so that a timeout leaves the decision to `writer.abandon`.
+        return await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(future)), WAIT_TIMEOUT
+        )
+    except TimeoutError:
+        if not future.done():
+            return writer.abandon(future)
+        raise
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo nao serializavel: {type(value).__name__}")
+
+
+def _json(payload: Any, status_code: int = 200, headers: dict | None = None) -> Response:
+    body = json.dumps(
+        payload, default=_json_default, ensure_ascii=False, separators=(",", ":")
+    )
+    return Response(
+        body.encode(), status_code=status_code, headers=headers, media_type="application/json"
+    )
+
+
+def _row(item, model) -> dict[str, Any]:
+    return {column.key: getattr(item, column.key) for column in model.__table__.columns}
+
+
+def _contact_row(contact: Contato) -> dict[str, Any]:
+    # Without foreign key enforcement (e.g. the "legacy" SQLite profile) a
+    # contact can outlive its client; it must not fail the whole page.
+    return {
+        **_row(contact, Contato),
+        "cliente": contact.cliente.nome if contact.cliente else None,
+    }
+
+
+def _encode_cursor(cursor: tuple | None) -> str | None:
+    if cursor is None:
+        return None
+    raw = json.dumps(cursor, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str | None, first: Callable[[Any], Any]) -> tuple | None:
+    """Decode `cursor` into `(first(key), id)`; 400 if it was not ours."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, last_id = json.loads(raw)
+        return first(key), int(last_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(400, "Cursor invalido") from exc
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(",")
+    )
+
+
+async def _conditional(request: Request, build: Callable[[], Any]) -> Response:
+    """GET with ETag/If-None-Match keyed on the change-log head.
+
+    The head is read before `build` runs: a write landing in between only
+    labels newer data with an older tag, which costs one extra fetch later.
+    """
+    etag = f'W/"{await _run(changelog.head_watcher.check)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return _json(await _run(build), headers=headers)
+
+
+def _authorize(authorization: Annotated[str | None, Header()] = None) -> None:
+    if API_TOKEN is None:
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, API_TOKEN):
+        raise HTTPException(401, "Token invalido", headers={"WWW-Authenticate": "Bearer"})
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    await _run(init_db)
+    changelog.start_compaction_job()
+    yield
+    # Let queued writes commit before the process exits.
+    await _run(writer.stop, WAIT_TIMEOUT)
+    _executor.shutdown(wait=False)
+
+
+app = FastAPI(
+    title="ClienteFlow",
+    lifespan=_lifespan,
+    dependencies=[Depends(_authorize)],
+)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+
+
+@app.exception_handler(changelog.ChangeLogExpired)
+async def _change_log_expired(request: Request, exc: changelog.ChangeLogExpired) -> Response:
+    return _json({"detail": str(exc)}, status_code=410)
+
+
+@app.exception_handler(WriteTimeout)
+async def _write_timeout(request: Request, exc: WriteTimeout) -> Response:
+    # 503: cancelled, safe to retry; 504: may still commit, check first.
+    status_code = 504 if isinstance(exc, WriteOutcomeUnknown) else 503
+    return _json({"detail": str(exc)}, status_code=status_code)
+
+
+PageSize = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
+
+@app.get("/saude")
+async def health() -> Response:
+    return _json({"status": "ok", "seq": await _run(changelog.head_watcher.check)})
+
+
+@app.get("/clientes")
+async def list_clients(
+    request: Request,
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: Literal["any", "all"] = "any",
+    limit: PageSize = services.DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Response:
+    after = _decode_cursor(cursor, str)
+
+    def build() -> dict[str, Any]:
+        page = services.list_clients_page(search, empresa, tags, tags_mode, after, limit)
+        return {
+            "items": [_row(client, Cliente) for client in page.items],
+            "next_cursor": _encode_cursor(page.next_cursor),
+        }
+
+    return await _conditional(request, build)
+
+
+@app.get("/clientes/{cliente_id}")
+async def get_client(request: Request, cliente_id: int) -> Response:
+    def build() -> dict[str, Any]:
+        client = services.get_client(cliente_id)
+        if client is None:
+            raise HTTPException(404, "Cliente nao encontrado")
+        return _row(client, Cliente)
+
+    return await _conditional(request, build)
+
+
+@app.post("/clientes", status_code=201)
+async def create_client(data: ClientCreate) -> Response:
+    client = await _write(services.create_client, data)
+    return _json(_row(client, Cliente), status_code=201)
+
+
+@app.patch("/clientes/{cliente_id}")
+async def update_client(cliente_id: int, data: ClientUpdate) -> Response:
+    client = await _write(services.update_client, cliente_id, data)
+    if client is None:
+        raise HTTPException(404, "Cliente nao encontrado")
+    return _json(_row(client, Cliente))
+
+
+@app.delete("/clientes/{cliente_id}", status_code=204)
+async def delete_client(cliente_id: int) -> Response:
+    if not await _write(services.delete_client, cliente_id):
+        raise HTTPException(404, "Cliente nao encontrado")
+    return Response(status_code=204)
+
+
+@app.get("/contatos")
+async def list_contacts(
+    request: Request,
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+    limit: PageSize = services.DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> Response:
+    after = _decode_cursor(cursor, datetime.fromisoformat)
+
+    def build() -> dict[str, Any]:
+        page = services.list_contacts_page(
+            cliente_id, data_inicio, data_fim, canal, texto, after, limit
+        )
+        return {
+            "items": [_contact_row(contact) for contact in page.items],
+            "next_cursor": _encode_cursor(page.next_cursor),
+        }
+
+    return await _conditional(request, build)
+
+
+async def _require_client(cliente_id: int | None) -> None:
+    if cliente_id is not None and await _run(services.get_client, cliente_id) is None:
+        raise HTTPException(422, "Cliente nao encontrado")
+
+
+@app.post("/contatos", status_code=201)
+async def create_contact(data: ContactCreate) -> Response:
+    await _require_client(data.cliente_id)
+    contact = await _write(services.create_contact, data)
+    return _json(_row(contact, Contato), status_code=201)
+
+
+@app.patch("/contatos/{contato_id}")
+async def update_contact(contato_id: int, data: ContactUpdate) -> Response:
+    await _require_client(data.cliente_id)
+    contact = await _write(services.update_contact, contato_id, data)
+    if contact is None:
+        raise HTTPException(404, "Contato nao encontrado")
+    return _json(_row(contact, Contato))
+
+
+@app.delete("/contatos/{contato_id}", status_code=204)
+async def delete_contact(contato_id: int) -> Response:
+    if not await _write(services.delete_contact, contato_id):
+        raise HTTPException(404, "Contato nao encontrado")
+    return Response(status_code=204)
+
+
+@app.get("/alteracoes")
+async def changes(
+    since: int = 0,
+    limit: Annotated[int, Query(ge=1, le=changelog.BATCH_SIZE)] = changelog.BATCH_SIZE,
+    tabela: Annotated[list[Literal["clientes", "contatos"]] | None, Query()] = None,
+) -> Response:
+    """Change-log entries after `since` (410 if compaction dropped some)."""
+    entries = await _run(
+        services.changes_since, since, limit, tuple(tabela) if tabela else None
+    )
+    return _json(
+        {"items": entries, "last_seq": entries[-1]["seq"] if entries else since}
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    uvicorn.run("src.api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Process-wide read cache for the service layer.
+
+Entries are keyed on the function, its arguments and the current generation
+of every table the function reads. Writes bump the generation of the tables
+they touch, so only results depending on those tables stop being served;
+superseded entries age out through TTL and LRU eviction.
+
+The cache lives in the Streamlit server process and is shared by all
+sessions. Results are returned as-is (no copy), so callers must treat
+them as read-only.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_TTL = float(os.getenv("CLIENTEFLOW_CACHE_TTL", "300"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("CLIENTEFLOW_CACHE_SIZE", "512"))
+
+
+class ReadCache:
+    """Thread-safe TTL + LRU cache with per-table generation counters."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def generation(self, table: str) -> int:
+        """Current generation of a table."""
+        return self._generations.get(table, 0)
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        tables: tuple[str, ...],
+        compute: Callable[[], Any],
+        ttl: float | None = None,
+    ) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            full_key = (key, tuple(self.generation(table) for table in tables))
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(full_key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[full_key]
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+
+        value = compute()
+
+        with self._lock:
+            # A write may have landed while computing: only store if the
+            # generations this value was read under are still current.
+            current = tuple(self.generation(table) for table in tables)
+            if current == full_key[1]:
+                self._entries[full_key] = (now + (ttl or self.ttl), value)
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return value
+
+    def invalidate(self, *tables: str) -> None:
+        """Bump the generation of the given tables."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self.generation(table) + 1
+
+    def clear(self) -> None:
+        """Drop every entry (generations are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters plus current size and generations."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "generations": dict(self._generations),
+            }
+
+
+read_cache = ReadCache()
+
+
+def cached(*tables: str, ttl: float | None = None) -> Callable[[F], F]:
+    """Cache a read function; `tables` lists every table its result depends on."""
+
+    def decorator(func: F) -> F:
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return read_cache.get_or_compute(
+                key, tables, lambda: func(*args, **kwargs), ttl=ttl
+            )
+
+        wrapper.uncached = func  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def invalidates(*tables: str) -> Callable[[F], F]:
+    """Mark a write function: bump `tables` once it has committed."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            read_cache.invalidate(*tables)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def cache_stats() -> dict[str, Any]:
+    """Statistics of the process-wide read cache."""
+    return read_cache.stats()
@@ -0,0 +1,283 @@
+"""Change-data feed of `clientes` and `contatos`.
+
+Every service write (and the bulk importer) appends the affected rows to the
+`alteracoes` table in the same transaction as the change: `insert` and
+`update` entries carry the full row after the change as JSON, `delete`
+entries only the id. `seq` comes from an AUTOINCREMENT key, so it only
+grows, and appends are serialized across processes (`db.serialize_appends`)
+until their transaction ends, so entries commit in `seq` order and a
+consumer never sees a later entry before an earlier one.
+
+Downstream systems keep the last `seq` they applied and pull the entries
+after it (`changes_since`, or `python -m src.changelog since SEQ` as NDJSON)
+instead of re-exporting everything. To start, they read `head`, take a full
+export, and follow the log from that `seq`.
+
+Compaction bounds the log: only the latest entry of each row is kept (every
+entry holds the whole row, so older ones add nothing for a consumer applying
+upserts/deletes), and delete entries older than `RETENTION_DAYS` are
+dropped. Their highest `seq` is recorded, and a consumer behind it gets
+`ChangeLogExpired` and must resynchronize from a full export.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+
+from src.cache import read_cache
+from src.db import engine, serialize_appends, upsert_insert
+from src.models import Alteracao, CompactacaoAlteracoes
+from src.scheduler import scheduler
+from src.writer import writer
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+BATCH_SIZE = 1000
+RETENTION_DAYS = float(os.getenv("CLIENTEFLOW_CHANGELOG_RETENTION_DAYS", "30"))
+COMPACT_INTERVAL_SECONDS = float(
+    os.getenv("CLIENTEFLOW_CHANGELOG_COMPACT_INTERVAL", "3600")
+)
+COMPACT_JOB = "changelog_compact"
+
+
+class ChangeLogExpired(ValueError):
+    """The requested position was dropped by compaction."""
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo nao serializavel: {type(value).__name__}")
+
+
+def record_rows(
+    connection: Connection | Session, operacao: str, model, ids: Iterable[int]
+) -> None:
+    """Append the current state of the `model` rows with the given ids."""
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    serialize_appends(connection, Alteracao.__tablename__)
+    table = model.__table__
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = connection.execute(
+            select(table).where(table.c.id.in_(ids[start : start + BATCH_SIZE]))
+        ).mappings()
+        entries = [
+            {
+                "tabela": table.name,
+                "operacao": operacao,
+                "ref_id": row["id"],
+                "dados": json.dumps(
+                    dict(row), default=_json_default, ensure_ascii=False
+                ),
+            }
+            for row in rows
+        ]
+        if entries:
+            connection.execute(insert(Alteracao), entries)
+
+
+def record_deletes(connection: Connection | Session, model, ids: Iterable[int]) -> None:
+    """Append delete entries for the given ids of `model`."""
+    entries = [
+        {"tabela": model.__tablename__, "operacao": DELETE, "ref_id": ref_id}
+        for ref_id in sorted(set(ids))
+    ]
+    if entries:
+        serialize_appends(connection, Alteracao.__tablename__)
+    for start in range(0, len(entries), BATCH_SIZE):
+        connection.execute(insert(Alteracao), entries[start : start + BATCH_SIZE])
+
+
+def expired_before(connection: Connection | Session) -> int:
+    """Positions below this `seq` may have lost delete entries to compaction."""
+    return (
+        connection.execute(select(CompactacaoAlteracoes.seq_descartado)).scalar() or 0
+    )
+
+
+def head(connection: Connection | Session) -> int:
+    """Position of the latest change: following the log from here misses nothing."""
+    latest = connection.execute(select(func.max(Alteracao.seq))).scalar() or 0
+    return max(latest, expired_before(connection))
+
+
+class HeadWatcher:
+    """Change-log head as last seen by this process.
+
+    Each process (Streamlit, the API) has its own read cache, and its own
+    writes are the only ones that invalidate it. Every write to clients or
+    contacts, from any process, moves the head, so checking it before
+    serving cached reads (once per rerun, once per API request) drops what
+    another process made stale.
+    """
+
+    def __init__(self) -> None:
+        self._seen: int | None = None
+        self._lock = threading.Lock()
+
+    def check(self) -> int:
+        """Read the head; invalidate the cached reads if it moved."""
+        with engine.connect() as connection:
+            seq = head(connection)
+        with self._lock:
+            if self._seen is not None and seq != self._seen:
+                read_cache.invalidate("clientes", "contatos")
+            self._seen = seq
+        return seq
+
+
+head_watcher = HeadWatcher()
+
+
+def changes_since(
+    connection: Connection | Session,
+    seq: int,
+    limit: int = BATCH_SIZE,
+    tables: Iterable[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Up to `limit` entries after `seq`, oldest first.
+
+    Each entry has `seq`, `tabela`, `operacao`, `id`, `dados` (the row as a
+    dict, None for deletes) and `criado_em`. Raises `ChangeLogExpired` when
+    compaction already dropped entries the caller has not seen.
+    """
+    horizon = expired_before(connection)
+    if seq < horizon:
+        raise ChangeLogExpired(
+            f"Alteracoes anteriores a seq {horizon} foram compactadas; "
+            "resincronize com uma exportacao completa"
+        )
+    query = select(
+        Alteracao.seq,
+        Alteracao.tabela,
+        Alteracao.operacao,
+        Alteracao.ref_id,
+        Alteracao.dados,
+        Alteracao.criado_em,
+    ).where(Alteracao.seq > seq)
+    if tables:
+        query = query.where(Alteracao.tabela.in_(list(tables)))
+    rows = connection.execute(query.order_by(Alteracao.seq).limit(limit))
+    return [
+        {
+            "seq": row.seq,
+            "tabela": row.tabela,
+            "operacao": row.operacao,
+            "id": row.ref_id,
+            "dados": json.loads(row.dados) if row.dados is not None else None,
+            "criado_em": row.criado_em.isoformat(),
+        }
+        for row in rows
+    ]
+
+
+def compact(
+    connection: Connection | Session, retention_days: float = RETENTION_DAYS
+) -> dict[str, int]:
+    """Drop superseded entries and old delete entries; returns the counts."""
+    newer = aliased(Alteracao)
+    superseded = connection.execute(
+        delete(Alteracao).where(
+            select(newer.seq)
+            .where(
+                newer.tabela == Alteracao.tabela,
+                newer.ref_id == Alteracao.ref_id,
+                newer.seq > Alteracao.seq,
+            )
+            .exists()
+        )
+    ).rowcount
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    old_deletes = (Alteracao.operacao == DELETE, Alteracao.criado_em < cutoff)
+    dropped_until = connection.execute(
+        select(func.max(Alteracao.seq)).where(*old_deletes)
+    ).scalar()
+    expired = 0
+    if dropped_until is not None:
+        expired = connection.execute(delete(Alteracao).where(*old_deletes)).rowcount
+        statement = upsert_insert(connection, CompactacaoAlteracoes).values(
+            id=1,
+            seq_descartado=max(dropped_until, expired_before(connection)),
+            executado_em=datetime.utcnow(),
+        )
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    "seq_descartado": statement.excluded.seq_descartado,
+                    "executado_em": statement.excluded.executado_em,
+                },
+            )
+        )
+    return {"superseded": superseded, "expired_deletes": expired}
+
+
+def start_compaction_job(interval: float = COMPACT_INTERVAL_SECONDS) -> None:
+    """Compact the log periodically, through the writer queue."""
+    scheduler.register(COMPACT_JOB, lambda: writer.run(compact), interval=interval)
+    scheduler.start()
+
+
+def _main(argv: list[str]) -> int:
+    from src.db import init_db
+
+    parser = argparse.ArgumentParser(
+        prog="python -m src.changelog", description="Log de alteracoes (NDJSON)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    since = commands.add_parser("since", help="alteracoes depois de SEQ, uma por linha")
+    since.add_argument("seq", type=int)
+    since.add_argument("--limit", type=int, help="maximo de alteracoes (padrao: todas)")
+    since.add_argument("--tabela", action="append", choices=["clientes", "contatos"])
+    commands.add_parser("head", help="ultimo seq gravado")
+    compact_parser = commands.add_parser("compact", help="compacta o log")
+    compact_parser.add_argument("--retention-days", type=float, default=RETENTION_DAYS)
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.command == "head":
+        with engine.connect() as connection:
+            print(head(connection))
+        return 0
+    if args.command == "compact":
+        with engine.begin() as connection:
+            print(json.dumps(compact(connection, args.retention_days)))
+        return 0
+
+    seq, remaining = args.seq, args.limit
+    with engine.connect() as connection:
+        while remaining is None or remaining > 0:
+            size = BATCH_SIZE if remaining is None else min(BATCH_SIZE, remaining)
+            try:
+                entries = changes_since(connection, seq, size, args.tabela)
+            except ChangeLogExpired as exc:
+                print(exc, file=sys.stderr)
+                return 3
+            if not entries:
+                break
+            sys.stdout.write(
+                "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+                )
+            )
+            sys.stdout.flush()
+            seq = entries[-1]["seq"]
+            if remaining is not None:
+                remaining -= len(entries)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+"""Reusable Streamlit components backed by the service layer."""
+from __future__ import annotations
+
+from typing import IO, Callable
+
+import streamlit as st
+
+from src.reporting import reporting_copy
+from src.services import client_labels, client_options
+
+PICKER_LIMIT = 20
+
+
+def client_picker(
+    label: str,
+    key: str,
+    include_all: bool = False,
+    limit: int = PICKER_LIMIT,
+) -> int | None:
+    """Searchable client selectbox returning the selected client id.
+
+    Only the `limit` best matches of the typed text are fetched, so the
+    picker costs the same with a hundred or a million clients. Options are
+    keyed by id and labelled with name, company and id, so clients sharing
+    a name stay distinct. Must be rendered outside `st.form`, since the
+    search box has to rerun the script to refresh the options.
+    """
+    text = st.text_input(
+        f"{label} (buscar por nome, email, empresa...)", key=f"{key}_busca"
+    )
+    labels = dict(client_options(text, limit))
+    selected = st.session_state.get(key)
+    if selected is not None and selected not in labels:
+        # Keep the current choice selectable while the search text changes.
+        labels.update(client_labels((selected,)))
+    options: list[int | None] = list(labels)
+    if include_all:
+        options.insert(0, None)
+    if not options:
+        st.info("Nenhum cliente encontrado")
+        return None
+    return st.selectbox(
+        label,
+        options=options,
+        format_func=lambda client_id: "Todos" if client_id is None else labels[client_id],
+        key=key,
+    )
+
+
+def reporting_caption() -> None:
+    """Say when the data shown comes from the reporting copy."""
+    if reporting_copy.url:
+        st.caption("Dados da base de leitura para relatorios.")
+    elif reporting_copy.refreshed_at is not None:
+        st.caption(
+            "Dados da copia para relatorios de "
+            f"{reporting_copy.refreshed_at:%d/%m %H:%M:%S} "
+            "(atualizada periodicamente; alteracoes recentes podem nao aparecer)."
+        )
+
+
+EXPORT_MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def export_download(
+    key: str,
+    filters: tuple,
+    label: str,
+    csv_file: Callable[[], IO[bytes]],
+    columnar_file: Callable[[str], IO[bytes]],
+) -> None:
+    """Format choice plus prepare/download buttons for a filtered export.
+
+    The prepared file is kept in the session together with the filters and
+    format it was built for, and only offered while they still match.
+    Parquet/Arrow are listed only when pyarrow is installed.
+    """
+    # Imported here so pages that never export skip the export module.
+    from src.export import COLUMNAR_FORMATS, columnar_available
+
+    formats = ["csv", *COLUMNAR_FORMATS] if columnar_available() else ["csv"]
+    fmt = st.radio(
+        "Formato",
+        options=formats,
+        format_func=str.upper,
+        horizontal=True,
+        key=f"{key}_formato",
+    )
+    reporting_caption()
+    if st.button("Preparar exportacao", key=f"{key}_preparar"):
+        with csv_file() if fmt == "csv" else columnar_file(fmt) as export_file:
+            st.session_state[f"{key}_arquivo"] = ((filters, fmt), export_file.read())
+    exported = st.session_state.get(f"{key}_arquivo")
+    if exported and exported[0] == (filters, fmt):
+        st.download_button(
+            f"Exportar {fmt.upper()} ({label})",
+            data=exported[1],
+            file_name=f"{key}.{fmt}",
+            mime=EXPORT_MIME_TYPES[fmt],
+        )
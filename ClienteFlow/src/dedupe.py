@@ -0,0 +1,393 @@
+"""Duplicate-client detection with blocking keys.
+
+Comparing every client with every other one is quadratic, so each client
+gets three normalized blocking keys, stored in the indexed
+`clientes_chaves` table:
+
+- phone: digits only, without the Brazilian country code, so "(11) 9999-0000"
+  and "+55 11 99990000" meet;
+- email: lowercase;
+- name: phonetic code of the first and last name, accents stripped, so
+  "Luiz Souza", "Luís de Sousa" and "LUIS SOUZA" meet.
+
+Only clients sharing a key are scored (email, phone, name similarity and
+company), and pairs above `MIN_SCORE` become rows of
+`duplicatas_candidatas` for review. Blocks larger than `MAX_BLOCK` (a very
+common name, a shared switchboard number) are skipped: they say little
+about identity and would bring the quadratic cost back. The services call
+`refresh` on every client write; `rebuild` recomputes everything.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations, groupby
+from operator import attrgetter
+from typing import Iterable, Iterator, NamedTuple
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.db import upsert_insert
+from src.models import ChaveCliente, Cliente, DuplicataCandidata
+
+KEY_COLUMNS = ("telefone", "email", "nome")
+MAX_BLOCK = 200
+MIN_SCORE = 0.7
+# Score weights. No single signal but the email reaches MIN_SCORE: a phone
+# needs a similar name, and a name needs the same company (or phone/email).
+EMAIL_WEIGHT = 0.7
+PHONE_WEIGHT = 0.4
+NAME_WEIGHT = 0.5
+COMPANY_WEIGHT = 0.2
+PENDING = "pendente"
+IGNORED = "ignorado"
+BATCH_SIZE = 1000
+
+NAME_PARTICLES = {"da", "das", "de", "do", "dos", "e"}
+# Portuguese spelling variants that sound the same, applied in order.
+PHONETIC_RULES = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in [
+        (r"^h", ""),
+        (r"ph", "f"),
+        (r"th", "t"),
+        (r"[cs]h", "x"),
+        (r"lh", "li"),
+        (r"nh", "ni"),
+        (r"ct", "t"),
+        (r"q(u)?", "k"),
+        (r"c(?=[ei])", "s"),
+        (r"c", "k"),
+        (r"g(?=[ei])", "j"),
+        (r"gu(?=[ei])", "g"),
+        (r"y", "i"),
+        (r"w", "v"),
+        (r"z", "s"),
+        (r"(.)\1+", r"\1"),
+    ]
+]
+
+
+class ClientRecord(NamedTuple):
+    id: int
+    nome: str
+    email: str | None
+    telefone: str | None
+    empresa: str | None
+
+
+class ClientFeatures(NamedTuple):
+    """Normalized fields of a client, computed once per comparison round."""
+
+    id: int
+    email: str | None
+    telefone: str | None
+    nome_chave: str | None
+    nome: str
+    empresa: str
+
+
+RECORD_COLUMNS = (
+    Cliente.id,
+    Cliente.nome,
+    Cliente.email,
+    Cliente.telefone,
+    Cliente.empresa,
+)
+
+
+def strip_accents(value: str) -> str:
+    """Lowercase ASCII text: "João" -> "joao"."""
+    normalized = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+def name_words(value: str | None) -> list[str]:
+    """Accent-stripped words of a name, without particles (da, de, dos...)."""
+    if not value:
+        return []
+    words = re.findall(r"[a-z0-9]+", strip_accents(value))
+    return [word for word in words if word not in NAME_PARTICLES]
+
+
+@lru_cache(maxsize=65536)
+def phonetic(word: str) -> str:
+    """Phonetic code of an accent-stripped lowercase word."""
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word
+
+
+def phone_key(value: str | None) -> str | None:
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) in (12, 13) and digits.startswith("55"):
+        digits = digits[2:]
+    return digits if len(digits) >= 8 else None
+
+
+def email_key(value: str | None) -> str | None:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+def _words_key(words: list[str]) -> str | None:
+    if not words:
+        return None
+    parts = [words[0]] if len(words) == 1 else [words[0], words[-1]]
+    return " ".join(phonetic(word) for word in parts)
+
+
+def name_key(value: str | None) -> str | None:
+    return _words_key(name_words(value))
+
+
+def client_keys(record: ClientRecord) -> dict[str, str | None]:
+    """Blocking keys of a client, as stored in `clientes_chaves`."""
+    return {
+        "telefone": phone_key(record.telefone),
+        "email": email_key(record.email),
+        "nome": name_key(record.nome),
+    }
+
+
+def features(record: ClientRecord) -> ClientFeatures:
+    words = name_words(record.nome)
+    return ClientFeatures(
+        record.id,
+        email_key(record.email),
+        phone_key(record.telefone),
+        _words_key(words),
+        " ".join(words),
+        " ".join(name_words(record.empresa)),
+    )
+
+
+def score(a: ClientFeatures, b: ClientFeatures) -> tuple[float, list[str]]:
+    """Similarity of two clients in [0, 1] and the signals that matched.
+
+    Names with the same phonetic key count as equal. The name comparison
+    (the costly part) is skipped when it could not lift the pair to
+    `MIN_SCORE`, so scores below it are not exact.
+    """
+    email = a.email is not None and a.email == b.email
+    phone = a.telefone is not None and a.telefone == b.telefone
+    company = bool(a.empresa) and a.empresa == b.empresa
+    total = EMAIL_WEIGHT * email + PHONE_WEIGHT * phone + COMPANY_WEIGHT * company
+    similarity = 0.0
+    if a.nome_chave is not None and a.nome_chave == b.nome_chave:
+        similarity = 1.0
+    elif a.nome and total + NAME_WEIGHT >= MIN_SCORE:
+        similarity = SequenceMatcher(None, a.nome, b.nome).ratio()
+    total += NAME_WEIGHT * similarity
+    reasons = [
+        reason
+        for reason, matched in (
+            ("email", email),
+            ("telefone", phone),
+            ("nome", similarity >= 0.8),
+            ("empresa", company),
+        )
+        if matched
+    ]
+    return round(min(total, 1.0), 3), reasons
+
+
+def _pair_row(a: ClientFeatures, b: ClientFeatures) -> dict | None:
+    """Candidate row for the pair, or None below `MIN_SCORE`."""
+    value, reasons = score(a, b)
+    if value < MIN_SCORE:
+        return None
+    low, high = sorted((a.id, b.id))
+    return {
+        "cliente_id": low,
+        "outro_id": high,
+        "score": value,
+        "motivo": ", ".join(reasons),
+        "status": PENDING,
+    }
+
+
+def _store_pairs(connection: Connection | Session, rows: Iterable[dict]) -> None:
+    """Insert candidate pairs; pairs already reviewed keep their status."""
+    unique = {(row["cliente_id"], row["outro_id"]): row for row in rows}
+    if not unique:
+        return
+    statement = upsert_insert(connection, DuplicataCandidata).on_conflict_do_nothing(
+        index_elements=["cliente_id", "outro_id"]
+    )
+    rows = list(unique.values())
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(statement, rows[start : start + BATCH_SIZE])
+
+
+def _store_keys(connection: Connection | Session, records: list[ClientRecord]) -> None:
+    ids = [record.id for record in records]
+    connection.execute(delete(ChaveCliente).where(ChaveCliente.cliente_id.in_(ids)))
+    connection.execute(
+        insert(ChaveCliente),
+        [{"cliente_id": record.id, **client_keys(record)} for record in records],
+    )
+
+
+def _small_blocks(
+    connection: Connection | Session, column, values: set[str]
+) -> set[str]:
+    """The given key values whose block is small enough to compare."""
+    if not values:
+        return set()
+    rows = connection.execute(
+        select(column)
+        .where(column.in_(values))
+        .group_by(column)
+        .having(func.count() <= MAX_BLOCK)
+    )
+    return {value for (value,) in rows}
+
+
+def refresh(connection: Connection | Session, client_ids: Iterable[int]) -> None:
+    """Update the keys of the given clients and re-check them (incremental)."""
+    client_ids = sorted(set(client_ids))
+    if not client_ids:
+        return
+    records = [
+        ClientRecord(*row)
+        for row in connection.execute(
+            select(*RECORD_COLUMNS).where(Cliente.id.in_(client_ids))
+        )
+    ]
+    # `!= IGNORED` rather than `== PENDING`: an equality on status would make
+    # SQLite scan the status index instead of looking the ids up.
+    connection.execute(
+        delete(DuplicataCandidata).where(
+            DuplicataCandidata.status != IGNORED,
+            or_(
+                DuplicataCandidata.cliente_id.in_(client_ids),
+                DuplicataCandidata.outro_id.in_(client_ids),
+            ),
+        )
+    )
+    if not records:
+        return
+    _store_keys(connection, records)
+
+    keys = {record.id: client_keys(record) for record in records}
+    conditions = []
+    for name in KEY_COLUMNS:
+        column = getattr(ChaveCliente, name)
+        blocks = _small_blocks(
+            connection, column, {key[name] for key in keys.values() if key[name]}
+        )
+        if blocks:
+            conditions.append(column.in_(blocks))
+    if not conditions:
+        return
+    # Block members by (key name, key value), so each record is only compared
+    # with the clients sharing one of its own keys.
+    blocks: dict[tuple[str, str], list[ClientFeatures]] = {}
+    for row in connection.execute(
+        select(
+            *RECORD_COLUMNS,
+            ChaveCliente.telefone,
+            ChaveCliente.email,
+            ChaveCliente.nome,
+        )
+        .join(ChaveCliente, ChaveCliente.cliente_id == Cliente.id)
+        .where(or_(*conditions))
+    ):
+        member = features(ClientRecord(*row[:5]))
+        for name, key in zip(KEY_COLUMNS, row[5:]):
+            if key:
+                blocks.setdefault((name, key), []).append(member)
+    rows = []
+    for record in records:
+        own = features(record)
+        seen = {record.id}
+        for name, key in keys[record.id].items():
+            for member in blocks.get((name, key), ()):
+                if member.id in seen:
+                    continue
+                seen.add(member.id)
+                row = _pair_row(own, member)
+                if row:
+                    rows.append(row)
+    _store_pairs(connection, rows)
+
+
+def remove_client(connection: Connection | Session, client_id: int) -> None:
+    """Drop the keys and candidate pairs of a deleted client."""
+    connection.execute(delete(ChaveCliente).where(ChaveCliente.cliente_id == client_id))
+    connection.execute(
+        delete(DuplicataCandidata).where(
+            or_(
+                DuplicataCandidata.cliente_id == client_id,
+                DuplicataCandidata.outro_id == client_id,
+            )
+        )
+    )
+
+
+def _blocks(connection: Connection, name: str) -> Iterator[list[ClientFeatures]]:
+    column = getattr(ChaveCliente, name)
+    small = (
+        select(column)
+        .where(column.is_not(None))
+        .group_by(column)
+        .having(func.count().between(2, MAX_BLOCK))
+    )
+    rows = connection.execute(
+        select(column, *RECORD_COLUMNS)
+        .join(Cliente, Cliente.id == ChaveCliente.cliente_id)
+        .where(column.in_(small))
+        .order_by(column)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for _, block in groupby(rows, key=lambda row: row[0]):
+        yield [features(ClientRecord(*row[1:])) for row in block]
+
+
+def _comparable_groups(
+    name: str, block: list[ClientFeatures]
+) -> list[list[ClientFeatures]]:
+    """Split a block into the groups whose pairs can reach `MIN_SCORE`.
+
+    A similar name alone cannot, so a name block is only compared within
+    each company; pairs that also share a phone or email meet in those
+    blocks.
+    """
+    if name != "nome":
+        return [block]
+    company = attrgetter("empresa")
+    return [
+        list(group)
+        for empresa, group in groupby(sorted(block, key=company), key=company)
+        if empresa
+    ]
+
+
+def rebuild(connection: Connection) -> None:
+    """Recompute every key and every pending pair (blocked, not all-pairs)."""
+    connection.execute(delete(ChaveCliente))
+    result = connection.execute(
+        select(*RECORD_COLUMNS).execution_options(yield_per=BATCH_SIZE)
+    )
+    for rows in result.partitions():
+        _store_keys(connection, [ClientRecord(*row) for row in rows])
+
+    connection.execute(
+        delete(DuplicataCandidata).where(DuplicataCandidata.status == PENDING)
+    )
+    # A pair sharing several keys is scored once per block; `_store_pairs`
+    # keeps one row.
+    rows = []
+    for name in KEY_COLUMNS:
+        for block in _blocks(connection, name):
+            for group in _comparable_groups(name, block):
+                for a, b in combinations(group, 2):
+                    row = _pair_row(a, b)
+                    if row:
+                        rows.append(row)
+    _store_pairs(connection, rows)
@@ -1,83 +1,437 @@
-"""CSV export helpers."""
+"""CSV and columnar (Parquet / Arrow IPC) export helpers.
+
+Exports run a core `select()` streamed with `yield_per`, so rows are never
+hydrated as ORM objects nor held all at once: each chunk of rows is written
+as CSV text into a spooled temporary file that moves to disk once it grows.
+
+Columnar exports transpose each chunk into Arrow arrays (one per column)
+and append it as a record batch, typed from the SQLAlchemy column types.
+They need the optional `pyarrow` package. A full snapshot of both tables
+can be written periodically by the background scheduler.
+
+Every export reads through `src.reporting`, i.e. from the read-only
+reporting copy when one is configured, so long scans stay off the primary.
+"""
 from __future__ import annotations
 
 import csv
+import importlib.util
 import io
+import logging
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator
 
+from sqlalchemy import Date, DateTime, Integer, Select, select
+from sqlalchemy.orm import Session
+
+from src.db import dialect_name
 from src.models import Cliente, Contato
+from src.reporting import get_session
+from src.scheduler import scheduler
+from src.services import client_conditions, contact_conditions
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 1000
+COLUMNAR_CHUNK_ROWS = 50_000
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+SNAPSHOT_JOB = "columnar_snapshot"
+SNAPSHOT_DIR = os.getenv("CLIENTEFLOW_SNAPSHOT_DIR")
+SNAPSHOT_FORMAT = os.getenv("CLIENTEFLOW_SNAPSHOT_FORMAT", "parquet")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("CLIENTEFLOW_SNAPSHOT_INTERVAL", "3600"))
+
+CLIENT_FIELDS = [
+    "id",
+    "nome",
+    "email",
+    "telefone",
+    "empresa",
+    "cargo",
+    "tags",
+    "observacoes",
+    "criado_em",
+    "atualizado_em",
+]
+
+CONTACT_FIELDS = [
+    "id",
+    "cliente_id",
+    "cliente_nome",
+    "data_hora",
+    "canal",
+    "assunto",
+    "notas",
+    "proximo_contato",
+    "criado_em",
+]
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _iter_csv(
+    build_statement: Callable[[Session], Select],
+    fieldnames: list[str],
+    chunk_rows: int,
+) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    with get_session() as session:
+        statement = build_statement(session)
+        result = session.execute(
+            statement.execution_options(yield_per=chunk_rows, stream_results=True)
+        )
+        for rows in result.partitions():
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def clients_statement(
+    session: Session,
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+) -> Select:
+    """Select the exported client columns with the Clientes page filters."""
+    return (
+        select(*(getattr(Cliente, name) for name in CLIENT_FIELDS))
+        .where(*client_conditions(session, search, empresa, tags, tags_mode))
+        .order_by(Cliente.nome.asc(), Cliente.id.asc())
+    )
+
 
+def contacts_statement(
+    session: Session,
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+) -> Select:
+    """Select the exported contact columns with the Agenda page filters."""
+    return (
+        select(
+            Contato.id,
+            Contato.cliente_id,
+            Cliente.nome.label("cliente_nome"),
+            Contato.data_hora,
+            Contato.canal,
+            Contato.assunto,
+            Contato.notas,
+            Contato.proximo_contato,
+            Contato.criado_em,
+        )
+        .outerjoin(Cliente, Cliente.id == Contato.cliente_id)
+        .where(
+            *contact_conditions(session, cliente_id, data_inicio, data_fim, canal, texto)
+        )
+        .order_by(Contato.data_hora.desc(), Contato.id.desc())
+    )
+
+
+def iter_clients_csv(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yield the filtered clients as CSV text, one chunk of rows at a time."""
+    return _iter_csv(
+        lambda session: clients_statement(session, search, empresa, tags, tags_mode),
+        CLIENT_FIELDS,
+        chunk_rows,
+    )
+
+
+def iter_contacts_csv(
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yield the filtered contacts as CSV text, one chunk of rows at a time."""
+    return _iter_csv(
+        lambda session: contacts_statement(
+            session, cliente_id, data_inicio, data_fim, canal, texto
+        ),
+        CONTACT_FIELDS,
+        chunk_rows,
+    )
 
-def clients_to_csv(clients: list[Cliente]) -> str:
-    """Export clients to CSV string."""
-    output = io.StringIO()
-    writer = csv.DictWriter(
-        output,
-        fieldnames=[
-            "id",
-            "nome",
-            "email",
-            "telefone",
-            "empresa",
-            "cargo",
-            "tags",
-            "observacoes",
-            "criado_em",
-            "atualizado_em",
-        ],
+
+def spool_csv(chunks: Iterator[str]) -> IO[bytes]:
+    """Write CSV chunks (UTF-8) into a spooled temp file, rewound for reading."""
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b")
+    for chunk in chunks:
+        output.write(chunk.encode("utf-8"))
+    output.seek(0)
+    return output
+
+
+def clients_csv_file(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+) -> IO[bytes]:
+    """Export filtered clients to a spooled CSV file."""
+    return spool_csv(
+        iter_clients_csv(
+            search=search, empresa=empresa, tags=tags, tags_mode=tags_mode
+        )
     )
-    writer.writeheader()
-    for client in clients:
-        writer.writerow(
-            {
-                "id": client.id,
-                "nome": client.nome,
-                "email": client.email or "",
-                "telefone": client.telefone or "",
-                "empresa": client.empresa or "",
-                "cargo": client.cargo or "",
-                "tags": client.tags or "",
-                "observacoes": client.observacoes or "",
-                "criado_em": client.criado_em.isoformat(),
-                "atualizado_em": client.atualizado_em.isoformat()
-                if client.atualizado_em
-                else "",
-            }
+
+
+def contacts_csv_file(
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+) -> IO[bytes]:
+    """Export filtered contacts to a spooled CSV file."""
+    return spool_csv(
+        iter_contacts_csv(
+            cliente_id=cliente_id,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            canal=canal,
+            texto=texto,
         )
-    return output.getvalue()
-
-
-def contacts_to_csv(contacts: list[Contato]) -> str:
-    """Export contacts to CSV string."""
-    output = io.StringIO()
-    writer = csv.DictWriter(
-        output,
-        fieldnames=[
-            "id",
-            "cliente_id",
-            "cliente_nome",
-            "data_hora",
-            "canal",
-            "assunto",
-            "notas",
-            "proximo_contato",
-            "criado_em",
-        ],
     )
-    writer.writeheader()
-    for contact in contacts:
-        writer.writerow(
-            {
-                "id": contact.id,
-                "cliente_id": contact.cliente_id,
-                "cliente_nome": contact.cliente.nome if contact.cliente else "",
-                "data_hora": contact.data_hora.isoformat(),
-                "canal": contact.canal,
-                "assunto": contact.assunto,
-                "notas": contact.notas or "",
-                "proximo_contato": contact.proximo_contato.isoformat()
-                if contact.proximo_contato
-                else "",
-                "criado_em": contact.criado_em.isoformat(),
-            }
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise RuntimeError(
+            "Exportar Parquet/Arrow requer o pacote pyarrow (pip install pyarrow)"
+        ) from exc
+    return pyarrow
+
+
+def columnar_available() -> bool:
+    """Whether the optional pyarrow dependency is installed.
+
+    Checked without importing it, since the export widget asks on every
+    render and pyarrow is only needed once an export is prepared.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _arrow_schema(statement: Select):
+    pa = _pyarrow()
+    fields = []
+    for column in statement.selected_columns:
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _record_batches(
+    session: Session, statement: Select, schema, chunk_rows: int
+) -> Iterator[Any]:
+    pa = _pyarrow()
+    result = session.execute(
+        statement.execution_options(yield_per=chunk_rows, stream_results=True)
+    )
+    for rows in result.partitions():
+        columns = zip(*rows)
+        yield pa.RecordBatch.from_arrays(
+            [
+                pa.array(values, type=field.type)
+                for values, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+
+
+def write_columnar(
+    session: Session,
+    statement: Select,
+    output: IO[bytes],
+    fmt: str = "parquet",
+    chunk_rows: int = COLUMNAR_CHUNK_ROWS,
+) -> int:
+    """Stream `statement` into `output` as Parquet or Arrow IPC; returns the row count."""
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Formato invalido: {fmt}")
+    pa = _pyarrow()
+    schema = _arrow_schema(statement)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(
+            output, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
         )
-    return output.getvalue()
+    rows = 0
+    with writer:
+        for batch in _record_batches(session, statement, schema, chunk_rows):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def _spool_columnar(build_statement: Callable[[Session], Select], fmt: str) -> IO[bytes]:
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b")
+    with get_session() as session:
+        write_columnar(session, build_statement(session), output, fmt)
+    output.seek(0)
+    return output
+
+
+def clients_columnar_file(
+    fmt: str = "parquet",
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+) -> IO[bytes]:
+    """Export filtered clients to a spooled Parquet/Arrow file."""
+    return _spool_columnar(
+        lambda session: clients_statement(session, search, empresa, tags, tags_mode),
+        fmt,
+    )
+
+
+def contacts_columnar_file(
+    fmt: str = "parquet",
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+) -> IO[bytes]:
+    """Export filtered contacts to a spooled Parquet/Arrow file."""
+    return _spool_columnar(
+        lambda session: contacts_statement(
+            session, cliente_id, data_inicio, data_fim, canal, texto
+        ),
+        fmt,
+    )
+
+
+def _begin_snapshot(session: Session) -> None:
+    """Make the rest of `session`'s reads see one snapshot of the database.
+
+    pysqlite only opens a transaction before writes, so each SELECT would
+    otherwise read whatever was committed when it started; PostgreSQL's
+    default READ COMMITTED does the same per statement.
+    """
+    if dialect_name(session) == "sqlite":
+        session.connection().exec_driver_sql("BEGIN")
+    else:
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def write_snapshot(directory: str | Path, fmt: str = "parquet") -> dict[str, int]:
+    """Write full `clientes` and `contatos` files into `directory`.
+
+    Both tables are read in one explicit read transaction, so the pair is
+    consistent (no contact without its client, no write seen in only one).
+    Each file is written under a temporary name and renamed into place, so
+    readers never see a partial snapshot. Returns the row count per table.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = COLUMNAR_FORMATS.get(fmt)
+    if suffix is None:
+        raise ValueError(f"Formato invalido: {fmt}")
+    counts = {}
+    with get_session() as session:
+        _begin_snapshot(session)
+        for name, statement in (
+            ("clientes", clients_statement(session)),
+            ("contatos", contacts_statement(session)),
+        ):
+            target = directory / f"{name}{suffix}"
+            partial = target.with_name(f".{target.name}.tmp")
+            with open(partial, "wb") as output:
+                counts[name] = write_columnar(session, statement, output, fmt)
+            os.replace(partial, target)
+    logger.info("Snapshot %s gravado em %s: %s", fmt, directory, counts)
+    return counts
+
+
+def start_snapshot_job(
+    directory: str | None = SNAPSHOT_DIR,
+    fmt: str = SNAPSHOT_FORMAT,
+    interval: float = SNAPSHOT_INTERVAL_SECONDS,
+) -> None:
+    """Schedule periodic full snapshots when a snapshot directory is configured."""
+    if not directory:
+        return
+    scheduler.register(
+        SNAPSHOT_JOB, lambda: write_snapshot(directory, fmt), interval=interval
+    )
+    scheduler.start()
+
+
+def _main(argv: list[str]) -> int:
+    exporters = {"clientes": iter_clients_csv, "contatos": iter_contacts_csv}
+    statements = {
+        "clientes": clients_statement,
+        "contatos": contacts_statement,
+    }
+    usage = (
+        "uso: python -m src.export clientes|contatos ARQUIVO.csv|.parquet|.arrow\n"
+        "     python -m src.export snapshot DIRETORIO [parquet|arrow]"
+    )
+    if len(argv) in (2, 3) and argv[0] == "snapshot":
+        from src.db import init_db
+
+        init_db()
+        write_snapshot(argv[1], argv[2] if len(argv) == 3 else SNAPSHOT_FORMAT)
+        return 0
+    if len(argv) != 2 or argv[0] not in exporters:
+        print(usage, file=sys.stderr)
+        return 2
+    from src.db import init_db
+
+    init_db()
+    fmt = next(
+        (fmt for fmt, suffix in COLUMNAR_FORMATS.items() if argv[1].endswith(suffix)),
+        None,
+    )
+    if fmt is not None:
+        with get_session() as session, open(argv[1], "wb") as output:
+            write_columnar(session, statements[argv[0]](session), output, fmt)
+        return 0
+    with open(argv[1], "w", encoding="utf-8", newline="") as output:
+        for chunk in exporters[argv[0]]():
+            output.write(chunk)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,58 @@
+"""Materialized "last contact per client" table behind the follow-up queue."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+
+from src.models import Contato, UltimoContato
+
+
+def _latest_contacts():
+    newer = aliased(Contato)
+    latest_id = (
+        select(newer.id)
+        .where(newer.cliente_id == Contato.cliente_id)
+        .order_by(newer.data_hora.desc(), newer.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return select(
+        Contato.cliente_id, Contato.id, Contato.data_hora, Contato.proximo_contato
+    ).where(Contato.id == latest_id)
+
+
+def refresh(connection: Connection | Session, client_ids: Iterable[int]) -> None:
+    """Recompute the last contact of the given clients (indexed lookups)."""
+    client_ids = sorted(set(client_ids))
+    if not client_ids:
+        return
+    connection.execute(
+        delete(UltimoContato).where(UltimoContato.cliente_id.in_(client_ids))
+    )
+    connection.execute(
+        insert(UltimoContato).from_select(
+            ["cliente_id", "contato_id", "data_hora", "proximo_contato"],
+            _latest_contacts().where(Contato.cliente_id.in_(client_ids)),
+        )
+    )
+
+
+def remove_client(connection: Connection | Session, client_id: int) -> None:
+    """Drop the entry of a deleted client."""
+    connection.execute(
+        delete(UltimoContato).where(UltimoContato.cliente_id == client_id)
+    )
+
+
+def rebuild(connection: Connection) -> None:
+    """Recompute the whole table from `contatos`."""
+    connection.execute(delete(UltimoContato))
+    connection.execute(
+        insert(UltimoContato).from_select(
+            ["cliente_id", "contato_id", "data_hora", "proximo_contato"],
+            _latest_contacts(),
+        )
+    )
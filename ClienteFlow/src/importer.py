@@ -0,0 +1,337 @@
+"""Bulk import of clients and contacts from CSV/XLSX files.
+
+Rows are read lazily from the file, validated and normalized a batch at a
+time by `src.validation` (same rules as the Pydantic schemas, applied
+column-wise), and each valid batch is written with a single
+executemany INSERT inside one transaction. Rows that fail validation or
+duplicate an existing client are collected into an error report instead of
+aborting the import.
+
+Each batch is one command on the writer queue (`src.writer`), like the
+other writes of the UI and the API: it waits its turn instead of contending
+for the SQLite write lock, and its commit invalidates the read cache. So an
+import that stops halfway (unreadable file, database error) keeps and
+reports what was already written (`ImportResult.aborted`).
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import logging
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import IO, Any, Iterable, Iterator
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from src import changelog, dedupe, followups, rollups, semantic
+from src.db import get_session
+from src.models import Cliente, Contato
+from src.tags import sync_client_tags
+from src.validation import validate_clients, validate_contacts
+from src.writer import queued_write
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+REPORT_FIELDS = ["linha", "erro"]
+# Tried in order over the whole file before the first batch is written;
+# cp1252 is what Excel on Windows saves as "CSV".
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import: counters plus one error entry per rejected row."""
+
+    inserted: int = 0
+    duplicates: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    # Why the import stopped early; `inserted` rows were kept.
+    aborted: str | None = None
+
+    @property
+    def rejected(self) -> int:
+        return len(self.errors)
+
+    def add_error(self, line: int, message: str, raw: dict[str, Any]) -> None:
+        self.errors.append({"linha": line, "erro": message, **raw})
+
+    def error_report_csv(self) -> str:
+        """Per-row error report (line number, reason and the original columns)."""
+        fieldnames = list(REPORT_FIELDS)
+        for error in self.errors:
+            fieldnames.extend(key for key in error if key not in fieldnames)
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        writer.writerows(self.errors)
+        return output.getvalue()
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _detect_encoding(file: IO[bytes]) -> str:
+    """First of `CSV_ENCODINGS` that decodes the whole (seekable) file."""
+    start = file.tell()
+    try:
+        for encoding in CSV_ENCODINGS:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            file.seek(start)
+            try:
+                while chunk := file.read(1024 * 1024):
+                    decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                continue
+            return encoding
+    finally:
+        file.seek(start)
+    raise ValueError("Codificacao do arquivo nao reconhecida; salve o CSV como UTF-8")
+
+
+def _iter_csv_rows(file: IO[bytes]) -> Iterator[dict[str, Any]]:
+    if not file.seekable():
+        spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        shutil.copyfileobj(file, spooled)
+        spooled.seek(0)
+        file = spooled
+    text = io.TextIOWrapper(file, encoding=_detect_encoding(file), newline="")
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    fieldnames = [
+        name.strip().lower()
+        for name in next(csv.reader([header], delimiter=delimiter))
+    ]
+    for row in csv.DictReader(text, fieldnames=fieldnames, delimiter=delimiter):
+        row.pop(None, None)
+        yield {key: _cell(value) for key, value in row.items()}
+
+
+def _iter_xlsx_rows(file: IO[bytes]) -> Iterator[dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise RuntimeError(
+            "Importar XLSX requer o pacote openpyxl (pip install openpyxl)"
+        ) from exc
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        fieldnames = [str(name).strip().lower() if name else "" for name in header]
+        for values in rows:
+            yield {
+                name: _cell(value)
+                for name, value in zip(fieldnames, values)
+                if name
+            }
+    finally:
+        workbook.close()
+
+
+def iter_rows(file: IO[bytes], filename: str) -> Iterator[dict[str, Any]]:
+    """Yield each data row of a CSV (`,` or `;`) or XLSX file as a dict."""
+    if filename.lower().endswith(".xlsx"):
+        return _iter_xlsx_rows(file)
+    return _iter_csv_rows(file)
+
+
+def _batches(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _email_key(value: str | None) -> str | None:
+    return value.lower() if value else None
+
+
+def _abort(result: ImportResult, last_line: int, exc: Exception) -> None:
+    logger.exception("Importacao interrompida apos a linha %s", last_line)
+    result.aborted = f"interrompida apos a linha {last_line}: {exc}"
+
+
+def import_clients(
+    file: IO[bytes], filename: str, batch_size: int = BATCH_SIZE
+) -> ImportResult:
+    """Import clients, skipping rows whose email or phone already exists."""
+    result = ImportResult()
+    with get_session() as session:
+        emails: set[str] = set()
+        phones: set[str] = set()
+        for email, telefone in session.execute(
+            select(func.lower(Cliente.email), Cliente.telefone)
+        ):
+            if email:
+                emails.add(email)
+            if telefone:
+                phones.add(telefone)
+
+    # Data rows start on line 2, after the header.
+    numbered = enumerate(iter_rows(file, filename), start=2)
+    last_line = 1
+    try:
+        for batch in _batches(numbered, batch_size):
+            _import_client_batch(batch, result, emails, phones)
+            last_line = batch[-1][0]
+    except Exception as exc:
+        _abort(result, last_line, exc)
+    return result
+
+
+def _import_client_batch(
+    batch: list[tuple[int, dict[str, Any]]],
+    result: ImportResult,
+    emails: set[str],
+    phones: set[str],
+) -> None:
+    """Validate one batch of clients and queue the insert of the valid ones."""
+    payloads = []
+    validated = validate_clients([raw for _, raw in batch])
+    valid = dict(zip(validated.indexes, validated.rows))
+    for index, (line, raw) in enumerate(batch):
+        if index in validated.errors:
+            result.add_error(line, validated.errors[index], raw)
+            continue
+        payload = valid[index]
+        email = _email_key(payload["email"])
+        telefone = payload["telefone"]
+        if (email and email in emails) or (telefone and telefone in phones):
+            result.duplicates += 1
+            result.add_error(line, "Cliente duplicado (email/telefone)", raw)
+            continue
+        if email:
+            emails.add(email)
+        if telefone:
+            phones.add(telefone)
+        payloads.append(payload)
+    if payloads:
+        _insert_clients(payloads)
+        result.inserted += len(payloads)
+
+
+@queued_write("clientes")
+def _insert_clients(session: Session, payloads: list[dict[str, Any]]) -> None:
+    inserted = session.execute(
+        insert(Cliente).returning(
+            Cliente.id,
+            Cliente.tags,
+            Cliente.observacoes,
+            sort_by_parameter_order=True,
+        ),
+        payloads,
+    ).all()
+    sync_client_tags(session, {row.id: row.tags for row in inserted if row.tags})
+    dedupe.refresh(session, [row.id for row in inserted])
+    semantic.index_notes(
+        session,
+        semantic.CLIENT,
+        ((row.id, row.observacoes) for row in inserted),
+    )
+    changelog.record_rows(
+        session, changelog.INSERT, Cliente, [row.id for row in inserted]
+    )
+
+
+def import_contacts(
+    file: IO[bytes], filename: str, batch_size: int = BATCH_SIZE
+) -> ImportResult:
+    """Import contacts linked by a `cliente_id` or `cliente_email` column."""
+    result = ImportResult()
+    with get_session() as session:
+        client_ids: set[int] = set()
+        ids_by_email: dict[str, int] = {}
+        for client_id, email in session.execute(
+            select(Cliente.id, func.lower(Cliente.email))
+        ):
+            client_ids.add(client_id)
+            if email:
+                ids_by_email.setdefault(email, client_id)
+
+    numbered = enumerate(iter_rows(file, filename), start=2)
+    last_line = 1
+    try:
+        for batch in _batches(numbered, batch_size):
+            _import_contact_batch(batch, result, client_ids, ids_by_email)
+            last_line = batch[-1][0]
+    except Exception as exc:
+        _abort(result, last_line, exc)
+    return result
+
+
+def _import_contact_batch(
+    batch: list[tuple[int, dict[str, Any]]],
+    result: ImportResult,
+    client_ids: set[int],
+    ids_by_email: dict[str, int],
+) -> None:
+    """Validate one batch of contacts and queue the insert of the valid ones."""
+    rows = []
+    for _, raw in batch:
+        values = dict(raw)
+        email = _email_key(values.pop("cliente_email", None))
+        if not values.get("cliente_id") and email:
+            values["cliente_id"] = ids_by_email.get(email)
+        rows.append(values)
+    validated = validate_contacts(rows)
+    valid = dict(zip(validated.indexes, validated.rows))
+    payloads = []
+    for index, (line, raw) in enumerate(batch):
+        if index in validated.errors:
+            result.add_error(line, validated.errors[index], raw)
+            continue
+        payload = valid[index]
+        if payload["cliente_id"] not in client_ids:
+            result.add_error(line, "Cliente nao encontrado", raw)
+            continue
+        payloads.append(payload)
+    if payloads:
+        _insert_contacts(payloads)
+        result.inserted += len(payloads)
+
+
+@queued_write("contatos")
+def _insert_contacts(session: Session, payloads: list[dict[str, Any]]) -> None:
+    inserted = session.execute(
+        insert(Contato).returning(
+            Contato.id,
+            Contato.assunto,
+            Contato.notas,
+            sort_by_parameter_order=True,
+        ),
+        payloads,
+    ).all()
+    rollups.apply(
+        session,
+        (
+            (payload["data_hora"], payload["canal"], payload["cliente_id"])
+            for payload in payloads
+        ),
+        +1,
+    )
+    followups.refresh(session, (payload["cliente_id"] for payload in payloads))
+    semantic.index_notes(
+        session,
+        semantic.CONTACT,
+        ((row.id, semantic.contact_text(row.assunto, row.notas)) for row in inserted),
+    )
+    changelog.record_rows(
+        session, changelog.INSERT, Contato, [row.id for row in inserted]
+    )
@@ -0,0 +1,176 @@
+"""SQL instrumentation: per-rerun query counts, DB time and slow statements.
+
+Cursor-execute listeners on the engine time every statement and attribute
+it to the rerun running on the current thread (Streamlit executes each
+session's script on its own thread). Writes run on the writer thread
+(`src.writer`), which binds each command to the rerun that queued it with
+`attributed_to`, so they are counted in that rerun as well. Statements slower than the threshold
+are logged with their `EXPLAIN QUERY PLAN`. Everything is emitted as JSON
+through the `clienteflow.sql` logger, so it lands in the app's `logging`
+setup as structured records, together with the per-rerun setup time and
+the one-time startup timings reported by `src.startup`.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("clienteflow.sql")
+
+SLOW_QUERY_MS = float(os.getenv("CLIENTEFLOW_SLOW_QUERY_MS", "100"))
+MAX_SLOW_PER_RERUN = 20
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    duration_ms: float
+    plan: list[str] = field(default_factory=list)
+
+
+@dataclass
+class RerunStats:
+    """Queries issued by one script rerun."""
+
+    page: str
+    started_at: float = field(default_factory=time.time)
+    queries: int = 0
+    db_time_ms: float = 0.0
+    # Time from `bootstrap()` to the start of stats collection (sidebar).
+    setup_ms: float = 0.0
+    slow: list[SlowQuery] = field(default_factory=list)
+
+
+_local = threading.local()
+
+
+def current_stats() -> RerunStats | None:
+    """Stats of the rerun running on this thread, if any."""
+    return getattr(_local, "stats", None)
+
+
+@contextmanager
+def attributed_to(stats: RerunStats | None) -> Iterator[None]:
+    """Count this thread's statements in `stats`, a rerun of another thread."""
+    previous = current_stats()
+    _local.stats = stats
+    try:
+        yield
+    finally:
+        _local.stats = previous
+
+
+def mark_rerun_start() -> None:
+    """Note when the current rerun started on this thread."""
+    _local.rerun_started = time.perf_counter()
+
+
+def start_rerun(page: str) -> RerunStats:
+    """Begin collecting the queries of a rerun running on this thread."""
+    _local.stats = RerunStats(page=page)
+    started = getattr(_local, "rerun_started", None)
+    if started is not None:
+        _local.stats.setup_ms = (time.perf_counter() - started) * 1000
+        _local.rerun_started = None
+    return _local.stats
+
+
+def log_rerun(stats: RerunStats) -> None:
+    """Emit the summary of a finished rerun as a structured log record."""
+    logger.info(
+        json.dumps(
+            {
+                "event": "rerun",
+                "page": stats.page,
+                "queries": stats.queries,
+                "db_time_ms": round(stats.db_time_ms, 3),
+                "slow_queries": len(stats.slow),
+                "setup_ms": round(stats.setup_ms, 3),
+            }
+        )
+    )
+
+
+def log_startup(timings: dict[str, float]) -> None:
+    """Emit the one-time process initialization timings."""
+    logger.info(
+        json.dumps(
+            {
+                "event": "startup",
+                **{name: round(value, 3) for name, value in timings.items()},
+            }
+        )
+    )
+
+
+def _explain(cursor, statement: str, parameters, dialect: str) -> list[str]:
+    prefix = EXPLAIN_PREFIXES.get(dialect)
+    is_query = statement.lstrip().upper().startswith(("SELECT", "WITH"))
+    if prefix is None or not is_query:
+        return []
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        return [
+            " ".join(str(value) for value in row) for row in explain_cursor.fetchall()
+        ]
+    except Exception as exc:  # the plan is best effort
+        return [f"(plano indisponivel: {exc})"]
+    finally:
+        explain_cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    stats = current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time_ms += duration_ms
+    if duration_ms < SLOW_QUERY_MS:
+        return
+    plan = [] if executemany else _explain(
+        cursor, statement, parameters, conn.dialect.name
+    )
+    slow = SlowQuery(" ".join(statement.split()), round(duration_ms, 3), plan)
+    if stats is not None and len(stats.slow) < MAX_SLOW_PER_RERUN:
+        stats.slow.append(slow)
+    logger.warning(
+        json.dumps(
+            {
+                "event": "slow_query",
+                "page": stats.page if stats else None,
+                **asdict(slow),
+            }
+        )
+    )
+
+
+def _handle_error(context) -> None:
+    if context.connection is not None:
+        started = context.connection.info.get("query_started_at")
+        if started:
+            started.pop()
+
+
+def install(engine: Engine) -> None:
+    """Attach the timing listeners to `engine` (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
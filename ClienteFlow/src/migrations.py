@@ -0,0 +1,138 @@
+"""Versioned schema migrations applied at startup.
+
+`init_db` creates missing tables with `create_all`, which never alters an
+existing table or adds indexes to it. Every change to an existing database
+goes here instead, as a numbered step. Steps must be idempotent: on a fresh
+database `create_all` has already built the final schema and the steps only
+record the version.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from sqlalchemy import Column, Integer, Table, select
+from sqlalchemy.engine import Connection, Engine
+
+from src.db import Base
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, nullable=False),
+)
+
+
+def _create_search_index(connection: Connection) -> None:
+    from src.search import ensure_index
+
+    ensure_index(connection)
+
+
+def _create_query_indexes(connection: Connection) -> None:
+    from src.models import Cliente, Contato
+
+    for model in (Cliente, Contato):
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _backfill_tags(connection: Connection) -> None:
+    from src.models import Tag, cliente_tags
+    from src.tags import backfill
+
+    Tag.__table__.create(connection, checkfirst=True)
+    cliente_tags.create(connection, checkfirst=True)
+    backfill(connection)
+
+
+def _build_rollups(connection: Connection) -> None:
+    from src.models import Contato, ContatoDiario, ContatoSemanalCliente
+    from src.rollups import rebuild
+
+    ContatoDiario.__table__.create(connection, checkfirst=True)
+    ContatoSemanalCliente.__table__.create(connection, checkfirst=True)
+    for index in Contato.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+def _build_last_contacts(connection: Connection) -> None:
+    from src.followups import rebuild
+    from src.models import UltimoContato
+
+    UltimoContato.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+def _create_text_indexes(connection: Connection) -> None:
+    from src.search import ensure_text_indexes
+
+    ensure_text_indexes(connection)
+
+
+def _build_duplicate_index(connection: Connection) -> None:
+    from src.dedupe import rebuild
+    from src.models import ChaveCliente, DuplicataCandidata
+
+    ChaveCliente.__table__.create(connection, checkfirst=True)
+    DuplicataCandidata.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+def _build_note_vectors(connection: Connection) -> None:
+    from src.models import VetorNota
+    from src.semantic import rebuild
+
+    VetorNota.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+def _create_change_log(connection: Connection) -> None:
+    from src.models import Alteracao, CompactacaoAlteracoes
+
+    Alteracao.__table__.create(connection, checkfirst=True)
+    CompactacaoAlteracoes.__table__.create(connection, checkfirst=True)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "indice de busca FTS5 de clientes", _create_search_index),
+    (2, "indices das colunas de filtro e ordenacao", _create_query_indexes),
+    (3, "tabelas de tags normalizadas (tags, cliente_tags)", _backfill_tags),
+    (4, "agregados de contatos por dia e por cliente/semana", _build_rollups),
+    (5, "ultimo contato por cliente (fila de follow-up)", _build_last_contacts),
+    (6, "indices pg_trgm e tsvector (somente PostgreSQL)", _create_text_indexes),
+    (7, "chaves de blocagem e candidatos a duplicata", _build_duplicate_index),
+    (8, "vetores das notas para a busca por similaridade", _build_note_vectors),
+    (9, "log de alteracoes de clientes e contatos", _create_change_log),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection: Connection) -> int:
+    """Return the schema version recorded in the database (0 if none)."""
+    version = connection.execute(select(schema_version.c.version)).scalar()
+    return version or 0
+
+
+def _set_version(connection: Connection, version: int) -> None:
+    updated = connection.execute(schema_version.update().values(version=version))
+    if not updated.rowcount:
+        connection.execute(schema_version.insert().values(version=version))
+
+
+def migrate(engine: Engine) -> int:
+    """Apply pending migrations, each in its own transaction."""
+    schema_version.create(engine, checkfirst=True)
+    for version, description, step in MIGRATIONS:
+        with engine.begin() as connection:
+            if current_version(connection) >= version:
+                continue
+            logger.info("Aplicando migracao %s: %s", version, description)
+            step(connection)
+            _set_version(connection, version)
+    with engine.connect() as connection:
+        return current_version(connection)
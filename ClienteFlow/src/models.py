@@ -3,7 +3,19 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Table,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db import Base
@@ -13,6 +25,11 @@ class Cliente(Base):
     """Client entity."""
 
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Keyset pagination and the default listing order.
+        Index("ix_clientes_nome_id", "nome", "id"),
+        Index("ix_clientes_empresa", "empresa"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     nome: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -39,6 +56,14 @@ class Contato(Base):
     """Contact entity."""
 
     __tablename__ = "contatos"
+    __table_args__ = (
+        # FK lookups (selectinload, Agenda client filter) already in history order.
+        Index("ix_contatos_cliente_data", "cliente_id", "data_hora"),
+        # Date range filter and ORDER BY data_hora DESC, id DESC.
+        Index("ix_contatos_data_id", "data_hora", "id"),
+        Index("ix_contatos_canal_data", "canal", "data_hora"),
+        Index("ix_contatos_proximo", "proximo_contato"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     cliente_id: Mapped[int] = mapped_column(Integer, ForeignKey("clientes.id"))
@@ -50,3 +75,175 @@ class Contato(Base):
     criado_em: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     cliente: Mapped[Cliente] = relationship("Cliente", back_populates="contatos")
+
+
+class ContatoDiario(Base):
+    """Daily contact volume per channel (rollup maintained by the services)."""
+
+    __tablename__ = "contatos_diarios"
+
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    canal: Mapped[str] = mapped_column(String(20), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ContatoSemanalCliente(Base):
+    """Weekly contact volume per client (rollup maintained by the services).
+
+    `semana` is the Monday of the week.
+    """
+
+    __tablename__ = "contatos_semanais_cliente"
+    __table_args__ = (
+        Index("ix_contatos_semanais_cliente_cliente", "cliente_id", "semana"),
+    )
+
+    semana: Mapped[date] = mapped_column(Date, primary_key=True)
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Tag(Base):
+    """Tag entity; `nome` holds the lowercase tag key."""
+
+    __tablename__ = "tags"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    nome: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+
+
+# Client <-> tag association. `Cliente.tags` keeps the display string; this
+# table is what tag filters and facets query.
+cliente_tags = Table(
+    "cliente_tags",
+    Base.metadata,
+    Column(
+        "cliente_id",
+        Integer,
+        ForeignKey("clientes.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "tag_id",
+        Integer,
+        ForeignKey("tags.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Index("ix_cliente_tags_tag_cliente", "tag_id", "cliente_id"),
+)
+
+
+class UltimoContato(Base):
+    """Most recent contact of each client (maintained by the services).
+
+    Backs the follow-up queue: the due `proximo_contato` of a client is the one
+    set on its latest contact.
+    """
+
+    __tablename__ = "ultimos_contatos"
+    __table_args__ = (Index("ix_ultimos_contatos_proximo", "proximo_contato"),)
+
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    contato_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    data_hora: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    proximo_contato: Mapped[date | None] = mapped_column(Date)
+
+
+class ChaveCliente(Base):
+    """Normalized blocking keys of a client (maintained by the services).
+
+    Duplicate detection only compares clients sharing one of these keys; see
+    `src.dedupe`.
+    """
+
+    __tablename__ = "clientes_chaves"
+    __table_args__ = (
+        Index("ix_clientes_chaves_telefone", "telefone"),
+        Index("ix_clientes_chaves_email", "email"),
+        Index("ix_clientes_chaves_nome", "nome"),
+    )
+
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Phone digits without the country code.
+    telefone: Mapped[str | None] = mapped_column(String(20))
+    # Lowercase email.
+    email: Mapped[str | None] = mapped_column(String(200))
+    # Phonetic code of the first and last name, accents stripped.
+    nome: Mapped[str | None] = mapped_column(String(100))
+
+
+class DuplicataCandidata(Base):
+    """Pair of clients that look like the same person, pending review.
+
+    Stored with `cliente_id < outro_id`. Pairs marked "ignorado" stay so the
+    checks do not suggest them again.
+    """
+
+    __tablename__ = "duplicatas_candidatas"
+    __table_args__ = (
+        Index("ix_duplicatas_candidatas_status_score", "status", "score"),
+        Index("ix_duplicatas_candidatas_outro", "outro_id"),
+    )
+
+    cliente_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    outro_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    motivo: Mapped[str] = mapped_column(String(100), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pendente")
+    atualizado_em: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class VetorNota(Base):
+    """Hashed term vector of a note (maintained by the services).
+
+    `origem` is "contato" (subject + notes) or "cliente" (observations).
+    `seq` grows with every write so each process can load only the rows it
+    has not seen; a NULL `vetor` marks a note deleted or left blank. See
+    `src.semantic`.
+    """
+
+    __tablename__ = "notas_vetores"
+    __table_args__ = (Index("ix_notas_vetores_seq", "seq"),)
+
+    origem: Mapped[str] = mapped_column(String(20), primary_key=True)
+    ref_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    vetor: Mapped[bytes | None] = mapped_column(LargeBinary)
+
+
+class Alteracao(Base):
+    """Append-only change log of `clientes` and `contatos` (see `src.changelog`).
+
+    Written in the same transaction as the change. `dados` is the JSON of
+    the row after the change (NULL for deletes).
+    """
+
+    __tablename__ = "alteracoes"
+    __table_args__ = (
+        Index("ix_alteracoes_tabela_ref_seq", "tabela", "ref_id", "seq"),
+        # Never reuse a sequence number, even after compaction empties the log.
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tabela: Mapped[str] = mapped_column(String(30), nullable=False)
+    operacao: Mapped[str] = mapped_column(String(10), nullable=False)
+    ref_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    dados: Mapped[str | None] = mapped_column(Text)
+    criado_em: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class CompactacaoAlteracoes(Base):
+    """Single row: how far compaction has dropped delete entries from the log.
+
+    A consumer whose last seen `seq` is below `seq_descartado` may have missed
+    deletes and must resynchronize from a full export.
+    """
+
+    __tablename__ = "alteracoes_compactacao"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    seq_descartado: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    executado_em: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
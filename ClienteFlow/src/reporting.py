@@ -0,0 +1,146 @@
+"""Read-only reporting copy of the database for heavy reads.
+
+Exports, the Dashboard aggregates and the unfiltered contact listing scan
+whole tables. On the primary file they hold read transactions for seconds,
+which keeps WAL checkpoints from finishing while interactive writes pile up,
+and they compete for the same connection pool.
+
+With CLIENTEFLOW_REPORTING_DB_PATH set (SQLite only), a scheduler job copies
+the database there every `REFRESH_SECONDS` with SQLite's online backup API:
+one step under a single read transaction, into a temporary file that is
+switched to a rollback journal and renamed into place. (`VACUUM INTO` also
+works, but rebuilds every table and index and took twice as long.) Those
+reads then go through `get_session()` on a separate engine that opens the
+copy with `mode=ro&immutable=1`, so SQLite takes no locks and never looks
+for a WAL. Connections opened before a refresh keep reading the previous
+copy until they return to the pool, so a running export sees one snapshot.
+
+Reports are up to `REFRESH_SECONDS` old. Until the first copy made by this
+process is ready, `get_session()` uses the primary database. With
+CLIENTEFLOW_REPORTING_DATABASE_URL (e.g. a PostgreSQL streaming replica),
+the reports read from that database instead and no copy is made.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from src import instrumentation
+from src.cache import read_cache
+from src.db import build_engine, engine
+from src.db import get_session as primary_session
+from src.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+REPORTING_DB_PATH = os.getenv("CLIENTEFLOW_REPORTING_DB_PATH")
+REPORTING_DATABASE_URL = os.getenv("CLIENTEFLOW_REPORTING_DATABASE_URL")
+REFRESH_SECONDS = float(os.getenv("CLIENTEFLOW_REPORTING_INTERVAL", "300"))
+REFRESH_JOB = "reporting_copy"
+# Pseudo-table bumped in the read cache after each refresh, so cached
+# reports computed from the previous copy are not served past it.
+TABLE = "copia_relatorios"
+
+
+class ReportingCopy:
+    """The reporting engine and the state of its copy."""
+
+    def __init__(self, path: str | Path | None = None, url: str | None = None) -> None:
+        self.path = Path(path) if path else None
+        self.url = url
+        self.refreshed_at: datetime | None = None
+        self.last_duration: float | None = None
+        self._engine: Engine | None = None
+        self._sessions: sessionmaker | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url) or (self.path is not None and engine.dialect.name == "sqlite")
+
+    @property
+    def ready(self) -> bool:
+        """Whether reports are currently read from the copy."""
+        return bool(self.url) or self.refreshed_at is not None
+
+    def _bind(self) -> sessionmaker:
+        with self._lock:
+            if self._sessions is None:
+                url = self.url or (
+                    f"sqlite:///file:{quote(self.path.resolve().as_posix())}"
+                    "?mode=ro&immutable=1&uri=true"
+                )
+                self._engine = build_engine(url, profile="reporting")
+                instrumentation.install(self._engine)
+                self._sessions = sessionmaker(
+                    bind=self._engine, autoflush=False, expire_on_commit=False
+                )
+            return self._sessions
+
+    def refresh(self) -> float:
+        """Copy the primary database over the reporting file; returns seconds."""
+        if self.url or self.path is None:
+            raise RuntimeError("Copia de relatorios nao configurada")
+        started = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        target = sqlite3.connect(partial)
+        try:
+            source = engine.raw_connection()
+            try:
+                source.driver_connection.backup(target)
+            finally:
+                source.close()
+            # The copy keeps the WAL flag of the source; immutable readers
+            # ignore it, but anyone opening the file normally would not.
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+        os.replace(partial, self.path)
+        if self._engine is not None:
+            # New connections open the new file; checked-out ones finish on the old.
+            self._engine.dispose()
+        self.refreshed_at = datetime.now()
+        self.last_duration = time.perf_counter() - started
+        read_cache.invalidate(TABLE)
+        logger.info("Copia de relatorios atualizada em %.2fs: %s", self.last_duration, self.path)
+        return self.last_duration
+
+    @contextmanager
+    def session(self) -> Session:
+        """Read-only session on the copy, or on the primary until it is ready."""
+        if not self.ready:
+            with primary_session() as session:
+                yield session
+            return
+        session: Session = self._bind()()
+        try:
+            yield session
+        finally:
+            session.close()
+
+
+reporting_copy = ReportingCopy(REPORTING_DB_PATH, REPORTING_DATABASE_URL)
+
+
+def get_session():
+    """Session for heavy read-only queries (see the module docstring)."""
+    return reporting_copy.session()
+
+
+def start_refresh_job(interval: float = REFRESH_SECONDS) -> None:
+    """Refresh the copy now and periodically, when a reporting path is configured."""
+    if not reporting_copy.enabled or reporting_copy.url:
+        return
+    scheduler.register(REFRESH_JOB, reporting_copy.refresh, interval=interval)
+    scheduler.start()
@@ -0,0 +1,111 @@
+"""Incrementally maintained contact rollups for the dashboard.
+
+Each contact counts once in `contatos_diarios` (day, channel) and once in
+`contatos_semanais_cliente` (week, client). The services apply +1/-1 deltas
+in the same transaction as the contact write, so the dashboard reads a few
+hundred rollup rows instead of scanning `contatos`.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.db import dialect_name, upsert_insert
+from src.models import Contato, ContatoDiario, ContatoSemanalCliente
+
+# (data_hora, canal, cliente_id) of a contact.
+ContactKey = tuple[datetime, str, int]
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def _upsert(connection: Connection | Session, model, keys: tuple[str, ...], counts: Counter) -> None:
+    rows = [
+        {**dict(zip(keys, key)), "total": total}
+        for key, total in counts.items()
+        if total
+    ]
+    if not rows:
+        return
+    statement = upsert_insert(connection, model)
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={"total": model.total + statement.excluded.total},
+        ),
+        rows,
+    )
+
+
+def apply(
+    connection: Connection | Session, contacts: Iterable[ContactKey], delta: int
+) -> None:
+    """Add `delta` to the rollup buckets of each contact."""
+    daily: Counter = Counter()
+    weekly: Counter = Counter()
+    for data_hora, canal, cliente_id in contacts:
+        day = data_hora.date()
+        daily[(day, canal)] += delta
+        weekly[(week_start(day), cliente_id)] += delta
+    _upsert(connection, ContatoDiario, ("dia", "canal"), daily)
+    _upsert(connection, ContatoSemanalCliente, ("semana", "cliente_id"), weekly)
+    if delta < 0:
+        connection.execute(delete(ContatoDiario).where(ContatoDiario.total <= 0))
+        connection.execute(
+            delete(ContatoSemanalCliente).where(ContatoSemanalCliente.total <= 0)
+        )
+
+
+def remove_client(connection: Connection | Session, client_id: int) -> None:
+    """Subtract every contact of a client that is about to be deleted."""
+    rows = connection.execute(
+        select(Contato.data_hora, Contato.canal, Contato.cliente_id).where(
+            Contato.cliente_id == client_id
+        )
+    )
+    apply(connection, rows.tuples(), -1)
+
+
+def day_expression(column, dialect: str = "sqlite"):
+    """SQL expression for the calendar day of a datetime column."""
+    if dialect == "sqlite":
+        return func.date(column, type_=Date)
+    return cast(column, Date)
+
+
+def week_expression(column, dialect: str = "sqlite"):
+    """SQL expression for the Monday of the week of a datetime column."""
+    if dialect == "sqlite":
+        return func.date(column, "weekday 0", "-6 days", type_=Date)
+    return cast(func.date_trunc(literal_column("'week'"), column), Date)
+
+
+def rebuild(connection: Connection) -> None:
+    """Recompute both rollups from `contatos` with GROUP BY."""
+    connection.execute(delete(ContatoDiario))
+    connection.execute(delete(ContatoSemanalCliente))
+    dialect = dialect_name(connection)
+    day = day_expression(Contato.data_hora, dialect)
+    connection.execute(
+        insert(ContatoDiario).from_select(
+            ["dia", "canal", "total"],
+            select(day, Contato.canal, func.count()).group_by(day, Contato.canal),
+        )
+    )
+    week = week_expression(Contato.data_hora, dialect)
+    connection.execute(
+        insert(ContatoSemanalCliente).from_select(
+            ["semana", "cliente_id", "total"],
+            select(week, Contato.cliente_id, func.count()).group_by(
+                week, Contato.cliente_id
+            ),
+        )
+    )
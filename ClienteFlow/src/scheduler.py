@@ -0,0 +1,131 @@
+"""Lightweight in-process scheduler for periodic background jobs.
+
+Jobs run on one daemon thread shared by the whole Streamlit process. A job
+reruns when its interval elapses or, sooner, when one of the tables it
+depends on changes (tracked through the read cache generations), and the
+latest result is kept for the pages to read without recomputing it.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from src.cache import read_cache
+
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 1.0
+
+
+@dataclass
+class Job:
+    """A periodic job and its latest outcome."""
+
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    depends_on: tuple[str, ...] = ()
+    result: Any = None
+    error: str | None = None
+    last_run: float | None = None
+    _generations: tuple[int, ...] | None = field(default=None, repr=False)
+    # Held while the job runs, so the loop and `Scheduler.result` never overlap.
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _current_generations(self) -> tuple[int, ...]:
+        return tuple(read_cache.generation(table) for table in self.depends_on)
+
+    def is_due(self, now: float) -> bool:
+        if self.last_run is None or now - self.last_run >= self.interval:
+            return True
+        return self._current_generations() != self._generations
+
+    def run(self) -> None:
+        with self._lock:
+            self._run()
+
+    def run_once(self) -> None:
+        """Run now unless some run already finished (waits for one in progress)."""
+        with self._lock:
+            if self.last_run is None:
+                self._run()
+
+    def _run(self) -> None:
+        generations = self._current_generations()
+        try:
+            self.result = self.func()
+            self.error = None
+        except Exception as exc:  # keep the scheduler alive
+            logger.exception("Job %s falhou", self.name)
+            self.error = str(exc)
+        self.last_run = time.monotonic()
+        self._generations = generations
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the last run."""
+        return None if self.last_run is None else time.monotonic() - self.last_run
+
+
+class Scheduler:
+    """Registry of jobs plus the daemon thread that runs them."""
+
+    def __init__(self) -> None:
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        depends_on: tuple[str, ...] = (),
+    ) -> Job:
+        """Add a job (or return the existing one with that name)."""
+        with self._lock:
+            if name not in self._jobs:
+                self._jobs[name] = Job(name, func, interval, depends_on)
+            return self._jobs[name]
+
+    def job(self, name: str) -> Job:
+        return self._jobs[name]
+
+    def result(self, name: str) -> Any:
+        """Latest result of a job, running it inline if it never ran."""
+        job = self._jobs[name]
+        if job.last_run is None:
+            job.run_once()
+        return job.result
+
+    def start(self) -> None:
+        """Start the background thread once per process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="clienteflow-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(TICK_SECONDS):
+            now = time.monotonic()
+            with self._lock:
+                jobs = list(self._jobs.values())
+            # Jobs run outside the registry lock: a long job (snapshot, copy
+            # refresh) must not block `register` calls from page reruns.
+            for job in jobs:
+                if job.is_due(now):
+                    job.run()
+
+
+scheduler = Scheduler()
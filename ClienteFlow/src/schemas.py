@@ -47,9 +47,29 @@ class ClientCreate(ClientBase):
     pass
 
 
+def reject_nulls(model: BaseModel, fields: tuple[str, ...]) -> BaseModel:
+    """Refuse an explicit null for `fields`, which the database requires.
+
+    Fields left out of an update keep their stored value, so only the ones
+    the caller actually set are checked.
+    """
+    nulls = [
+        name
+        for name in fields
+        if name in model.model_fields_set and getattr(model, name) is None
+    ]
+    if nulls:
+        raise ValueError(f"Campo obrigatorio nao pode ser nulo: {', '.join(nulls)}")
+    return model
+
+
 class ClientUpdate(ClientBase):
     nome: str | None = None
 
+    @model_validator(mode="after")
+    def validate_required(self):
+        return reject_nulls(self, ("nome",))
+
 
 class ContactBase(BaseModel):
     cliente_id: int
@@ -68,7 +88,11 @@ class ContactBase(BaseModel):
 
     @model_validator(mode="after")
     def validate_dates(self):
-        if self.proximo_contato and self.proximo_contato < self.data_hora.date():
+        if (
+            self.proximo_contato
+            and self.data_hora
+            and self.proximo_contato < self.data_hora.date()
+        ):
             raise ValueError("Proximo contato deve ser depois da data do contato")
         return self
 
@@ -82,3 +106,7 @@ class ContactUpdate(ContactBase):
     data_hora: datetime | None = None
     canal: str | None = None
     assunto: str | None = None
+
+    @model_validator(mode="after")
+    def validate_required(self):
+        return reject_nulls(self, ("cliente_id", "data_hora", "canal", "assunto"))
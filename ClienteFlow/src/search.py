@@ -0,0 +1,203 @@
+"""Text search indexes: SQLite FTS5 for clients, pg_trgm/tsvector on PostgreSQL.
+
+On SQLite the client search goes through the FTS5 table below and the notes
+search is a plain LIKE. On PostgreSQL the client search keeps the `ILIKE`
+filters, served by pg_trgm GIN indexes, and the notes search matches a
+`tsvector` expression backed by a GIN expression index.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sys
+
+from sqlalchemy import column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import ColumnElement, Select
+
+from src.models import Contato
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "clientes_fts"
+FTS_COLUMNS = ("nome", "email", "telefone", "empresa", "tags")
+# bm25 weights, one per column in FTS_COLUMNS (matches on nome rank higher).
+FTS_WEIGHTS = (10.0, 3.0, 3.0, 2.0, 1.0)
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{name}" for name in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{name}" for name in FTS_COLUMNS)
+
+# External-content table: the text lives only in `clientes`, the FTS table keeps
+# the inverted index. `remove_diacritics 2` makes "joao" match "João".
+CREATE_STATEMENTS = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_columns},
+        content='clientes',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns})
+        VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF {_columns} ON clientes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns})
+        VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+)
+
+# PostgreSQL: trigram indexes for the substring search on clients, and an
+# expression index over the subject + notes of each contact. Queries must
+# repeat NOTES_DOCUMENT verbatim for the planner to use the index.
+PG_TRGM_COLUMNS = ("nome", "email", "telefone", "empresa", "tags")
+PG_TS_CONFIG = "portuguese"
+NOTES_DOCUMENT = (
+    f"to_tsvector('{PG_TS_CONFIG}', "
+    "coalesce({table}assunto, '') || ' ' || coalesce({table}notas, ''))"
+)
+PG_CREATE_STATEMENTS = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    *(
+        f"CREATE INDEX IF NOT EXISTS ix_clientes_{name}_trgm "
+        f"ON clientes USING gin ({name} gin_trgm_ops)"
+        for name in PG_TRGM_COLUMNS
+    ),
+    "CREATE INDEX IF NOT EXISTS ix_contatos_notas_tsv "
+    f"ON contatos USING gin (({NOTES_DOCUMENT.format(table='')}))",
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+fts_table = table(FTS_TABLE, column("rowid"))
+
+_available: bool | None = None
+
+
+def _index_exists(connection: Connection) -> bool:
+    return (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        is not None
+    )
+
+
+def ensure_index(connection: Connection) -> bool:
+    """Create the FTS table and sync triggers, backfilling when newly created."""
+    global _available
+    if connection.dialect.name != "sqlite":
+        _available = False
+        return False
+    existed = _index_exists(connection)
+    try:
+        for statement in CREATE_STATEMENTS:
+            connection.exec_driver_sql(statement)
+    except OperationalError as exc:
+        logger.warning("FTS5 indisponivel, busca usara LIKE: %s", exc)
+        _available = False
+        return False
+    if not existed:
+        rebuild_index(connection)
+    _available = True
+    return True
+
+
+def ensure_text_indexes(connection: Connection) -> bool:
+    """Create the pg_trgm and notes tsvector indexes (PostgreSQL only)."""
+    if connection.dialect.name != "postgresql":
+        return False
+    for statement in PG_CREATE_STATEMENTS:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def notes_condition(value: str | None, dialect: str) -> ColumnElement[bool] | None:
+    """Condition on `Contato` for contacts whose subject or notes match `value`."""
+    if not value or not value.strip():
+        return None
+    if dialect == "postgresql":
+        document = literal_column(NOTES_DOCUMENT.format(table="contatos."))
+        return document.op("@@")(func.websearch_to_tsquery(PG_TS_CONFIG, value))
+    like = f"%{value.strip()}%"
+    return or_(Contato.assunto.ilike(like), Contato.notas.ilike(like))
+
+
+def rebuild_index(connection: Connection) -> None:
+    """Rebuild the FTS index from the current contents of `clientes`."""
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+    )
+
+
+def is_available(connection: Connection) -> bool:
+    """Return whether the FTS index can be queried on this database."""
+    global _available
+    if _available is None:
+        _available = connection.dialect.name == "sqlite" and _index_exists(connection)
+    return _available
+
+
+def build_match_query(value: str | None) -> str | None:
+    """Turn free user input into an FTS5 query of prefix terms (AND-ed)."""
+    if not value:
+        return None
+    tokens = _TOKEN_RE.findall(value)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _match(match_query: str) -> ColumnElement[bool]:
+    return literal_column(FTS_TABLE).op("MATCH")(match_query)
+
+
+def match_ids(match_query: str) -> Select:
+    """Select the client ids matching an FTS query (for `Cliente.id.in_`)."""
+    return select(fts_table.c.rowid).where(_match(match_query))
+
+
+def ranked_select(match_query: str) -> Select:
+    """Select `(rowid, rank)` for FTS matches, best first."""
+    rank = func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS).label("rank")
+    return (
+        select(fts_table.c.rowid.label("id"), rank)
+        .where(_match(match_query))
+        .order_by(rank)
+    )
+
+
+def _main(argv: list[str]) -> int:
+    from src.db import engine, init_db
+
+    if argv != ["rebuild"]:
+        print("uso: python -m src.search rebuild", file=sys.stderr)
+        return 2
+    init_db()
+    with engine.begin() as connection:
+        if not ensure_index(connection):
+            print("FTS5 indisponivel neste SQLite", file=sys.stderr)
+            return 1
+        rebuild_index(connection)
+    print("Indice de busca reconstruido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
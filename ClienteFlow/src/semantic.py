@@ -0,0 +1,402 @@
+"""Similarity search over free-text notes with hashed term vectors.
+
+Each note (subject + notes of a contact, observations of a client) becomes
+a sparse vector: accent-stripped words without stopwords, truncated to
+`STEM_LENGTH` characters (a cheap Portuguese stemmer: "reuniao" and
+"reunioes", "orcamento" and "orcamentos" meet), hashed into `DIMENSIONS`
+buckets, log-scaled and L2-normalized. The vectors are stored as BLOBs in
+`notas_vetores`, written in the same transaction as the note.
+
+Every process keeps all vectors in memory, laid out by feature in NumPy
+arrays (an inverted index), so a query only touches the postings of its own
+terms: the score is the dot product of the note vector with the
+idf-weighted, normalized query vector. Before each query the index loads the
+rows whose `seq` is above the last one it saw, so writes from any process
+show up incrementally. Recent rows sit in a small unsorted segment that is
+merged into the sorted one once it grows past `MERGE_THRESHOLD` postings.
+"""
+from __future__ import annotations
+
+import math
+import re
+import sys
+import threading
+import zlib
+from collections import Counter
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.db import serialize_appends, upsert_insert
+from src.dedupe import strip_accents
+from src.models import Cliente, Contato, VetorNota
+
+CONTACT = "contato"
+CLIENT = "cliente"
+SOURCES = (CONTACT, CLIENT)
+DIMENSIONS = 1 << 20
+STEM_LENGTH = 5
+MERGE_THRESHOLD = 50_000
+BATCH_SIZE = 1000
+# Packed (feature, weight) pairs: 6 bytes per distinct term of a note.
+VECTOR_DTYPE = np.dtype([("feature", "<u4"), ("weight", "<f2")])
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "ate", "com", "como", "da", "das", "de", "dela",
+    "dele", "do", "dos", "e", "ela", "ele", "em", "entre", "era", "essa",
+    "esse", "esta", "estao", "este", "eu", "foi", "ha", "isso", "isto", "ja",
+    "lhe", "mais", "mas", "me", "mesmo", "muito", "na", "nao", "nas", "nem",
+    "no", "nos", "o", "os", "ou", "para", "pela", "pelo", "por", "pra", "que",
+    "se", "sem", "ser", "seu", "seus", "so", "sua", "suas", "tem", "ter",
+    "um", "uma", "umas", "uns", "vai",
+}
+
+
+class NoteHit(NamedTuple):
+    origem: str
+    ref_id: int
+    score: float
+
+
+def terms(text: str | None) -> list[str]:
+    """Stemmed, accent-stripped words of `text`, stopwords removed."""
+    if not text:
+        return []
+    words = re.findall(r"[a-z0-9]+", strip_accents(text))
+    return [word[:STEM_LENGTH] for word in words if word not in STOPWORDS]
+
+
+def _term_counts(text: str | None) -> Counter[int]:
+    """How often each hashed feature occurs in `text`."""
+    return Counter(zlib.crc32(term.encode()) % DIMENSIONS for term in terms(text))
+
+
+def vectorize(text: str | None) -> np.ndarray | None:
+    """Normalized sparse vector of `text` (None when it has no terms)."""
+    counts = _term_counts(text)
+    if not counts:
+        return None
+    # Plain Python math: notes are short and NumPy's per-call overhead
+    # would dominate.
+    weights = {feature: 1 + math.log(count) for feature, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return np.array(
+        [(feature, weight / norm) for feature, weight in weights.items()],
+        VECTOR_DTYPE,
+    )
+
+
+def contact_text(assunto: str | None, notas: str | None) -> str:
+    return "\n".join(part for part in (assunto, notas) if part)
+
+
+def _next_seq(connection: Connection | Session) -> int:
+    # max + 1 is only safe if no other transaction can take the same number
+    # or commit a lower one later: `sync` never looks below the last seq it
+    # loaded. Hold the append lock until commit, as the change log does.
+    serialize_appends(connection, VetorNota.__tablename__)
+    return (connection.execute(select(func.max(VetorNota.seq))).scalar() or 0) + 1
+
+
+def index_notes(
+    connection: Connection | Session,
+    origem: str,
+    notes: Iterable[tuple[int, str | None]],
+    seq: int | None = None,
+) -> None:
+    """Store the vectors of `(ref_id, text)` notes of one source."""
+    rows = []
+    for ref_id, text in notes:
+        vector = vectorize(text)
+        rows.append(
+            {
+                "origem": origem,
+                "ref_id": ref_id,
+                "vetor": None if vector is None else vector.tobytes(),
+            }
+        )
+    if not rows:
+        return
+    if seq is None:
+        seq = _next_seq(connection)
+    statement = upsert_insert(connection, VetorNota)
+    statement = statement.on_conflict_do_update(
+        index_elements=["origem", "ref_id"],
+        set_={"vetor": statement.excluded.vetor, "seq": statement.excluded.seq},
+    )
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start : start + BATCH_SIZE]
+        connection.execute(statement, [{**row, "seq": seq} for row in batch])
+
+
+def remove_notes(
+    connection: Connection | Session, origem: str, ref_ids: Iterable[int]
+) -> None:
+    """Blank the vectors of deleted notes (kept as rows so other processes see it)."""
+    ref_ids = sorted(set(ref_ids))
+    if not ref_ids:
+        return
+    seq = _next_seq(connection)
+    for start in range(0, len(ref_ids), BATCH_SIZE):
+        connection.execute(
+            update(VetorNota)
+            .where(
+                VetorNota.origem == origem,
+                VetorNota.ref_id.in_(ref_ids[start : start + BATCH_SIZE]),
+            )
+            .values(vetor=None, seq=seq)
+        )
+
+
+def rebuild(connection: Connection) -> None:
+    """Recompute the vectors of every contact and client."""
+    seq = _next_seq(connection)
+    contacts = connection.execute(
+        select(Contato.id, Contato.assunto, Contato.notas).execution_options(
+            yield_per=BATCH_SIZE
+        )
+    )
+    for rows in contacts.partitions():
+        index_notes(
+            connection,
+            CONTACT,
+            ((id_, contact_text(assunto, notas)) for id_, assunto, notas in rows),
+            seq,
+        )
+    clients = connection.execute(
+        select(Cliente.id, Cliente.observacoes).execution_options(yield_per=BATCH_SIZE)
+    )
+    for rows in clients.partitions():
+        index_notes(connection, CLIENT, rows, seq)
+    # Rows not rewritten above belong to notes that no longer exist.
+    connection.execute(
+        update(VetorNota)
+        .where(VetorNota.seq < seq, VetorNota.vetor.is_not(None))
+        .values(vetor=None, seq=seq)
+    )
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class NoteIndex:
+    """In-memory copy of `notas_vetores`, laid out for term lookups.
+
+    Rows are numbered in load order; a note rewritten later gets a new row
+    and its old one is marked dead, its postings dropped at the next merge.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.seq = 0
+        self._row_of: dict[tuple[str, int], int] = {}
+        self._size = 0
+        self._sources = np.zeros(0, np.int8)
+        self._ref_ids = np.zeros(0, np.int64)
+        self._alive = np.zeros(0, bool)
+        # Sorted segment: the postings of feature f are
+        # rows[indptr[f]:indptr[f + 1]] (and the same slice of weights).
+        self._indptr = np.zeros(DIMENSIONS + 1, np.int64)
+        self._rows = np.zeros(0, np.int32)
+        self._weights = np.zeros(0, np.float16)
+        self._pending: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._delta = (
+            np.zeros(0, np.uint32),
+            np.zeros(0, np.int32),
+            np.zeros(0, np.float16),
+        )
+
+    def sync(self, connection: Connection | Session) -> None:
+        """Load the rows written since the last sync."""
+        with self._lock:
+            latest = connection.execute(select(func.max(VetorNota.seq))).scalar() or 0
+            if latest < self.seq:
+                # Another database (or a restored one): start over.
+                self.reset()
+            if latest == self.seq:
+                return
+            result = connection.execute(
+                select(
+                    VetorNota.origem, VetorNota.ref_id, VetorNota.seq, VetorNota.vetor
+                )
+                .where(VetorNota.seq > self.seq)
+                .order_by(VetorNota.seq)
+                .execution_options(yield_per=BATCH_SIZE)
+            )
+            for rows in result.partitions():
+                self._apply(rows)
+            self._consolidate()
+
+    def _apply(self, rows) -> None:
+        blobs, new_rows, lengths = [], [], []
+        for origem, ref_id, seq, blob in rows:
+            key = (origem, ref_id)
+            old = self._row_of.pop(key, None)
+            if old is not None:
+                self._alive[old] = False
+            self.seq = max(self.seq, seq)
+            if blob is None:
+                continue
+            row = self._size
+            self._size += 1
+            self._row_of[key] = row
+            self._sources = _grow(self._sources, self._size)
+            self._ref_ids = _grow(self._ref_ids, self._size)
+            self._alive = _grow(self._alive, self._size)
+            self._sources[row] = SOURCES.index(origem)
+            self._ref_ids[row] = ref_id
+            self._alive[row] = True
+            blobs.append(blob)
+            new_rows.append(row)
+            lengths.append(len(blob) // VECTOR_DTYPE.itemsize)
+        if blobs:
+            vectors = np.frombuffer(b"".join(blobs), VECTOR_DTYPE)
+            self._pending.append(
+                (
+                    vectors["feature"],
+                    np.repeat(np.array(new_rows, np.int32), lengths),
+                    vectors["weight"],
+                )
+            )
+
+    def _consolidate(self) -> None:
+        if not self._pending:
+            return
+        parts = [self._delta, *self._pending]
+        self._pending = []
+        self._delta = tuple(np.concatenate(column) for column in zip(*parts))
+        if len(self._delta[0]) > max(MERGE_THRESHOLD, len(self._rows) // 10):
+            self._merge()
+
+    def _merge(self) -> None:
+        """Fold the unsorted segment into the sorted one, dropping dead rows."""
+        features = np.concatenate(
+            [
+                np.repeat(
+                    np.arange(DIMENSIONS, dtype=np.uint32), np.diff(self._indptr)
+                ),
+                self._delta[0],
+            ]
+        )
+        rows = np.concatenate([self._rows, self._delta[1]])
+        weights = np.concatenate([self._weights, self._delta[2]])
+        live = self._alive[rows]
+        features, rows, weights = features[live], rows[live], weights[live]
+        order = np.argsort(features, kind="stable")
+        self._rows, self._weights = rows[order], weights[order]
+        self._indptr[1:] = np.cumsum(np.bincount(features, minlength=DIMENSIONS))
+        self._delta = (
+            np.zeros(0, np.uint32),
+            np.zeros(0, np.int32),
+            np.zeros(0, np.float16),
+        )
+
+    def _postings(self, feature: int) -> tuple[np.ndarray, np.ndarray]:
+        start, end = self._indptr[feature], self._indptr[feature + 1]
+        rows, weights = self._rows[start:end], self._weights[start:end]
+        in_delta = self._delta[0] == feature
+        if in_delta.any():
+            rows = np.concatenate([rows, self._delta[1][in_delta]])
+            weights = np.concatenate([weights, self._delta[2][in_delta]])
+        live = self._alive[rows]
+        return rows[live], weights[live]
+
+    def search(
+        self, text: str, limit: int = 20, origem: str | None = None
+    ) -> list[NoteHit]:
+        """The `limit` notes most similar to `text`, best first."""
+        counts = _term_counts(text)
+        with self._lock:
+            total = len(self._row_of)
+            matched_rows, matched_weights, query_weights = [], [], []
+            for feature, count in counts.items():
+                rows, weights = self._postings(feature)
+                if not len(rows):
+                    continue
+                idf = math.log((total + 1) / (len(rows) + 1)) + 1
+                matched_rows.append(rows)
+                matched_weights.append(weights.astype(np.float64))
+                query_weights.append((1 + math.log(count)) * idf)
+            if not matched_rows:
+                return []
+            norm = math.sqrt(sum(weight * weight for weight in query_weights))
+            scores = np.bincount(
+                np.concatenate(matched_rows),
+                weights=np.concatenate(
+                    [
+                        weights * (query_weight / norm)
+                        for weights, query_weight in zip(matched_weights, query_weights)
+                    ]
+                ),
+                minlength=self._size,
+            )
+            candidates = np.flatnonzero(scores)
+            if origem is not None:
+                candidates = candidates[
+                    self._sources[candidates] == SOURCES.index(origem)
+                ]
+            if len(candidates) > limit:
+                best = np.argpartition(-scores[candidates], limit)[:limit]
+                candidates = candidates[best]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [
+                NoteHit(
+                    SOURCES[self._sources[row]],
+                    int(self._ref_ids[row]),
+                    float(scores[row]),
+                )
+                for row in candidates
+            ]
+
+    def stats(self) -> dict[str, int]:
+        """Indexed notes, loaded rows and postings in each segment."""
+        with self._lock:
+            return {
+                "notes": len(self._row_of),
+                "rows": self._size,
+                "seq": self.seq,
+                "sorted_postings": len(self._rows),
+                "recent_postings": len(self._delta[0]),
+            }
+
+
+note_index = NoteIndex()
+
+
+def search(
+    connection: Connection | Session,
+    text: str,
+    limit: int = 20,
+    origem: str | None = None,
+) -> list[NoteHit]:
+    """Catch up with the stored vectors, then query the process index."""
+    note_index.sync(connection)
+    return note_index.search(text, limit, origem)
+
+
+def _main(argv: list[str]) -> int:
+    from src.db import engine, init_db
+
+    if argv != ["rebuild"]:
+        print("uso: python -m src.semantic rebuild", file=sys.stderr)
+        return 2
+    init_db()
+    with engine.begin() as connection:
+        rebuild(connection)
+    print("Vetores das notas reconstruidos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
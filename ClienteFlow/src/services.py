@@ -1,145 +1,1024 @@
 """Service layer for database operations."""
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import date, datetime
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import or_
-from sqlalchemy.orm import selectinload
+import pandas as pd
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Query, Session, aliased, selectinload
 
-from src.db import get_session
-from src.models import Cliente, Contato
-from src.schemas import ClientCreate, ClientUpdate, ContactCreate, ContactUpdate
-from src.utils import normalize_phone, normalize_tags
+from src import changelog, dedupe, followups, reporting, rollups, semantic
+from src import search as fts
+from src import tags as tag_index
+from src.cache import cached, invalidates
+from src.db import dialect_name, get_session
+from src.scheduler import scheduler
+from src.models import (
+    Cliente,
+    Contato,
+    ContatoDiario,
+    ContatoSemanalCliente,
+    DuplicataCandidata,
+    Tag,
+    UltimoContato,
+    cliente_tags,
+)
+from src.utils import normalize_phone, normalize_tags, split_tags
+from src.writer import queued_write
 
+if TYPE_CHECKING:
+    # Annotations only: building the schemas (and email-validator) is the
+    # slowest import of the app and pages that only read data skip it.
+    from src.schemas import ClientCreate, ClientUpdate, ContactCreate, ContactUpdate
 
-def create_client(data: ClientCreate) -> Cliente:
+
+DEFAULT_PAGE_SIZE = 50
+FOLLOWUP_QUEUE_JOB = "followup_queue"
+FOLLOWUP_REFRESH_SECONDS = 60
+# Client fields that feed the duplicate blocking keys and score.
+DEDUPE_FIELDS = {"nome", "email", "telefone", "empresa"}
+# Contact fields indexed for the note similarity search.
+NOTE_FIELDS = {"assunto", "notas"}
+
+# Columns shown by the Clientes / Agenda tables (see `*_table_page`).
+CLIENT_TABLE_COLUMNS = (
+    Cliente.id,
+    Cliente.nome,
+    Cliente.email,
+    Cliente.telefone,
+    Cliente.empresa,
+    Cliente.tags,
+    Cliente.atualizado_em,
+)
+CONTACT_TABLE_COLUMNS = (
+    Contato.id,
+    Contato.data_hora,
+    Cliente.nome.label("cliente"),
+    Contato.canal,
+    Contato.assunto,
+    Contato.proximo_contato,
+)
+
+
+@dataclass(frozen=True)
+class Page:
+    """One page of a keyset-paginated listing.
+
+    `next_cursor` is the sort key of the last item, to be passed back as
+    `after` to fetch the following page; it is None on the last page.
+    """
+
+    items: list[Any]
+    next_cursor: tuple | None
+
+
+def _like_condition(search: str):
+    like = f"%{search}%"
+    return or_(
+        Cliente.nome.ilike(like),
+        Cliente.email.ilike(like),
+        Cliente.telefone.ilike(like),
+        Cliente.empresa.ilike(like),
+        Cliente.tags.ilike(like),
+    )
+
+
+def _search_condition(session: Session, search: str):
+    """Filter on the FTS index, falling back to LIKE when it is unavailable."""
+    if not fts.is_available(session.connection()):
+        return _like_condition(search)
+    match_query = fts.build_match_query(search)
+    if not match_query:
+        return _like_condition(search)
+    return Cliente.id.in_(fts.match_ids(match_query))
+
+
+@queued_write("clientes")
+def create_client(session: Session, data: ClientCreate) -> Cliente:
     """Create a new client."""
     payload = data.model_dump()
     payload["telefone"] = normalize_phone(payload.get("telefone"))
     payload["tags"] = normalize_tags(payload.get("tags"))
-    with get_session() as session:
-        client = Cliente(**payload)
-        session.add(client)
-        session.flush()
-        session.refresh(client)
-        return client
+    client = Cliente(**payload)
+    session.add(client)
+    session.flush()
+    tag_index.sync_client_tags(session, {client.id: client.tags})
+    dedupe.refresh(session, [client.id])
+    semantic.index_notes(session, semantic.CLIENT, [(client.id, client.observacoes)])
+    changelog.record_rows(session, changelog.INSERT, Cliente, [client.id])
+    return client
 
 
+def client_conditions(
+    session: Session,
+    search: str | None,
+    empresa: str | None,
+    tags: str | None,
+    tags_mode: str = "any",
+) -> list:
+    """Build the WHERE conditions for the client filters used by the pages.
+
+    `tags` is a comma separated list matched exactly (case-insensitive);
+    `tags_mode` selects clients with "any" or "all" of them.
+    """
+    conditions = []
+    if search:
+        conditions.append(_search_condition(session, search))
+    if empresa:
+        conditions.append(Cliente.empresa.ilike(f"%{empresa}%"))
+    if tags:
+        tag_condition = tag_index.tag_filter_condition(tags, tags_mode)
+        if tag_condition is not None:
+            conditions.append(tag_condition)
+    return conditions
+
+
+@cached("clientes")
 def list_clients(
     search: str | None = None,
     empresa: str | None = None,
     tags: str | None = None,
+    tags_mode: str = "any",
 ) -> list[Cliente]:
     """List clients with optional filters."""
     with get_session() as session:
-        query = session.query(Cliente)
-        if search:
-            like = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Cliente.nome.ilike(like),
-                    Cliente.email.ilike(like),
-                    Cliente.telefone.ilike(like),
-                    Cliente.empresa.ilike(like),
-                    Cliente.tags.ilike(like),
-                )
+        query = session.query(Cliente).filter(
+            *client_conditions(session, search, empresa, tags, tags_mode)
+        )
+        return query.order_by(Cliente.nome.asc(), Cliente.id.asc()).all()
+
+
+def _clients_page_rows(
+    session: Session,
+    columns: tuple,
+    search: str | None,
+    empresa: str | None,
+    tags: str | None,
+    tags_mode: str,
+    after: tuple[str, int] | None,
+    limit: int,
+) -> tuple[list, tuple[str, int] | None]:
+    """Fetch `limit` rows of `columns` after the `(nome, id)` keyset `after`.
+
+    Rows must expose `nome` and `id`; returns the rows and the next cursor.
+    """
+    query = session.query(*columns).filter(
+        *client_conditions(session, search, empresa, tags, tags_mode)
+    )
+    if after:
+        nome, last_id = after
+        query = query.filter(
+            or_(
+                Cliente.nome > nome,
+                and_(Cliente.nome == nome, Cliente.id > last_id),
             )
-        if empresa:
-            query = query.filter(Cliente.empresa.ilike(f"%{empresa}%"))
-        if tags:
-            query = query.filter(Cliente.tags.ilike(f"%{tags}%"))
-        return query.order_by(Cliente.nome.asc()).all()
+        )
+    rows = (
+        query.order_by(Cliente.nome.asc(), Cliente.id.asc()).limit(limit + 1).all()
+    )
+    items = rows[:limit]
+    next_cursor = (items[-1].nome, items[-1].id) if len(rows) > limit else None
+    return items, next_cursor
 
 
-def get_client(client_id: int) -> Cliente | None:
-    """Get client by id with contacts."""
+@cached("clientes")
+def list_clients_page(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+    after: tuple[str, int] | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    """List one page of clients ordered by `(nome, id)`, starting after `after`."""
+    with get_session() as session:
+        items, next_cursor = _clients_page_rows(
+            session, (Cliente,), search, empresa, tags, tags_mode, after, limit
+        )
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@cached("clientes")
+def client_table_page(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+    after: tuple[str, int] | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    """Like `list_clients_page`, but only the table columns, as a DataFrame.
+
+    Selects just `CLIENT_TABLE_COLUMNS` (no ORM entities, no Text blobs) and
+    builds the frame straight from the row tuples; display formatting is
+    left to the dataframe column config.
+    """
+    with get_session() as session:
+        rows, next_cursor = _clients_page_rows(
+            session, CLIENT_TABLE_COLUMNS, search, empresa, tags, tags_mode, after, limit
+        )
+    frame = pd.DataFrame.from_records(
+        rows, columns=[column.key for column in CLIENT_TABLE_COLUMNS]
+    )
+    return Page(items=frame, next_cursor=next_cursor)
+
+
+@cached("clientes")
+def count_clients(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+) -> int:
+    """Count clients matching the same filters as `list_clients`."""
     with get_session() as session:
+        return (
+            session.query(func.count(Cliente.id))
+            .filter(*client_conditions(session, search, empresa, tags, tags_mode))
+            .scalar()
+        )
+
+
+@cached("clientes")
+def tag_counts(
+    search: str | None = None,
+    empresa: str | None = None,
+    tags: str | None = None,
+    tags_mode: str = "any",
+    limit: int = 50,
+) -> list[tuple[str, int]]:
+    """Tag facet: `(tag, clients)` pairs for the filtered clients, most used first."""
+    with get_session() as session:
+        total = func.count(cliente_tags.c.cliente_id).label("total")
+        query = (
+            session.query(Tag.nome, total)
+            .join(cliente_tags, cliente_tags.c.tag_id == Tag.id)
+        )
+        conditions = client_conditions(session, search, empresa, tags, tags_mode)
+        if conditions:
+            filtered = session.query(Cliente.id).filter(*conditions)
+            query = query.filter(cliente_tags.c.cliente_id.in_(filtered))
+        query = (
+            query.group_by(Tag.id).order_by(total.desc(), Tag.nome.asc()).limit(limit)
+        )
+        return [(nome, count) for nome, count in query.all()]
+
+
+@cached("clientes")
+def search_clients(text: str, limit: int = 20) -> list[Cliente]:
+    """Search clients by free text, best matches first."""
+    match_query = fts.build_match_query(text)
+    if not match_query:
+        return []
+    with get_session() as session:
+        if not fts.is_available(session.connection()):
+            return (
+                session.query(Cliente)
+                .filter(_like_condition(text))
+                .order_by(Cliente.nome.asc())
+                .limit(limit)
+                .all()
+            )
+        ranked = fts.ranked_select(match_query).limit(limit).subquery()
         return (
             session.query(Cliente)
-            .options(selectinload(Cliente.contatos))
-            .filter(Cliente.id == client_id)
-            .first()
+            .join(ranked, ranked.c.id == Cliente.id)
+            .order_by(ranked.c.rank)
+            .all()
         )
 
 
-def update_client(client_id: int, data: ClientUpdate) -> Cliente | None:
-    """Update client data."""
+def client_label(client_id: int, nome: str, empresa: str | None) -> str:
+    """Unambiguous display label for a client (names are not unique)."""
+    detail = f" ({empresa})" if empresa else ""
+    return f"{nome}{detail} #{client_id}"
+
+
+@cached("clientes")
+def client_options(text: str | None = None, limit: int = 20) -> list[tuple[int, str]]:
+    """Typeahead lookup: `(id, label)` of up to `limit` clients matching `text`.
+
+    Without text, returns the first clients in name order. With text, uses the
+    ranked FTS prefix search (or a `nome` prefix LIKE when FTS is unavailable).
+    """
+    columns = (Cliente.id, Cliente.nome, Cliente.empresa)
+    match_query = fts.build_match_query(text)
     with get_session() as session:
-        client = session.query(Cliente).filter(Cliente.id == client_id).first()
-        if not client:
-            return None
-        payload = data.model_dump(exclude_unset=True)
-        if "telefone" in payload:
-            payload["telefone"] = normalize_phone(payload.get("telefone"))
-        if "tags" in payload:
-            payload["tags"] = normalize_tags(payload.get("tags"))
-        for key, value in payload.items():
-            setattr(client, key, value)
-        session.flush()
-        session.refresh(client)
-        return client
-
-
-def delete_client(client_id: int) -> bool:
-    """Delete a client and cascade contacts."""
+        query = session.query(*columns)
+        if not match_query:
+            query = query.order_by(Cliente.nome.asc(), Cliente.id.asc())
+        elif fts.is_available(session.connection()):
+            ranked = fts.ranked_select(match_query).limit(limit).subquery()
+            query = query.join(ranked, ranked.c.id == Cliente.id).order_by(
+                ranked.c.rank
+            )
+        else:
+            query = query.filter(Cliente.nome.ilike(f"{text.strip()}%")).order_by(
+                Cliente.nome.asc(), Cliente.id.asc()
+            )
+        return [
+            (client_id, client_label(client_id, nome, empresa))
+            for client_id, nome, empresa in query.limit(limit).all()
+        ]
+
+
+@cached("clientes")
+def client_labels(client_ids: tuple[int, ...]) -> dict[int, str]:
+    """Labels of the given client ids (primary key lookups)."""
+    if not client_ids:
+        return {}
+    with get_session() as session:
+        rows = session.query(Cliente.id, Cliente.nome, Cliente.empresa).filter(
+            Cliente.id.in_(client_ids)
+        )
+        return {
+            client_id: client_label(client_id, nome, empresa)
+            for client_id, nome, empresa in rows.all()
+        }
+
+
+@cached("clientes")
+def get_client(client_id: int) -> Cliente | None:
+    """Get client by id (contacts are not loaded, see `list_contacts_page`)."""
+    with get_session() as session:
+        return session.query(Cliente).filter(Cliente.id == client_id).first()
+
+
+@cached("contatos")
+def count_client_contacts(client_id: int) -> int:
+    """Total contacts of a client, summed from the weekly rollup."""
     with get_session() as session:
-        client = session.query(Cliente).filter(Cliente.id == client_id).first()
-        if not client:
-            return False
-        session.delete(client)
-        return True
+        total = (
+            session.query(func.sum(ContatoSemanalCliente.total))
+            .filter(ContatoSemanalCliente.cliente_id == client_id)
+            .scalar()
+        )
+        return total or 0
+
 
+@queued_write("clientes")
+def update_client(
+    session: Session, client_id: int, data: ClientUpdate
+) -> Cliente | None:
+    """Update client data."""
+    client = session.query(Cliente).filter(Cliente.id == client_id).first()
+    if not client:
+        return None
+    payload = data.model_dump(exclude_unset=True)
+    if "telefone" in payload:
+        payload["telefone"] = normalize_phone(payload.get("telefone"))
+    if "tags" in payload:
+        payload["tags"] = normalize_tags(payload.get("tags"))
+    for key, value in payload.items():
+        setattr(client, key, value)
+    session.flush()
+    if "tags" in payload:
+        tag_index.sync_client_tags(session, {client.id: client.tags})
+    if payload.keys() & DEDUPE_FIELDS:
+        dedupe.refresh(session, [client.id])
+    if "observacoes" in payload:
+        semantic.index_notes(
+            session, semantic.CLIENT, [(client.id, client.observacoes)]
+        )
+    changelog.record_rows(session, changelog.UPDATE, Cliente, [client.id])
+    return client
+
+
+@queued_write("clientes", "contatos")
+def delete_client(session: Session, client_id: int) -> bool:
+    """Delete a client and cascade contacts."""
+    client = session.query(Cliente).filter(Cliente.id == client_id).first()
+    if not client:
+        return False
+    tag_index.remove_client_tags(session, client.id)
+    dedupe.remove_client(session, client.id)
+    rollups.remove_client(session, client.id)
+    followups.remove_client(session, client.id)
+    contact_ids = session.scalars(
+        select(Contato.id).where(Contato.cliente_id == client.id)
+    ).all()
+    semantic.remove_notes(session, semantic.CLIENT, [client.id])
+    semantic.remove_notes(session, semantic.CONTACT, contact_ids)
+    changelog.record_deletes(session, Contato, contact_ids)
+    changelog.record_deletes(session, Cliente, [client.id])
+    # One DELETE instead of loading the whole history for the ORM cascade.
+    session.execute(delete(Contato).where(Contato.cliente_id == client.id))
+    session.delete(client)
+    return True
+
+
+def _rollup_key(contact: Contato) -> rollups.ContactKey:
+    return (contact.data_hora, contact.canal, contact.cliente_id)
 
-def create_contact(data: ContactCreate) -> Contato:
+
+@queued_write("contatos")
+def create_contact(session: Session, data: ContactCreate) -> Contato:
     """Create a new contact."""
     payload = data.model_dump()
-    with get_session() as session:
-        contact = Contato(**payload)
-        session.add(contact)
-        session.flush()
-        session.refresh(contact)
-        return contact
+    contact = Contato(**payload)
+    session.add(contact)
+    session.flush()
+    rollups.apply(session, [_rollup_key(contact)], +1)
+    followups.refresh(session, [contact.cliente_id])
+    semantic.index_notes(
+        session,
+        semantic.CONTACT,
+        [(contact.id, semantic.contact_text(contact.assunto, contact.notas))],
+    )
+    changelog.record_rows(session, changelog.INSERT, Contato, [contact.id])
+    return contact
+
+
+def contact_conditions(
+    session: Session,
+    cliente_id: int | None,
+    data_inicio: date | None,
+    data_fim: date | None,
+    canal: str | None,
+    texto: str | None = None,
+) -> list:
+    """Build the WHERE conditions for the contact filters used by the pages."""
+    conditions = []
+    if cliente_id:
+        conditions.append(Contato.cliente_id == cliente_id)
+    if data_inicio:
+        conditions.append(
+            Contato.data_hora >= datetime.combine(data_inicio, datetime.min.time())
+        )
+    if data_fim:
+        conditions.append(
+            Contato.data_hora <= datetime.combine(data_fim, datetime.max.time())
+        )
+    if canal:
+        conditions.append(Contato.canal == canal)
+    notes = fts.notes_condition(texto, dialect_name(session))
+    if notes is not None:
+        conditions.append(notes)
+    return conditions
 
 
+@cached("contatos", "clientes", reporting.TABLE)
 def list_contacts(
     cliente_id: int | None = None,
     data_inicio: date | None = None,
     data_fim: date | None = None,
     canal: str | None = None,
+    texto: str | None = None,
 ) -> list[Contato]:
-    """List contacts with filters."""
+    """List contacts with filters.
+
+    Without any filter this loads the whole table, so it reads from the
+    reporting copy (`src.reporting`) when one is configured.
+    """
+    unfiltered = not any((cliente_id, data_inicio, data_fim, canal, texto))
+    with (reporting.get_session() if unfiltered else get_session()) as session:
+        query = (
+            session.query(Contato)
+            .options(selectinload(Contato.cliente))
+            .filter(
+                *contact_conditions(
+                    session, cliente_id, data_inicio, data_fim, canal, texto
+                )
+            )
+        )
+        return query.order_by(Contato.data_hora.desc(), Contato.id.desc()).all()
+
+
+def _contacts_page_rows(
+    query: Query,
+    after: tuple[datetime, int] | None,
+    limit: int,
+) -> tuple[list, tuple[datetime, int] | None]:
+    """Fetch `limit` rows of `query` after the `(data_hora, id)` keyset `after`.
+
+    Rows must expose `data_hora` and `id`; returns the rows and the next cursor.
+    """
+    if after:
+        data_hora, last_id = after
+        query = query.filter(
+            or_(
+                Contato.data_hora < data_hora,
+                and_(Contato.data_hora == data_hora, Contato.id < last_id),
+            )
+        )
+    rows = (
+        query.order_by(Contato.data_hora.desc(), Contato.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    items = rows[:limit]
+    next_cursor = (
+        (items[-1].data_hora, items[-1].id) if len(rows) > limit else None
+    )
+    return items, next_cursor
+
+
+@cached("contatos", "clientes")
+def list_contacts_page(
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    """List one page of contacts, newest first by `(data_hora, id)`."""
     with get_session() as session:
-        query = session.query(Contato).options(selectinload(Contato.cliente))
-        if cliente_id:
-            query = query.filter(Contato.cliente_id == cliente_id)
-        if data_inicio:
-            query = query.filter(Contato.data_hora >= datetime.combine(data_inicio, datetime.min.time()))
-        if data_fim:
-            query = query.filter(Contato.data_hora <= datetime.combine(data_fim, datetime.max.time()))
-        if canal:
-            query = query.filter(Contato.canal == canal)
-        return query.order_by(Contato.data_hora.desc()).all()
+        query = (
+            session.query(Contato)
+            .options(selectinload(Contato.cliente))
+            .filter(
+                *contact_conditions(
+                    session, cliente_id, data_inicio, data_fim, canal, texto
+                )
+            )
+        )
+        items, next_cursor = _contacts_page_rows(query, after, limit)
+    return Page(items=items, next_cursor=next_cursor)
 
 
-def update_contact(contact_id: int, data: ContactUpdate) -> Contato | None:
-    """Update a contact."""
+@cached("contatos", "clientes")
+def contact_table_page(
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page:
+    """Like `list_contacts_page`, but only the table columns, as a DataFrame.
+
+    The client name comes from an outer join instead of loading `Cliente`
+    objects, and `notas` is never read.
+    """
+    with get_session() as session:
+        query = (
+            session.query(*CONTACT_TABLE_COLUMNS)
+            .outerjoin(Cliente, Cliente.id == Contato.cliente_id)
+            .filter(
+                *contact_conditions(
+                    session, cliente_id, data_inicio, data_fim, canal, texto
+                )
+            )
+        )
+        rows, next_cursor = _contacts_page_rows(query, after, limit)
+    frame = pd.DataFrame.from_records(
+        rows, columns=[column.key for column in CONTACT_TABLE_COLUMNS]
+    )
+    return Page(items=frame, next_cursor=next_cursor)
+
+
+@cached("contatos")
+def count_contacts(
+    cliente_id: int | None = None,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    canal: str | None = None,
+    texto: str | None = None,
+) -> int:
+    """Count contacts matching the same filters as `list_contacts`."""
     with get_session() as session:
-        contact = session.query(Contato).filter(Contato.id == contact_id).first()
-        if not contact:
-            return None
-        payload = data.model_dump(exclude_unset=True)
-        for key, value in payload.items():
-            setattr(contact, key, value)
-        session.flush()
-        session.refresh(contact)
-        return contact
+        return (
+            session.query(func.count(Contato.id))
+            .filter(
+                *contact_conditions(
+                    session, cliente_id, data_inicio, data_fim, canal, texto
+                )
+            )
+            .scalar()
+        )
 
 
-def delete_contact(contact_id: int) -> bool:
+@queued_write("contatos")
+def update_contact(
+    session: Session, contact_id: int, data: ContactUpdate
+) -> Contato | None:
+    """Update a contact."""
+    contact = session.query(Contato).filter(Contato.id == contact_id).first()
+    if not contact:
+        return None
+    payload = data.model_dump(exclude_unset=True)
+    old_key = _rollup_key(contact)
+    old_cliente_id = contact.cliente_id
+    for key, value in payload.items():
+        setattr(contact, key, value)
+    session.flush()
+    new_key = _rollup_key(contact)
+    if new_key != old_key:
+        rollups.apply(session, [old_key], -1)
+        rollups.apply(session, [new_key], +1)
+    followups.refresh(session, [old_cliente_id, contact.cliente_id])
+    if payload.keys() & NOTE_FIELDS:
+        semantic.index_notes(
+            session,
+            semantic.CONTACT,
+            [(contact.id, semantic.contact_text(contact.assunto, contact.notas))],
+        )
+    changelog.record_rows(session, changelog.UPDATE, Contato, [contact.id])
+    return contact
+
+
+@queued_write("contatos")
+def delete_contact(session: Session, contact_id: int) -> bool:
     """Delete a contact."""
+    contact = session.query(Contato).filter(Contato.id == contact_id).first()
+    if not contact:
+        return False
+    rollups.apply(session, [_rollup_key(contact)], -1)
+    session.delete(contact)
+    session.flush()
+    followups.refresh(session, [contact.cliente_id])
+    semantic.remove_notes(session, semantic.CONTACT, [contact.id])
+    changelog.record_deletes(session, Contato, [contact.id])
+    return True
+
+
+def changes_since(
+    seq: int, limit: int = changelog.BATCH_SIZE, tables: tuple[str, ...] | None = None
+) -> list[dict[str, Any]]:
+    """Change-log entries after `seq`, oldest first (see `src.changelog`).
+
+    Not cached: consumers poll it and expect every committed change.
+    """
+    with get_session() as session:
+        return changelog.changes_since(session, seq, limit, tables)
+
+
+@cached("clientes", "contatos")
+def search_notes(
+    text: str, limit: int = 20, origem: str | None = None
+) -> list[dict[str, Any]]:
+    """Contact notes and client observations most similar to `text`, best first.
+
+    `origem` limits the search to "contato" or "cliente". Items carry the
+    score, the source and id, the client label, and the note itself.
+    """
+    if not text or not text.strip():
+        return []
+    with get_session() as session:
+        hits = semantic.search(session, text, limit, origem)
+        contact_ids = [hit.ref_id for hit in hits if hit.origem == semantic.CONTACT]
+        contacts = {
+            row.id: row
+            for row in session.execute(
+                select(
+                    Contato.id,
+                    Contato.cliente_id,
+                    Contato.data_hora,
+                    Contato.assunto,
+                    Contato.notas,
+                ).where(Contato.id.in_(contact_ids))
+            )
+        }
+        client_ids = {hit.ref_id for hit in hits if hit.origem == semantic.CLIENT}
+        client_ids.update(row.cliente_id for row in contacts.values())
+        clients = {
+            row.id: row
+            for row in session.execute(
+                select(
+                    Cliente.id, Cliente.nome, Cliente.empresa, Cliente.observacoes
+                ).where(Cliente.id.in_(client_ids))
+            )
+        }
+
+    items = []
+    for hit in hits:
+        if hit.origem == semantic.CONTACT:
+            contact = contacts.get(hit.ref_id)
+            if contact is None:
+                continue
+            client = clients.get(contact.cliente_id)
+            item = {
+                "cliente_id": contact.cliente_id,
+                "data_hora": contact.data_hora,
+                "assunto": contact.assunto,
+                "texto": contact.notas or "",
+            }
+        else:
+            client = clients.get(hit.ref_id)
+            if client is None:
+                continue
+            item = {
+                "cliente_id": client.id,
+                "data_hora": None,
+                "assunto": "Observacoes do cliente",
+                "texto": client.observacoes or "",
+            }
+        items.append(
+            {
+                "score": round(hit.score, 3),
+                "origem": hit.origem,
+                "id": hit.ref_id,
+                "cliente": (
+                    client_label(client.id, client.nome, client.empresa)
+                    if client
+                    else ""
+                ),
+                **item,
+            }
+        )
+    return items
+
+
+def _day_bounds(data_inicio: date, data_fim: date) -> tuple[datetime, datetime]:
+    return (
+        datetime.combine(data_inicio, datetime.min.time()),
+        datetime.combine(data_fim, datetime.max.time()),
+    )
+
+
+@cached("contatos", reporting.TABLE)
+def contacts_per_day(
+    data_inicio: date, data_fim: date, use_rollups: bool = True
+) -> list[tuple[date, str, int]]:
+    """Contact volume as `(dia, canal, total)`, from the rollup or a GROUP BY.
+
+    Reads from the reporting copy when one is configured.
+    """
+    with reporting.get_session() as session:
+        if use_rollups:
+            query = session.query(
+                ContatoDiario.dia, ContatoDiario.canal, ContatoDiario.total
+            ).filter(ContatoDiario.dia.between(data_inicio, data_fim))
+            return [tuple(row) for row in query.order_by(ContatoDiario.dia).all()]
+        day = rollups.day_expression(Contato.data_hora, dialect_name(session))
+        query = (
+            session.query(day, Contato.canal, func.count())
+            .filter(Contato.data_hora.between(*_day_bounds(data_inicio, data_fim)))
+            .group_by(day, Contato.canal)
+            .order_by(day)
+        )
+        return [tuple(row) for row in query.all()]
+
+
+@cached("contatos", "clientes", reporting.TABLE)
+def contacts_per_client(
+    data_inicio: date, data_fim: date, limit: int = 10, use_rollups: bool = True
+) -> list[tuple[int, str, int]]:
+    """Most contacted clients as `(cliente_id, nome, total)`.
+
+    The rollup is weekly, so with `use_rollups` the period is widened to
+    whole weeks (Monday of `data_inicio` through the week of `data_fim`).
+    Reads from the reporting copy when one is configured.
+    """
+    with reporting.get_session() as session:
+        if use_rollups:
+            total = func.sum(ContatoSemanalCliente.total).label("total")
+            query = (
+                session.query(ContatoSemanalCliente.cliente_id, Cliente.nome, total)
+                .join(Cliente, Cliente.id == ContatoSemanalCliente.cliente_id)
+                .filter(
+                    ContatoSemanalCliente.semana.between(
+                        rollups.week_start(data_inicio), rollups.week_start(data_fim)
+                    )
+                )
+                .group_by(ContatoSemanalCliente.cliente_id, Cliente.nome)
+            )
+        else:
+            total = func.count(Contato.id).label("total")
+            query = (
+                session.query(Contato.cliente_id, Cliente.nome, total)
+                .join(Cliente, Cliente.id == Contato.cliente_id)
+                .filter(Contato.data_hora.between(*_day_bounds(data_inicio, data_fim)))
+                .group_by(Contato.cliente_id, Cliente.nome)
+            )
+        query = query.order_by(total.desc()).limit(limit)
+        return [tuple(row) for row in query.all()]
+
+
+@cached("contatos")
+def count_overdue_followups(today: date) -> int:
+    """Count clients whose latest contact has a `proximo_contato` on or before `today`."""
+    with get_session() as session:
+        return (
+            session.query(func.count(UltimoContato.cliente_id))
+            .filter(UltimoContato.proximo_contato <= today)
+            .scalar()
+        )
+
+
+def due_followups(until: date, limit: int = 500) -> list[tuple]:
+    """Clients to contact: latest contact's `proximo_contato` on or before `until`.
+
+    Rows are `(cliente_id, nome, empresa, telefone, ultimo_contato,
+    proximo_contato)`, most overdue first.
+    """
+    with get_session() as session:
+        query = (
+            session.query(
+                UltimoContato.cliente_id,
+                Cliente.nome,
+                Cliente.empresa,
+                Cliente.telefone,
+                UltimoContato.data_hora,
+                UltimoContato.proximo_contato,
+            )
+            .join(Cliente, Cliente.id == UltimoContato.cliente_id)
+            .filter(UltimoContato.proximo_contato <= until)
+            .order_by(UltimoContato.proximo_contato.asc(), Cliente.nome.asc())
+            .limit(limit)
+        )
+        return [tuple(row) for row in query.all()]
+
+
+def start_followup_queue() -> None:
+    """Register the follow-up queue job and start the background scheduler."""
+    scheduler.register(
+        FOLLOWUP_QUEUE_JOB,
+        lambda: (date.today(), due_followups(date.today())),
+        interval=FOLLOWUP_REFRESH_SECONDS,
+        depends_on=("contatos", "clientes"),
+    )
+    scheduler.start()
+
+
+def followup_queue() -> tuple[date, list[tuple], float | None, str | None]:
+    """Latest precomputed follow-up queue.
+
+    Returns `(reference day, rows, age in seconds, error)`; `error` is the
+    message of the last failed run (the previous rows are kept, or none if
+    the job never succeeded).
+    """
+    start_followup_queue()
+    result = scheduler.result(FOLLOWUP_QUEUE_JOB)
+    job = scheduler.job(FOLLOWUP_QUEUE_JOB)
+    day, rows = result if result is not None else (date.today(), [])
+    return day, rows, job.age, job.error
+
+
+@invalidates("contatos")
+def rebuild_rollups() -> None:
+    """Recompute the dashboard rollups and the last-contact table from `contatos`."""
+    with get_session() as session:
+        rollups.rebuild(session.connection())
+        followups.rebuild(session.connection())
+
+
+@cached("clientes")
+def duplicate_candidates(
+    after: tuple[float, int, int] | None = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Page:
+    """Pending duplicate pairs, most similar first (keyset on score and ids).
+
+    Items are dicts with both client ids and labels, the score and the
+    matched signals.
+    """
+    first = aliased(Cliente)
+    second = aliased(Cliente)
+    with get_session() as session:
+        query = (
+            session.query(
+                DuplicataCandidata.score,
+                DuplicataCandidata.motivo,
+                first.id,
+                first.nome,
+                first.empresa,
+                second.id,
+                second.nome,
+                second.empresa,
+            )
+            .join(first, first.id == DuplicataCandidata.cliente_id)
+            .join(second, second.id == DuplicataCandidata.outro_id)
+            .filter(DuplicataCandidata.status == dedupe.PENDING)
+        )
+        if after:
+            score, first_id, second_id = after
+            query = query.filter(
+                or_(
+                    DuplicataCandidata.score < score,
+                    and_(
+                        DuplicataCandidata.score == score,
+                        or_(
+                            DuplicataCandidata.cliente_id > first_id,
+                            and_(
+                                DuplicataCandidata.cliente_id == first_id,
+                                DuplicataCandidata.outro_id > second_id,
+                            ),
+                        ),
+                    ),
+                )
+            )
+        rows = (
+            query.order_by(
+                DuplicataCandidata.score.desc(),
+                DuplicataCandidata.cliente_id.asc(),
+                DuplicataCandidata.outro_id.asc(),
+            )
+            .limit(limit + 1)
+            .all()
+        )
+    items = [
+        {
+            "score": score,
+            "motivo": motivo,
+            "cliente_id": first_id,
+            "cliente": client_label(first_id, first_nome, first_empresa),
+            "outro_id": second_id,
+            "outro": client_label(second_id, second_nome, second_empresa),
+        }
+        for (
+            score,
+            motivo,
+            first_id,
+            first_nome,
+            first_empresa,
+            second_id,
+            second_nome,
+            second_empresa,
+        ) in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = (last["score"], last["cliente_id"], last["outro_id"])
+    return Page(items=items, next_cursor=next_cursor)
+
+
+@cached("clientes")
+def count_duplicate_candidates() -> int:
+    """Number of duplicate pairs waiting for review."""
+    with get_session() as session:
+        return (
+            session.query(func.count())
+            .select_from(DuplicataCandidata)
+            .filter(DuplicataCandidata.status == dedupe.PENDING)
+            .scalar()
+        )
+
+
+@queued_write("clientes")
+def dismiss_duplicate(session: Session, client_id: int, other_id: int) -> bool:
+    """Mark a pair as not duplicated, so the checks stop suggesting it."""
+    low, high = sorted((client_id, other_id))
+    result = session.execute(
+        update(DuplicataCandidata)
+        .where(
+            DuplicataCandidata.cliente_id == low, DuplicataCandidata.outro_id == high
+        )
+        .values(status=dedupe.IGNORED)
+    )
+    return bool(result.rowcount)
+
+
+@queued_write("clientes", "contatos")
+def merge_clients(session: Session, keep_id: int, drop_id: int) -> Cliente | None:
+    """Merge client `drop_id` into `keep_id` and delete it.
+
+    Contacts move to the kept client, its blank fields are filled from the
+    other record and the tags of both are combined.
+    """
+    if keep_id == drop_id:
+        raise ValueError("Um cliente nao pode ser mesclado com ele mesmo")
+    keep = session.query(Cliente).filter(Cliente.id == keep_id).first()
+    drop = session.query(Cliente).filter(Cliente.id == drop_id).first()
+    if not keep or not drop:
+        return None
+    for field in ("email", "telefone", "empresa", "cargo"):
+        if not getattr(keep, field) and getattr(drop, field):
+            setattr(keep, field, getattr(drop, field))
+    if drop.observacoes and drop.observacoes != keep.observacoes:
+        keep.observacoes = "\n\n".join(
+            part for part in (keep.observacoes, drop.observacoes) if part
+        )
+    tags: dict[str, str] = {}
+    for tag in split_tags(keep.tags) + split_tags(drop.tags):
+        tags.setdefault(tag.lower(), tag)
+    keep.tags = normalize_tags(", ".join(tags.values()))
+
+    moved = session.execute(
+        select(Contato.id, Contato.data_hora, Contato.canal, Contato.cliente_id).where(
+            Contato.cliente_id == drop_id
+        )
+    ).all()
+    rollups.apply(session, [row[1:] for row in moved], -1)
+    rollups.apply(
+        session, [(data_hora, canal, keep_id) for _, data_hora, canal, _ in moved], +1
+    )
+    session.execute(
+        update(Contato).where(Contato.cliente_id == drop_id).values(cliente_id=keep_id)
+    )
+    tag_index.remove_client_tags(session, drop_id)
+    dedupe.remove_client(session, drop_id)
+    followups.remove_client(session, drop_id)
+    semantic.remove_notes(session, semantic.CLIENT, [drop_id])
+    session.delete(drop)
+    session.flush()
+    tag_index.sync_client_tags(session, {keep.id: keep.tags})
+    followups.refresh(session, [keep_id])
+    dedupe.refresh(session, [keep_id])
+    semantic.index_notes(session, semantic.CLIENT, [(keep.id, keep.observacoes)])
+    changelog.record_rows(session, changelog.UPDATE, Contato, [row.id for row in moved])
+    changelog.record_rows(session, changelog.UPDATE, Cliente, [keep_id])
+    changelog.record_deletes(session, Cliente, [drop_id])
+    return keep
+
+
+@invalidates("clientes")
+def rebuild_duplicates() -> None:
+    """Recompute every blocking key and the pending duplicate pairs."""
     with get_session() as session:
-        contact = session.query(Contato).filter(Contato.id == contact_id).first()
-        if not contact:
-            return False
-        session.delete(contact)
-        return True
+        dedupe.rebuild(session.connection())
@@ -0,0 +1,62 @@
+"""Process-level bootstrap for the Streamlit scripts.
+
+Streamlit re-executes the entry script and every page on each interaction.
+Schema creation/migration and background jobs (change-log compaction,
+optional snapshots and reporting copy) only need to happen once per process,
+so they run inside an `st.cache_resource` function: the first rerun pays for them,
+later reruns get the cached timings back.
+
+`bootstrap()` also marks the start of the rerun, so the time spent before
+the page body (bootstrap, auth, sidebar) is reported with the rerun's SQL
+stats, and reads the change-log head once per rerun, so writes from other
+processes (the API, imports on another server) clear this process's read
+cache before the page queries it.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+import streamlit as st
+
+from src import instrumentation
+
+
+@st.cache_resource(show_spinner=False)
+def _initialize() -> dict[str, float]:
+    from src.changelog import start_compaction_job
+    from src.db import init_db
+    from src.reporting import start_refresh_job
+
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    init_db()
+    timings["init_db_ms"] = (time.perf_counter() - started) * 1000
+    jobs_started = time.perf_counter()
+    start_compaction_job()
+    start_refresh_job()
+    # The export module pulls in the whole service layer; pages like Ajuda
+    # never need it, so it is only imported when snapshots are configured.
+    if os.getenv("CLIENTEFLOW_SNAPSHOT_DIR"):
+        from src.export import start_snapshot_job
+
+        start_snapshot_job()
+    timings["jobs_ms"] = (time.perf_counter() - jobs_started) * 1000
+    timings["total_ms"] = (time.perf_counter() - started) * 1000
+    instrumentation.log_startup(timings)
+    return timings
+
+
+def bootstrap() -> dict[str, float]:
+    """Initialize the process once, start timing the rerun, drop stale cache."""
+    from src.changelog import head_watcher
+
+    instrumentation.mark_rerun_start()
+    timings = _initialize()
+    head_watcher.check()
+    return timings
+
+
+def startup_timings() -> dict[str, float]:
+    """Timings of the one-time initialization of this process."""
+    return _initialize()
@@ -0,0 +1,88 @@
+"""Normalized tag storage: the `tags` / `cliente_tags` index tables."""
+from __future__ import annotations
+
+from typing import Mapping
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from src.db import upsert_insert
+from src.models import Cliente, Tag, cliente_tags
+from src.utils import tag_keys
+
+TAG_MODES = ("any", "all")
+
+
+def _tag_ids(connection: Connection | Session, keys: set[str]) -> dict[str, int]:
+    """Return the ids of `keys`, creating the tags that do not exist yet."""
+    if not keys:
+        return {}
+    connection.execute(
+        upsert_insert(connection, Tag).on_conflict_do_nothing(index_elements=["nome"]),
+        [{"nome": key} for key in sorted(keys)],
+    )
+    rows = connection.execute(select(Tag.nome, Tag.id).where(Tag.nome.in_(keys)))
+    return dict(rows.all())
+
+
+def sync_client_tags(
+    connection: Connection | Session, tags_by_client: Mapping[int, str | None]
+) -> None:
+    """Replace the tag links of each client with the tags of its tags string."""
+    if not tags_by_client:
+        return
+    keys_by_client = {
+        client_id: tag_keys(tags) for client_id, tags in tags_by_client.items()
+    }
+    ids = _tag_ids(
+        connection, {key for keys in keys_by_client.values() for key in keys}
+    )
+    connection.execute(
+        delete(cliente_tags).where(cliente_tags.c.cliente_id.in_(list(tags_by_client)))
+    )
+    links = [
+        {"cliente_id": client_id, "tag_id": ids[key]}
+        for client_id, keys in keys_by_client.items()
+        for key in keys
+    ]
+    if links:
+        connection.execute(insert(cliente_tags), links)
+
+
+def remove_client_tags(connection: Connection | Session, client_id: int) -> None:
+    """Drop the tag links of a client (for databases without FK enforcement)."""
+    connection.execute(
+        delete(cliente_tags).where(cliente_tags.c.cliente_id == client_id)
+    )
+
+
+def tag_filter_condition(tags: str, mode: str = "any") -> ColumnElement[bool] | None:
+    """Condition on `Cliente.id` for clients having any/all of the given tags."""
+    if mode not in TAG_MODES:
+        raise ValueError(f"Modo de tags invalido: {mode}")
+    keys = tag_keys(tags)
+    if not keys:
+        return None
+    matching = (
+        select(cliente_tags.c.cliente_id)
+        .join(Tag, Tag.id == cliente_tags.c.tag_id)
+        .where(Tag.nome.in_(keys))
+    )
+    if mode == "all" and len(keys) > 1:
+        matching = matching.group_by(cliente_tags.c.cliente_id).having(
+            func.count() == len(keys)
+        )
+    return Cliente.id.in_(matching)
+
+
+def backfill(connection: Connection, batch_size: int = 1000) -> None:
+    """Populate the tag tables from the existing `clientes.tags` strings."""
+    result = connection.execute(
+        select(Cliente.id, Cliente.tags)
+        .where(Cliente.tags.is_not(None))
+        .execution_options(yield_per=batch_size)
+    )
+    for rows in result.partitions():
+        sync_client_tags(connection, dict(rows))
@@ -1,22 +1,36 @@
 """Utility helpers for ClienteFlow."""
 from __future__ import annotations
 
+import math
 import os
-from typing import Iterable
+from pathlib import Path
+from typing import Any, Hashable, Iterable
 
 import streamlit as st
 
+from src import instrumentation
+
+
+def split_tags(value: str | None) -> list[str]:
+    """Split a comma separated tags string into trimmed, non-empty parts."""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
 
 def normalize_tags(value: str | None) -> str | None:
     """Normalize tags into a comma separated string."""
-    if not value:
-        return None
-    parts = [part.strip() for part in value.split(",") if part.strip()]
+    parts = split_tags(value)
     if not parts:
         return None
     return ", ".join(parts)
 
 
+def tag_keys(value: str | None) -> list[str]:
+    """Unique lowercase tag keys, as stored in the `tags` table."""
+    return list(dict.fromkeys(part.lower() for part in split_tags(value)))
+
+
 def normalize_phone(value: str | None) -> str | None:
     """Normalize phone with trimmed spaces."""
     if not value:
@@ -31,6 +45,20 @@ def get_credentials() -> tuple[str, str]:
     return user, password
 
 
+def is_admin() -> bool:
+    """Whether the logged user may see admin tools.
+
+    Admins come from CLIENTEFLOW_ADMINS (comma separated), defaulting to the
+    configured login user.
+    """
+    user = st.session_state.get("user")
+    if not st.session_state.get("auth") or not user:
+        return False
+    admins = os.getenv("CLIENTEFLOW_ADMINS")
+    allowed = admins.split(",") if admins else [get_credentials()[0]]
+    return user in {name.strip() for name in allowed}
+
+
 def login_gate() -> bool:
     """Render login form and return auth status."""
     if st.session_state.get("auth"):
@@ -46,6 +74,7 @@ def login_gate() -> bool:
     if submitted:
         if username == user_env and password == pass_env:
             st.session_state["auth"] = True
+            st.session_state["user"] = username
             st.success("Login ok")
             st.rerun()
         else:
@@ -60,13 +89,99 @@ def require_auth() -> None:
         st.stop()
 
 
-def sidebar_header(title: str) -> None:
-    """Render a common sidebar header with logout."""
+def start_query_stats(page: str) -> None:
+    """Start SQL stats for this rerun, logging and keeping the previous one."""
+    previous = st.session_state.get("query_stats")
+    if previous is not None:
+        instrumentation.log_rerun(previous)
+    st.session_state["query_stats_last"] = previous
+    st.session_state["query_stats"] = instrumentation.start_rerun(page)
+
+
+def query_panel() -> None:
+    """Admin-only sidebar panel with the SQL stats of the previous rerun."""
+    from src.cache import cache_stats
+    from src.startup import startup_timings
+    from src.writer import writer
+
+    stats = st.session_state.get("query_stats_last")
+    with st.sidebar.expander("Consultas SQL (execucao anterior)"):
+        if stats is None:
+            st.caption("Sem dados ainda: interaja com a pagina.")
+        else:
+            st.caption(stats.page)
+            col_a, col_b = st.columns(2)
+            col_a.metric("Consultas", stats.queries)
+            col_b.metric("Tempo no banco", f"{stats.db_time_ms:.1f} ms")
+            st.caption(f"Preparacao da pagina: {stats.setup_ms:.1f} ms")
+            if stats.slow:
+                st.markdown(
+                    f"**Lentas (> {instrumentation.SLOW_QUERY_MS:.0f} ms)**"
+                )
+                for slow in stats.slow:
+                    st.code(slow.statement, language="sql")
+                    st.caption(f"{slow.duration_ms:.1f} ms")
+                    if slow.plan:
+                        st.text("\n".join(slow.plan))
+        cache = cache_stats()
+        st.caption(
+            f"Cache: {cache['hits']} hits, {cache['misses']} misses, "
+            f"{cache['entries']} entradas"
+        )
+        writes = writer.stats()
+        st.caption(
+            f"Escritas: {writes['commands']} em {writes['batches']} commits, "
+            f"{writes['pending']} na fila"
+        )
+        startup = startup_timings()
+        st.caption(
+            f"Inicializacao do processo: {startup['total_ms']:.0f} ms "
+            f"(banco {startup['init_db_ms']:.0f} ms)"
+        )
+
+
+def sidebar_header(title: str, page: str) -> None:
+    """Render a common sidebar header with logout.
+
+    `page` is the calling script's `__file__`; its name labels the SQL
+    stats of the rerun.
+    """
+    start_query_stats(Path(page).name)
     st.sidebar.title(title)
     if st.session_state.get("auth"):
         if st.sidebar.button("Logout"):
             st.session_state["auth"] = False
+            st.session_state.pop("user", None)
             st.rerun()
+        if is_admin():
+            query_panel()
+
+
+def page_cursor(key: str, filters: Hashable) -> Any:
+    """Return the keyset cursor for the current page of a paginated view.
+
+    The page history is kept in session state and resets whenever the
+    filters of the view change.
+    """
+    state = st.session_state.get(key)
+    if state is None or state["filters"] != filters:
+        state = {"filters": filters, "stack": [None]}
+        st.session_state[key] = state
+    return state["stack"][-1]
+
+
+def page_controls(key: str, total: int, page_size: int, next_cursor: Any) -> None:
+    """Render previous/next controls for a view using `page_cursor`."""
+    stack = st.session_state[key]["stack"]
+    pages = max(1, math.ceil(total / page_size))
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    if col_prev.button("Anterior", key=f"{key}_prev", disabled=len(stack) == 1):
+        stack.pop()
+        st.rerun()
+    col_info.caption(f"Pagina {len(stack)} de {pages} ({total} registros)")
+    if col_next.button("Proxima", key=f"{key}_next", disabled=next_cursor is None):
+        stack.append(next_cursor)
+        st.rerun()
 
 
 def format_tags(tags: str | None) -> str:
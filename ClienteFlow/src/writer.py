@@ -0,0 +1,236 @@
+"""Single writer thread with group commit for the service write path.
+
+SQLite allows one writer at a time, so concurrent form submits used to
+queue up on the database lock, each paying for its own transaction. Here
+every write is a command (a function of a `Session`) put on one queue; a
+background thread drains whatever is waiting, runs the batch in a single
+transaction and commits once. Each caller gets a `Future` resolved after
+the commit, once the read cache has been invalidated for the tables the
+command touches.
+
+If any command of a batch fails, the batch is rolled back and, if it held
+more than one command, they are retried one transaction each, so a bad
+command only fails its own future.
+
+A caller that gives up waiting after `WAIT_TIMEOUT` cancels its command if
+the thread has not picked it up yet (`WriteTimeout`: nothing was written).
+Once the command is running it can no longer be stopped, and the caller
+gets `WriteOutcomeUnknown` instead: it may still commit.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.orm import Session
+
+from src import instrumentation
+from src.cache import read_cache
+from src.db import SessionLocal
+from src.instrumentation import RerunStats
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAX_BATCH = int(os.getenv("CLIENTEFLOW_WRITE_BATCH", "100"))
+WAIT_TIMEOUT = float(os.getenv("CLIENTEFLOW_WRITE_TIMEOUT", "30"))
+
+
+class WriteTimeout(TimeoutError):
+    """The write was cancelled before it ran: nothing was written."""
+
+
+class WriteOutcomeUnknown(WriteTimeout):
+    """The write was still running when its caller gave up; it may commit."""
+
+
+@dataclass
+class WriteCommand:
+    """One queued write and the future its caller waits on."""
+
+    func: Callable[[Session], Any]
+    tables: tuple[str, ...]
+    future: Future = field(default_factory=Future)
+    # SQL stats of the rerun that queued the command (None outside reruns).
+    stats: RerunStats | None = field(default_factory=instrumentation.current_stats)
+
+
+class Writer:
+    """Queue of write commands consumed by one daemon thread."""
+
+    def __init__(self, max_batch: int = MAX_BATCH) -> None:
+        self.max_batch = max_batch
+        self._queue: queue.Queue[WriteCommand | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stats = {"commands": 0, "batches": 0, "retried_batches": 0}
+
+    def submit(self, func: Callable[[Session], Any], *tables: str) -> Future:
+        """Queue `func(session)`; the future resolves to its result after commit."""
+        self.start()
+        command = WriteCommand(func, tables)
+        self._queue.put(command)
+        return command.future
+
+    def run(self, func: Callable[[Session], Any], *tables: str) -> Any:
+        """Queue `func(session)` and wait for its committed result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Escrita enfileirada de dentro do proprio escritor")
+        future = self.submit(func, *tables)
+        try:
+            return future.result(timeout=WAIT_TIMEOUT)
+        except TimeoutError:
+            if not future.done():
+                return self.abandon(future)
+            raise
+
+    def abandon(self, future: Future) -> Any:
+        """Stop waiting for `future`: cancel it, or report that it cannot be.
+
+        Returns the result if the command finished in the meantime.
+        """
+        if future.cancel():
+            raise WriteTimeout(
+                f"A fila de escrita nao respondeu em {WAIT_TIMEOUT:g}s; "
+                "nada foi gravado, tente novamente"
+            )
+        if future.done():
+            return future.result()
+        raise WriteOutcomeUnknown(
+            f"A escrita nao terminou em {WAIT_TIMEOUT:g}s e ainda esta em andamento; "
+            "confira se foi gravada antes de repetir"
+        )
+
+    def start(self) -> None:
+        """Start the writer thread once per process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._loop, name="clienteflow-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Finish the queued commands, then stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict[str, Any]:
+        """Commands and batches processed so far, plus the current backlog."""
+        return {**self._stats, "pending": self._queue.qsize()}
+
+    def _next_batch(self) -> tuple[list[WriteCommand], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                command = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if command is None:
+                return batch, True
+            batch.append(command)
+        return batch, False
+
+    def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            # Skip commands whose caller cancelled the future meanwhile.
+            batch = [
+                command
+                for command in batch
+                if command.future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                results = self._commit(batch)
+            except Exception as exc:
+                if len(batch) == 1:
+                    # Nothing to isolate: replaying would run the write twice.
+                    batch[0].future.set_exception(exc)
+                else:
+                    self._retry_one_by_one(batch)
+            else:
+                for command, result in zip(batch, results):
+                    command.future.set_result(result)
+            self._stats["batches"] += 1
+            self._stats["commands"] += len(batch)
+
+    def _retry_one_by_one(self, batch: list[WriteCommand]) -> None:
+        logger.warning(
+            "Lote de %d escritas falhou; reprocessando individualmente",
+            len(batch),
+            exc_info=True,
+        )
+        self._stats["retried_batches"] += 1
+        for command in batch:
+            try:
+                (result,) = self._commit([command])
+            except Exception as exc:
+                command.future.set_exception(exc)
+            else:
+                command.future.set_result(result)
+
+    def _commit(self, batch: list[WriteCommand]) -> list[Any]:
+        session: Session = SessionLocal()
+        try:
+            results = []
+            for command in batch:
+                with instrumentation.attributed_to(command.stats):
+                    results.append(command.func(session))
+                    # Flush here so its statements count for this command.
+                    session.flush()
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        read_cache.invalidate(
+            *{table for command in batch for table in command.tables}
+        )
+        return results
+
+
+writer = Writer()
+
+
+def queued_write(*tables: str) -> Callable[[F], F]:
+    """Route a `func(session, *args)` write through the writer queue.
+
+    The decorated function is called without the session and blocks until
+    its batch commits; `.submit(*args)` returns the `Future` instead, and
+    `.direct(session, *args)` runs it inside a caller-managed transaction.
+    `tables` are invalidated in the read cache after the commit.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return writer.run(lambda session: func(session, *args, **kwargs), *tables)
+
+        def submit(*args, **kwargs) -> Future:
+            return writer.submit(lambda session: func(session, *args, **kwargs), *tables)
+
+        wrapper.submit = submit  # type: ignore[attr-defined]
+        wrapper.direct = func  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator